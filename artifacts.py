@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import threading
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, Optional, Set
+
+from blobstore import BlobStore
 
 
 @dataclass
 class Artifact:
     kind: str
-    payload: Dict[str, Any]
+    blob: str
+    size: int
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
@@ -24,25 +29,231 @@ class ArtifactStore:
     - qa reports
     - synthesis
     - deliverables
+    Payloads are content-addressed blobs (blobs/<sha256[:2]>/<sha256>.json), written once
+    however often they are referenced. add() appends one line per artifact to index.jsonl
+    as it happens, so nothing is held in memory and a crash keeps everything added so far.
+    Named files (framing.json, ...) are hard links to their blob where the filesystem
+    allows it, copies otherwise. Blobs are written read-only (0444), so editing a named
+    file in place fails instead of silently changing the blob every link shares; rewrite
+    it with write_json(). Stage checkpoints in stages/ reference their output blob instead
+    of embedding it.
+    Safe for concurrent writers: blobs and named files are created under unique temp names
+    and renamed into place, and each index line is a single O_APPEND write.
+    fsync=False skips the per-write fsync, trading crash durability for speed.
+    The index and refs stay open for appending until flush() or close(); use the store as a
+    context manager (with ArtifactStore(...) as store:) so they are closed however a run ends.
+    readonly=True opens an existing run directory for reading without creating anything.
+
+    With blobs=BlobStore(...) payloads go to that shared, compressed store instead
+    (blobstore.py), so identical payloads across runs are stored once. Named JSON files
+    are then entries in refs.jsonl rather than files; read_json() resolves them, and the
+    run dir records the store in blobstore.json so later readers find it without being told,
+    and registers itself in the store (BlobStore.register_run) so gc counts its references.
     """
 
-    def __init__(self, run_dir: str):
+    STAGES_DIR = "stages"
+    BLOBS_DIR = "blobs"
+    INDEX = "index.jsonl"
+    REFS = "refs.jsonl"
+    BLOBSTORE = "blobstore.json"
+
+    def __init__(self, run_dir: str, fsync: bool = True, blobs: Optional[BlobStore] = None, readonly: bool = False):
         self.run_dir = run_dir
-        os.makedirs(self.run_dir, exist_ok=True)
-        self._index: List[Artifact] = []
+        self.fsync = fsync
+        if readonly and not os.path.isdir(run_dir):
+            raise FileNotFoundError(f"No run directory {run_dir}")
+        if not readonly:
+            os.makedirs(os.path.join(self.run_dir, self.STAGES_DIR), exist_ok=True)
+        marker = os.path.join(self.run_dir, self.BLOBSTORE)
+        if blobs is not None and not readonly:
+            if not os.path.exists(marker):
+                # Registered before the marker exists, so gc never misses a run using the store.
+                blobs.register_run(self.run_dir)
+            self._write_bytes(marker, self._encode({"root": os.path.relpath(blobs.root, self.run_dir)}))
+        elif blobs is None and os.path.exists(marker):
+            with open(marker, "r", encoding="utf-8") as f:
+                root = json.load(f)["root"]
+            blobs = BlobStore(os.path.join(self.run_dir, root), fsync=fsync, create=not readonly)
+        elif not readonly:
+            os.makedirs(os.path.join(self.run_dir, self.BLOBS_DIR), exist_ok=True)
+        self.blobs = blobs
+        self._append_lock = threading.Lock()
+        self._fds: Dict[str, int] = {}
+        self._refs: Optional[Dict[str, str]] = None
+
+    def _tmp(self, path: str) -> str:
+        return f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.run_dir, self.BLOBS_DIR, digest[:2], f"{digest}.json")
+
+    @staticmethod
+    def _encode(payload: Any) -> bytes:
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+    def _write_bytes(self, path: str, data: bytes, mode: Optional[int] = None) -> None:
+        tmp = self._tmp(path)
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+
+    def _put(self, data: bytes) -> str:
+        if self.blobs is not None:
+            return self.blobs.put(data)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Identical content under the same name, so racing writers can't clobber each other.
+            self._write_bytes(path, data, mode=0o444)
+        return digest
+
+    def put_blob(self, payload: Any) -> str:
+        """Stores payload as a blob (no-op if it is already stored) and returns its sha256."""
+        return self._put(self._encode(payload))
+
+    def get_blob(self, digest: str) -> Any:
+        if self.blobs is not None:
+            return json.loads(self.blobs.get(digest))
+        with open(self._blob_path(digest), "rb") as f:
+            return json.loads(f.read())
+
+    def _append(self, filename: str, record: Dict[str, Any]) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._append_lock:
+            fd = self._fds.get(filename)
+            if fd is None:
+                path = os.path.join(self.run_dir, filename)
+                fd = self._fds[filename] = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            os.write(fd, line)
+            if self.fsync:
+                os.fsync(fd)
 
-    def add(self, kind: str, payload: Dict[str, Any]) -> None:
-        self._index.append(Artifact(kind=kind, payload=payload))
+    def add(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Stores payload and appends an index entry for it; returns the blob digest."""
+        data = self._encode(payload)
+        digest = self._put(data)
+        self._append(self.INDEX, asdict(Artifact(kind=kind, blob=digest, size=len(data))))
+        return digest
+
+    @staticmethod
+    def _read_lines(path: str) -> Iterator[Dict[str, Any]]:
+        # A torn last line (crash mid-write) is skipped.
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """Index entries in the order they were added."""
+        return self._read_lines(os.path.join(self.run_dir, self.INDEX))
+
+    @classmethod
+    def references_in(cls, run_dir: str) -> Set[str]:
+        """Blob digests a run directory refers to (index, named refs and checkpoints); read-only."""
+        refs = {e["blob"] for e in cls._read_lines(os.path.join(run_dir, cls.INDEX)) if "blob" in e}
+        refs |= {e["blob"] for e in cls._read_lines(os.path.join(run_dir, cls.REFS)) if "blob" in e}
+        stages_dir = os.path.join(run_dir, cls.STAGES_DIR)
+        if os.path.isdir(stages_dir):
+            for fn in os.listdir(stages_dir):
+                if fn.endswith(".json"):
+                    with open(os.path.join(stages_dir, fn), "r", encoding="utf-8") as f:
+                        record = json.load(f)
+                    if "blob" in record:
+                        refs.add(record["blob"])
+        return refs
 
     def flush(self) -> None:
-        idx = [asdict(a) for a in self._index]
-        with open(os.path.join(self.run_dir, "index.json"), "w", encoding="utf-8") as f:
-            json.dump(idx, f, ensure_ascii=False, indent=2)
+        """Makes the index and refs durable and releases their file handles; writes reopen them."""
+        with self._append_lock:
+            for fd in self._fds.values():
+                os.fsync(fd)
+                os.close(fd)
+            self._fds.clear()
+
+    def close(self) -> None:
+        """Releases the index and refs file handles without forcing them to disk; writes reopen them."""
+        with self._append_lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+
+    def __enter__(self) -> "ArtifactStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
 
-    def write_json(self, filename: str, payload: Dict[str, Any]) -> None:
-        with open(os.path.join(self.run_dir, filename), "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+    def _link(self, digest: str, filename: str) -> None:
+        path = os.path.join(self.run_dir, filename)
+        blob = self._blob_path(digest)
+        if os.path.exists(path) and os.path.samefile(path, blob):
+            return
+        tmp = self._tmp(path)
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            with open(blob, "rb") as f:
+                self._write_bytes(path, f.read())
+            return
+        os.replace(tmp, path)
+        # rename() between two links to one file is a no-op that leaves the source behind.
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+
+    def write_json(self, filename: str, payload: Any) -> str:
+        """Writes a named JSON file backed by the payload's blob; returns the blob digest."""
+        digest = self.put_blob(payload)
+        if self.blobs is not None:
+            self._append(self.REFS, {"name": filename, "blob": digest})
+            if self._refs is not None:
+                self._refs[filename] = digest
+        else:
+            self._link(digest, filename)
+        return digest
+
+    def refs(self) -> Dict[str, str]:
+        """{name: blob digest} for named files kept in the shared store; the latest write wins."""
+        if self._refs is None:
+            self._refs = {e["name"]: e["blob"] for e in self._read_lines(os.path.join(self.run_dir, self.REFS))}
+        return dict(self._refs)
 
     def write_text(self, filename: str, text: str) -> None:
-        with open(os.path.join(self.run_dir, filename), "w", encoding="utf-8") as f:
-            f.write(text)
\ No newline at end of file
+        self._write_bytes(os.path.join(self.run_dir, filename), text.encode("utf-8"))
+
+    def read_json(self, filename: str) -> Optional[Any]:
+        path = os.path.join(self.run_dir, filename)
+        if not os.path.exists(path):
+            digest = self.refs().get(filename) if self.blobs is not None else None
+            return self.get_blob(digest) if digest else None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def checkpoint(self, stage: str, payload: Any, fingerprint: str = "", **meta: Any) -> None:
+        """Records a finished stage; meta (e.g. latency_s) is stored alongside for the run catalog."""
+        record = {"stage": stage, "fingerprint": fingerprint, "blob": self.put_blob(payload), **meta}
+        self._write_bytes(os.path.join(self.run_dir, self.STAGES_DIR, f"{stage}.json"), self._encode(record))
+
+    def load_checkpoints(self) -> Dict[str, Dict[str, Any]]:
+        """Returns {stage: {"stage", "fingerprint", "output"}} for every checkpointed stage."""
+        out: Dict[str, Dict[str, Any]] = {}
+        stages_dir = os.path.join(self.run_dir, self.STAGES_DIR)
+        if not os.path.isdir(stages_dir):
+            return out
+        for fn in sorted(os.listdir(stages_dir)):
+            if fn.endswith(".json"):
+                record = self.read_json(os.path.join(self.STAGES_DIR, fn))
+                # Runs written before blobs existed embed the output directly.
+                if "blob" in record:
+                    record["output"] = self.get_blob(record.pop("blob"))
+                out[fn[: -len(".json")]] = record
+        return out
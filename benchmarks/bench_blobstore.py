@@ -0,0 +1,103 @@
+"""
+Benchmark: run-archive size and backup time, per-run artifacts vs the shared compressed BlobStore.
+
+Writes --runs synthetic run directories through ArtifactStore in both modes. Each run stores
+the same shape of artifacts as the orchestrator; the brief and framing repeat across runs
+(as they do with cached LLM calls) and the rest vary with probability --vary. "Backup" is
+a tar of the archive to memory.
+
+    python benchmarks/bench_blobstore.py [--runs 200] [--vary 0.3]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import random
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artifacts import ArtifactStore  # noqa: E402
+from blobstore import BlobStore  # noqa: E402
+
+_PERSONA = {
+    "persona": "A semi-retired logistics manager from Leeds who mentors small hauliers. " * 4,
+    "skills": ["route planning", "fleet maintenance", "customs paperwork", "driver scheduling"],
+    "age": 58,
+    "region": "Yorkshire",
+}
+
+
+def _payloads(rng: random.Random, vary: float, run: int) -> Dict[str, Any]:
+    def variant() -> int:
+        return run if rng.random() < vary else 0
+
+    ideas = [{"name": f"Idea {i}", "what_it_is": "Outsourced month-end close for accountants. " * 8, "persona": _PERSONA} for i in range(6)]
+    return {
+        "brief": {"brief": "UK profile, £15k capital, B2B, boring-but-profitable. " * 20},
+        "framing": {"key_question": "Which B2B service reaches £5k MRR in 90 days?", "tree": ["branch"] * 40},
+        "workplan": {"variant": variant(), "steps": ["Interview ten firms about their close process"] * 30},
+        **{f"pod.{p}": {"variant": variant(), "notes": f"{p} analysis with buyers and pricing. " * 60, "ideas": ideas}
+           for p in ("market", "economics", "competition", "ops", "implementation")},
+        "synthesis": {"variant": variant(), "summary": "Launch a close service. " * 80, "ideas": ideas},
+    }
+
+
+def write_runs(root: str, n: int, vary: float, blobs: BlobStore = None) -> float:
+    rng = random.Random(7)
+    t0 = time.perf_counter()
+    for run in range(n):
+        store = ArtifactStore(os.path.join(root, f"case_{run:05d}"), fsync=False, blobs=blobs)
+        payloads = _payloads(rng, vary, run)
+        for kind, payload in payloads.items():
+            store.add(kind, payload)
+            store.checkpoint(kind, payload)
+        store.write_json("framing.json", payloads["framing"])
+        store.write_json("pods.json", {k: v for k, v in payloads.items() if k.startswith("pod.")})
+        store.write_json("synthesis.json", payloads["synthesis"])
+        store.flush()
+    return time.perf_counter() - t0
+
+
+def disk_usage(root: str) -> Tuple[int, int]:
+    """(bytes, files), counting hard-linked inodes once."""
+    seen, total, files = set(), 0, 0
+    for dirpath, _, filenames in os.walk(root):
+        for fn in filenames:
+            st = os.lstat(os.path.join(dirpath, fn))
+            files += 1
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
+    return total, files
+
+
+def backup_s(root: str) -> float:
+    t0 = time.perf_counter()
+    with tarfile.open(fileobj=io.BytesIO(), mode="w") as tar:
+        tar.add(root, arcname="runs")
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=200)
+    ap.add_argument("--vary", type=float, default=0.3, help="Chance each non-shared artifact differs per run")
+    args = ap.parse_args()
+
+    print(f"{'mode':>8}  {'MB':>7}  {'files':>6}  {'write_s':>7}  {'backup_s':>8}")
+    for mode in ("per-run", "shared"):
+        with tempfile.TemporaryDirectory() as root:
+            blobs = BlobStore(os.path.join(root, ".blobs"), fsync=False) if mode == "shared" else None
+            write = write_runs(root, args.runs, args.vary, blobs)
+            size, files = disk_usage(root)
+            print(f"{mode:>8}  {size / 1e6:>7.2f}  {files:>6}  {write:>7.2f}  {backup_s(root):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: near-duplicate detection for idea dedupe, the old all-pairs loop vs minhash.NearDupIndex.
+
+Synthetic ideas are drawn from a shared vocabulary; a fraction are paraphrased copies
+(a few words swapped, sometimes for a different customer wording) of earlier ones.
+The all-pairs loop is quadratic, so by default it only runs up to --old_max ideas.
+
+    python benchmarks/bench_dedupe.py [--n 10000] [--dup_rate 0.2] [--threshold 0.6]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minhash import NearDupIndex, jaccard, tokens  # noqa: E402
+
+_WORDS = (
+    "invoice reconciliation payroll compliance audit logistics freight customs broker import export "
+    "packaging label printing cold chain warehouse inventory forecasting procurement supplier onboarding "
+    "clinic dental veterinary salon gym studio restaurant bakery brewery winery farm greenhouse solar "
+    "roofing plumbing electrical hvac landscaping cleaning security fleet maintenance repair refurbishment "
+    "recycling textile furniture ceramics signage translation subtitling bookkeeping tax grant tender "
+    "insurance claims property letting student housing care home nursery tutoring training certification"
+).split()
+_CUSTOMERS = [f"{a} {b}" for a in ("small", "independent", "regional", "family-run", "UK") for b in _WORDS[:40]]
+
+
+def _normalize(s: str) -> str:
+    s = (s or "").lower()
+    s = re.sub(r"[^a-z0-9]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def make_ideas(n: int, dup_rate: float, seed: int = 7) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    ideas: List[Dict[str, str]] = []
+    for i in range(n):
+        if ideas and rng.random() < dup_rate:
+            src = rng.choice(ideas)
+            words = src["what_it_is"].split()
+            for _ in range(2):
+                words[rng.randrange(len(words))] = rng.choice(_WORDS)
+            customer = src["target_customer"] if rng.random() < 0.5 else src["target_customer"].replace(" ", " local ", 1)
+            ideas.append({"id": f"i{i}", "name": src["name"] + " Pro", "what_it_is": " ".join(words), "target_customer": customer})
+        else:
+            ideas.append(
+                {
+                    "id": f"i{i}",
+                    "name": " ".join(rng.sample(_WORDS, 3)).title(),
+                    "what_it_is": " ".join(rng.choice(_WORDS) for _ in range(24)),
+                    "target_customer": rng.choice(_CUSTOMERS),
+                }
+            )
+    return ideas
+
+
+def old_dedupe(ideas: List[Dict[str, str]]) -> int:
+    """The previous dedupe_ideas loop: token sets rebuilt per pair, exact customer match required."""
+    kept: List[Dict[str, str]] = []
+    seen = set()
+    for idea in ideas:
+        key = (_normalize(idea["name"]), _normalize(idea["target_customer"]))
+        if key in seen:
+            continue
+        too_close = False
+        for k in kept:
+            a = set(_normalize(idea["what_it_is"]).split())
+            b = set(_normalize(k["what_it_is"]).split())
+            if a and b:
+                j = len(a & b) / max(1, len(a | b))
+                if j >= 0.72 and _normalize(idea["target_customer"]) == _normalize(k["target_customer"]):
+                    too_close = True
+                    break
+        if too_close:
+            continue
+        seen.add(key)
+        kept.append(idea)
+    return len(kept)
+
+
+def index_dedupe(ideas: List[Dict[str, str]], threshold: float) -> int:
+    """dedupe_ideas' near-duplicate rule: what_it_is similarity within one target customer."""
+    index = NearDupIndex(threshold=threshold)
+    kept = 0
+    for idea in ideas:
+        customer = _normalize(idea["target_customer"])
+        if any(c == customer for (c, _), _ in index.query(idea["what_it_is"])):
+            continue
+        index.add((customer, idea["id"]), idea["what_it_is"])
+        kept += 1
+    return kept
+
+
+def exact_dedupe(ideas: List[Dict[str, str]], threshold: float) -> int:
+    """Same rule as the index, all pairs and exact: the recall reference."""
+    kept: List[Tuple[str, frozenset]] = []
+    for idea in ideas:
+        customer, t = _normalize(idea["target_customer"]), tokens(idea["what_it_is"])
+        if not any(c == customer and jaccard(t, k) >= threshold for c, k in kept):
+            kept.append((customer, t))
+    return len(kept)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=10_000)
+    ap.add_argument("--dup_rate", type=float, default=0.2)
+    ap.add_argument("--threshold", type=float, default=0.72)
+    ap.add_argument("--old_max", type=int, default=1_000, help="Largest n for the quadratic loops")
+    args = ap.parse_args()
+
+    sizes = sorted({s for s in (1_000, 2_000, 5_000, args.n) if s <= args.n})
+    print(f"{'n':>6}  {'method':>13}  {'kept':>6}  {'seconds':>8}")
+    for n in sizes:
+        ideas = make_ideas(n, args.dup_rate)
+        runs = [("minhash+lsh", lambda: index_dedupe(ideas, args.threshold))]
+        if n <= args.old_max:
+            runs += [
+                ("old all-pairs", lambda: old_dedupe(ideas)),
+                ("exact jaccard", lambda: exact_dedupe(ideas, args.threshold)),
+            ]
+        for name, fn in runs:
+            t0 = time.perf_counter()
+            kept = fn()
+            print(f"{n:>6}  {name:>13}  {kept:>6}  {time.perf_counter() - t0:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark: schema.extract_json (single-pass scanner) vs the old greedy regex.
+
+    python benchmarks/bench_extract_json.py [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema import extract_json  # noqa: E402
+
+_OLD_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def old_extract_json(text: str) -> Dict[str, Any]:
+    m = _OLD_RE.search((text or "").strip())
+    if not m:
+        raise ValueError("No JSON found in model output.")
+    return json.loads(m.group(0))
+
+
+def _idea(i: int) -> Dict[str, Any]:
+    return {
+        "name": f"Idea {i}",
+        "what_it_is": "Reconciliation service for {small} accounting firms " * 4,
+        "operating_steps": [f"step {j}" for j in range(6)],
+        "notes": 'quote " and brace } inside a string',
+    }
+
+
+def cases() -> List[Tuple[str, str]]:
+    big = json.dumps({"ideas": [_idea(i) for i in range(4000)]})
+    return [
+        ("clean", json.dumps(_idea(0))),
+        ("large_1MB", "Here you go:\n" + big + "\nLet me know {if} you need more."),
+        ("fenced", "Sure! Use {placeholders} as needed.\n```json\n" + json.dumps(_idea(1), indent=2) + "\n```\n"),
+        ("two_objects", json.dumps(_idea(2)) + "\n\nAlternative:\n" + json.dumps(_idea(3))),
+        ("prose_braces", "Think of it as {a set} of {steps}. " * 200 + json.dumps(_idea(4))),
+        ("unclosed_prose", "Note: {this is never closed " + json.dumps(_idea(5))),
+        ("pathological_open", "{" * 20_000),
+        ("pathological_mixed", ("{ x " * 5_000) + json.dumps(_idea(6))),
+    ]
+
+
+def bench(fn: Callable[[str], Dict[str, Any]], text: str, repeat: int) -> Tuple[float, str]:
+    best = float("inf")
+    outcome = "ok"
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        try:
+            fn(text)
+        except Exception as e:
+            outcome = type(e).__name__
+        best = min(best, time.perf_counter() - t0)
+    return best, outcome
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'case':<20} {'bytes':>9} {'old ms':>10} {'old':>16} {'new ms':>10} {'new':>16}")
+    for name, text in cases():
+        old_s, old_out = bench(old_extract_json, text, args.repeat)
+        new_s, new_out = bench(extract_json, text, args.repeat)
+        print(f"{name:<20} {len(text):>9} {old_s * 1e3:>10.2f} {old_out:>16} {new_s * 1e3:>10.2f} {new_out:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Shared-prefix check: runs one case through the orchestrator against a local stand-in for
+the provider (no network) and reports, per stage, whether the request starts with the same
+bytes as every other stage sharing the brief + framing prefix, and how much of the total
+input could be served from a provider prompt cache.
+
+    python benchmarks/bench_prefix_cache.py [--brief_chars 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from case import CaseInput  # noqa: E402
+from llm import LLMClient  # noqa: E402
+from orchestrator import ConsultingOrchestrator  # noqa: E402
+
+_CANNED = {
+    "key_question": {"key_question": "q", "success_metrics": ["m"], "issue_tree": {"node": "n", "children": []}},
+    "workstreams": {"workstreams": [{"name": "w", "tasks": ["t"]}], "critical_path": ["w"]},
+    "executive_summary": {"executive_summary": "s", "recommendations": [], "assumptions": [], "claims": []},
+    "blocking_issues": {"blocking_issues": [], "fixes": [], "severity": "low"},
+}
+
+
+class RecordingLLM(LLMClient):
+    """LLMClient whose completions are canned; keeps the exact message list of every request."""
+
+    def __init__(self, model: str):
+        os.environ.setdefault("GOOGLE_API_KEY", "stand-in")
+        super().__init__(models=[model])
+        self.requests: List[List[Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def _answer(self, system: str) -> str:
+        for marker, obj in _CANNED.items():
+            if marker in system:
+                return json.dumps(obj)
+        return json.dumps({"notes": "stand-in pod output", "risks": ["r"]})
+
+    def chat(self, system: str, user: str, temperature: float = 0.6, model=None, use_cache=True, prefix="") -> str:
+        with self._lock:
+            self.requests.append(self._messages(system, user, prefix, self.models[0]))
+        return self._answer(system)
+
+    async def achat(self, *args: Any, **kwargs: Any) -> str:
+        return self.chat(*args, **kwargs)
+
+
+def _text(message: Dict[str, Any]) -> str:
+    content = message["content"]
+    return "".join(p.get("text", "") for p in content) if isinstance(content, list) else content
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--brief_chars", type=int, default=20000)
+    ap.add_argument("--model", type=str, default="gemini/gemini-2.5-flash")
+    args = ap.parse_args()
+
+    llm = RecordingLLM(args.model)
+    skills = ("Ran a bookkeeping practice for 8 years; strong in Xero, payroll, VAT. " * 400)[: args.brief_chars]
+    with tempfile.TemporaryDirectory() as out_root:
+        orch = ConsultingOrchestrator(llm=llm, out_root=out_root, max_concurrency=1)
+        orch.run("prefix_check", CaseInput(profile={"location": "UK"}, query="B2B ideas", skills_text=skills))
+
+    first = [_text(r[0]) for r in llm.requests]
+    shared = max(set(first), key=first.count)
+    total = sum(sum(len(_text(m)) for m in r) for r in llm.requests)
+    cacheable = sum(len(f) for f in first if f == shared) - len(shared)  # the first request writes the cache
+
+    print(f"{'request':>7}  {'first message (chars)':>22}  shared  cache_control")
+    for i, r in enumerate(llm.requests):
+        marked = isinstance(r[0]["content"], list) and "cache_control" in r[0]["content"][0]
+        print(f"{i:>7}  {len(first[i]):>22}  {str(first[i] == shared):>6}  {marked}")
+    print(f"\n{first.count(shared)}/{len(first)} requests share a {len(shared)}-char prefix")
+    print(f"cacheable input: {cacheable}/{total} chars ({100.0 * cacheable / max(1, total):.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
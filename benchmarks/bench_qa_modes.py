@@ -0,0 +1,125 @@
+"""
+QA benchmark: four separate check calls vs one combined call (qa/combined.py), on the same
+case state. Reports LLM calls, input tokens and wall time for each mode.
+
+By default the provider is a local stand-in whose latency grows with input size
+(--base_s + tokens * --per_token_ms); --live uses the real LLMClient and its usage counters.
+
+    python benchmarks/bench_qa_modes.py [--repeat 3] [--live]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from case import Case, CaseInput  # noqa: E402
+from context import count_tokens  # noqa: E402
+from intake import Intake  # noqa: E402
+from llm import LLMClient  # noqa: E402
+from qa import DEFAULT_QA  # noqa: E402
+from qa.combined import CombinedQACheck  # noqa: E402
+
+_REPORT = {"blocking_issues": ["Churn assumption is unsupported"], "fixes": ["Cite a benchmark"], "severity": "med"}
+
+
+class StandInLLM(LLMClient):
+    """Canned QA reports; sleeps in proportion to the input it was sent and counts tokens."""
+
+    def __init__(self, base_s: float, per_token_ms: float):
+        os.environ.setdefault("GOOGLE_API_KEY", "stand-in")
+        super().__init__()
+        self.base_s = base_s
+        self.per_token_ms = per_token_ms
+        self.stats = {"calls": 0, "input_tokens": 0}
+        self._lock = threading.Lock()
+
+    def _answer(self, system: str, user: str, prefix: str) -> str:
+        tokens = sum(count_tokens(t) for t in (prefix, system, user))
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["input_tokens"] += tokens
+        time.sleep(self.base_s + tokens * self.per_token_ms / 1000.0)
+        if "QA panel" in system:
+            return json.dumps({name: _REPORT for name in ("logic", "numbers", "evidence", "risk")})
+        return json.dumps(_REPORT)
+
+    def chat(self, system: str, user: str, temperature: float = 0.6, model=None, use_cache=True, prefix="") -> str:
+        return self._answer(system, user, prefix)
+
+    async def achat(self, system: str, user: str, temperature: float = 0.6, model=None, use_cache=True, prefix="") -> str:
+        return await asyncio.to_thread(self._answer, system, user, prefix)
+
+
+def make_case() -> Case:
+    case = Case(
+        case_id="bench",
+        inp=CaseInput(
+            profile={"location": "UK", "capital_available_gbp": 15000},
+            query="Generate 3 boring but profitable B2B business ideas I can build in 90 days.",
+            skills_text="Eight years running a bookkeeping practice; Xero, payroll, VAT returns. " * 60,
+        ),
+    )
+    Intake().run(case)
+    s = case.state
+    s.framing = {
+        "key_question": "Which B2B service can reach £5k MRR within 90 days?",
+        "issue_tree": {"node": "root", "children": [{"node": f"branch {i}", "children": []} for i in range(6)]},
+        "top_hypotheses": [f"Hypothesis {i}: accountants will pay for outsourced close" for i in range(4)],
+    }
+    pod = {
+        "risks": ["Key-person dependency", "Seasonal demand"],
+        "notes": "Detailed pod analysis with buyers, channels, pricing and operating constraints. " * 12,
+    }
+    s.pod_outputs = {name: dict(pod) for name in ("market", "economics", "competition", "ops", "implementation")}
+    s.synthesis = {
+        "executive_summary": "Launch a month-end close service for small accounting firms. " * 6,
+        "recommendations": [{"title": f"Rec {i}", "why": "because " * 20, "how": "steps " * 20} for i in range(4)],
+        "assumptions": [{"name": f"A{i}", "value": "20%", "rationale": "benchmark " * 10} for i in range(6)],
+        "claims": [{"claim": f"Claim {i}", "confidence": "med", "evidence": ["survey"]} for i in range(6)],
+    }
+    return case
+
+
+async def separate(llm: LLMClient, case: Case) -> List[Dict[str, Any]]:
+    return list(await asyncio.gather(*(Q(llm).arun(case) for Q in DEFAULT_QA)))
+
+
+async def combined(llm: LLMClient, case: Case) -> List[Dict[str, Any]]:
+    out = await CombinedQACheck(llm, [Q(llm) for Q in DEFAULT_QA]).arun(case)
+    return out["reports"]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--base_s", type=float, default=0.4, help="Stand-in fixed latency per call")
+    ap.add_argument("--per_token_ms", type=float, default=0.05, help="Stand-in latency per input token")
+    ap.add_argument("--live", action="store_true", help="Call the real provider")
+    args = ap.parse_args()
+
+    print(f"{'mode':>9}  {'calls':>5}  {'input_tokens':>12}  {'wall_s':>7}")
+    for mode, fn in (("separate", separate), ("combined", combined)):
+        llm = LLMClient() if args.live else StandInLLM(args.base_s, args.per_token_ms)
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            reports = asyncio.run(fn(llm, make_case()))
+            assert [r["check"] for r in reports] == ["logic", "numbers", "evidence", "risk"]
+        wall = (time.perf_counter() - t0) / args.repeat
+        if args.live:
+            usage = llm.usage_stats()
+            calls, tokens = usage["calls"], usage["prompt_tokens"]
+        else:
+            calls, tokens = llm.stats["calls"], llm.stats["input_tokens"]
+        print(f"{mode:>9}  {calls / args.repeat:>5.1f}  {tokens / args.repeat:>12.0f}  {wall:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Startup benchmark: how long the CLI takes before it does any work.
+
+Each measurement runs in a fresh interpreter (subprocess), so module caches don't leak between runs:
+- import: cumulative `python -X importtime -c "import cli"`, plus the slowest top-level imports
+- help: wall time of `python cli.py --help`
+- first request: import the orchestrator, build an LLMClient and time until litellm.completion
+  is called (the call itself is intercepted, so no provider is contacted)
+
+    python benchmarks/bench_startup.py [--repeat 5] [--top 8]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FIRST_REQUEST = """
+import os, time
+t0 = time.perf_counter()
+import llm
+from orchestrator import ConsultingOrchestrator
+
+def _completion(**kwargs):
+    # LLMClient retries on any exception, so stop the process here instead of raising.
+    print(f"{time.perf_counter() - t0:.6f}", flush=True)
+    os._exit(0)
+
+_real = llm._litellm
+def _hooked():
+    mod = _real()
+    mod.completion = _completion
+    return mod
+llm._litellm = _hooked
+
+llm.LLMClient(max_retries=1).chat("system", "user", use_cache=False)
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "bench")
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH", "")) if p)
+    return env
+
+
+def import_times(top: int) -> Tuple[float, List[Tuple[float, str]]]:
+    """(total seconds to import cli, [(cumulative seconds, module)] for the slowest top-level imports)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import cli"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    total, rows = 0.0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # importtime indents nested imports by two spaces per level, after one separator space.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if name == "cli":
+            total = int(cumulative) / 1e6
+        elif depth == 1:
+            rows.append((int(cumulative) / 1e6, name))
+    return total, sorted(rows, reverse=True)[:top]
+
+
+def help_time() -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "cli.py", "--help"], cwd=ROOT, env=_env(), capture_output=True, check=True)
+    return time.perf_counter() - t0
+
+
+def first_request_time() -> float:
+    proc = subprocess.run(
+        [sys.executable, "-c", _FIRST_REQUEST], cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top", type=int, default=8, help="How many top-level imports to list")
+    args = ap.parse_args()
+
+    imports = [import_times(args.top) for _ in range(args.repeat)]
+    helps = [help_time() for _ in range(args.repeat)]
+    try:
+        firsts = [first_request_time() for _ in range(args.repeat)]
+    except subprocess.CalledProcessError as e:
+        firsts = []
+        print(f"first request: skipped ({(e.stderr or '').strip().splitlines()[-1:]})")
+
+    print(f"{'metric':>22}  {'median_s':>8}  {'min_s':>7}")
+    for name, xs in (
+        ("import cli", [t for t, _ in imports]),
+        ("cli.py --help", helps),
+        ("time to first request", firsts),
+    ):
+        if xs:
+            print(f"{name:>22}  {statistics.median(xs):>8.3f}  {min(xs):>7.3f}")
+
+    print("\nslowest imports under cli (last run):")
+    for seconds, name in imports[-1][1]:
+        print(f"  {seconds:>7.3f}s  {name}")
+
+
+if __name__ == "__main__":
+    main()
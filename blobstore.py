@@ -0,0 +1,255 @@
+"""
+Shared artifact blob store: payloads are stored once per content hash, compressed, and
+referenced from any number of run directories (see ArtifactStore(blobs=...)).
+
+    python blobstore.py stats [--store runs/.blobs]
+    python blobstore.py gc [--store runs/.blobs] [--runs runs] [--grace_s 3600] [--dry_run]
+    python blobstore.py cat <run_dir> <name>
+
+Layout: <store>/<sha256[:2]>/<sha256>.<ext>, where sha256 is of the uncompressed bytes and
+ext names the codec (.zst with the zstandard package installed, .zz for zlib otherwise).
+Readers handle either, so stores written with and without zstandard can be mixed.
+<store>/runs.jsonl registers every run directory that references the store, wherever it
+lives, so gc sees all of them without being told where to look.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_ROOT = os.path.join("runs", ".blobs")
+_EXTS = {"zstd": ".zst", "zlib": ".zz"}
+
+
+def _zstd() -> Optional[Any]:
+    try:
+        import zstandard  # type: ignore
+    except Exception:
+        return None
+    return zstandard
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed; install the zstandard package to read it.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class BlobStore:
+    """
+    Content-addressed, compressed blobs shared across runs:
+    - put(data) compresses and stores bytes once, returning their sha256; putting bytes
+      that are already stored only refreshes the blob's mtime (which gc's grace uses)
+    - get(digest) returns the original bytes whatever codec wrote them
+    - gc(live) deletes blobs not in live and older than the grace period
+    - register_run(run_dir) records a run directory that references the store; run_dirs()
+      lists them, so gc can find every reference (see live_digests)
+    Blobs are immutable and written under unique temp names then renamed, so concurrent
+    writers (threads or processes) can share a store. create=False opens an existing store
+    for reading without creating its directory.
+    """
+
+    RUNS = "runs.jsonl"
+
+    def __init__(self, root: str = DEFAULT_ROOT, codec: Optional[str] = None, fsync: bool = True, create: bool = True):
+        if codec is None:
+            codec = "zstd" if _zstd() is not None else "zlib"
+        if codec not in _EXTS:
+            raise ValueError(f"codec must be one of {sorted(_EXTS)}, got {codec!r}")
+        if codec == "zstd" and _zstd() is None:
+            raise RuntimeError("codec='zstd' needs the zstandard package.")
+        self.root = root
+        self.codec = codec
+        self.fsync = fsync
+        if create:
+            os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + _EXTS[codec])
+
+    def _find(self, digest: str) -> Optional[Tuple[str, str]]:
+        for codec in (self.codec, *(c for c in _EXTS if c != self.codec)):
+            path = self._path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None
+
+    def has(self, digest: str) -> bool:
+        return self._find(digest) is not None
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        found = self._find(digest)
+        if found is not None:
+            try:
+                os.utime(found[0])
+                return digest
+            except FileNotFoundError:
+                pass  # collected between the check and the touch; write it again
+        path = self._path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(_compress(self.codec, data))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        found = self._find(digest)
+        if found is None:
+            raise KeyError(f"No blob {digest} in {self.root}")
+        path, codec = found
+        with open(path, "rb") as f:
+            return _decompress(codec, f.read())
+
+    def register_run(self, run_dir: str) -> None:
+        """Records run_dir (relative to the store, like the run's own marker) as a referrer."""
+        os.makedirs(self.root, exist_ok=True)
+        line = json.dumps({"run_dir": os.path.relpath(run_dir, self.root)}) + "\n"
+        # One O_APPEND write per line, so concurrent registrations don't interleave.
+        fd = os.open(os.path.join(self.root, self.RUNS), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def has_registry(self) -> bool:
+        return os.path.exists(os.path.join(self.root, self.RUNS))
+
+    def run_dirs(self) -> List[str]:
+        """Registered run directories, first registration order, including ones since deleted."""
+        path = os.path.join(self.root, self.RUNS)
+        if not os.path.exists(path):
+            return []
+        out: Dict[str, None] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rel = json.loads(line)["run_dir"]
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn last line
+                out.setdefault(os.path.normpath(os.path.join(self.root, rel)), None)
+        return list(out)
+
+    def digests(self) -> Iterator[Tuple[str, str]]:
+        """(digest, path) for every stored blob."""
+        exts = tuple(_EXTS.values())
+        if not os.path.isdir(self.root):
+            return
+        for sub in sorted(os.listdir(self.root)):
+            subdir = os.path.join(self.root, sub)
+            if not os.path.isdir(subdir):
+                continue
+            for fn in os.listdir(subdir):
+                if fn.endswith(exts):
+                    yield fn.rsplit(".", 1)[0], os.path.join(subdir, fn)
+
+    def stats(self) -> Dict[str, Any]:
+        blobs, stored = 0, 0
+        for _, path in self.digests():
+            blobs += 1
+            stored += os.path.getsize(path)
+        return {"root": self.root, "codec": self.codec, "blobs": blobs, "stored_bytes": stored}
+
+    def gc(self, live: Iterable[str], grace_s: float = 3600.0, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Deletes blobs whose digest is not in live. Blobs touched within grace_s are kept:
+        a writer stores the blob before the run records a reference to it.
+        """
+        live = set(live)
+        cutoff = time.time() - grace_s
+        removed, freed, kept = 0, 0, 0
+        for digest, path in self.digests():
+            if digest in live:
+                kept += 1
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if st.st_mtime > cutoff:
+                kept += 1
+                continue
+            if not dry_run:
+                os.remove(path)
+            removed += 1
+            freed += st.st_size
+        return {"removed": removed, "freed_bytes": freed, "kept": kept}
+
+
+def live_digests(store: BlobStore, runs_root: Optional[str] = None) -> Set[str]:
+    """
+    Every blob digest referenced by a run directory registered in store, plus (for stores
+    written before the registry existed) any run directory under runs_root.
+    """
+    from artifacts import ArtifactStore
+
+    live: Set[str] = set()
+    for run_dir in store.run_dirs():
+        if os.path.isdir(run_dir):
+            live |= ArtifactStore.references_in(run_dir)
+    if runs_root:
+        for dirpath, dirnames, filenames in os.walk(runs_root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            if ArtifactStore.INDEX in filenames or ArtifactStore.REFS in filenames:
+                live |= ArtifactStore.references_in(dirpath)
+                dirnames[:] = []
+    return live
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Shared compressed blob store for run artifacts")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    st = sub.add_parser("stats", help="Blob count and bytes on disk")
+    st.add_argument("--store", type=str, default=DEFAULT_ROOT)
+    gc = sub.add_parser("gc", help="Delete blobs no run directory references")
+    gc.add_argument("--store", type=str, default=DEFAULT_ROOT)
+    gc.add_argument(
+        "--runs", type=str, default="", help="Also scan this root for run directories (needed for stores without runs.jsonl)"
+    )
+    gc.add_argument("--grace_s", type=float, default=3600.0, help="Keep unreferenced blobs younger than this")
+    gc.add_argument("--dry_run", action="store_true")
+    cat = sub.add_parser("cat", help="Print a named artifact of a run, decompressed")
+    cat.add_argument("run_dir")
+    cat.add_argument("name", help="e.g. framing.json")
+    args = ap.parse_args()
+
+    if args.cmd == "stats":
+        print(json.dumps(BlobStore(args.store, create=False).stats(), indent=2))
+    elif args.cmd == "gc":
+        store = BlobStore(args.store, create=False)
+        if not store.has_registry() and not args.runs:
+            raise SystemExit(f"{args.store} has no {BlobStore.RUNS}; pass --runs with the root holding every run that uses it.")
+        out = store.gc(live_digests(store, args.runs), grace_s=args.grace_s, dry_run=args.dry_run)
+        print(("Would remove" if args.dry_run else "Removed") + f" {out['removed']} blobs ({out['freed_bytes']} bytes); kept {out['kept']}")
+    else:
+        from artifacts import ArtifactStore
+
+        payload = ArtifactStore(args.run_dir, readonly=True).read_json(args.name)
+        if payload is None:
+            raise SystemExit(f"No artifact {args.name!r} in {args.run_dir}")
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
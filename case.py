@@ -21,6 +21,8 @@ class CaseState:
     qa_reports: List[Dict[str, Any]] = field(default_factory=list)
     synthesis: Dict[str, Any] = field(default_factory=dict)
     deliverables: Dict[str, Any] = field(default_factory=dict)
+    # Per-stage prompt token accounting from context.ContextBuilder.
+    context_stats: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
 
 @dataclass
@@ -0,0 +1,323 @@
+"""
+Run catalog: one SQLite file indexing every consulting and supervisor run, so questions like
+"numbers QA was high severity last week" are an indexed query instead of a scan of runs/.
+
+    python catalog.py rebuild [--runs runs] [--db runs/catalog.sqlite]
+    python catalog.py query [--since_days 7] [--check numbers] [--severity high] [--kind consulting]
+    python catalog.py sql "SELECT case_id, duration_s FROM runs ORDER BY duration_s DESC LIMIT 5"
+
+ConsultingOrchestrator (catalog=...) and SupervisorAgent (run_catalog()) record each run as it
+finishes; rebuild backfills consulting runs from their run directories. Supervisor runs have no
+run directory, so they are only ever recorded live.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_PATH = os.path.join("runs", "catalog.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    run_dir TEXT,
+    case_id TEXT,
+    started_at REAL,
+    finished_at REAL,
+    duration_s REAL,
+    models TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    llm_calls INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_finished ON runs (finished_at);
+CREATE INDEX IF NOT EXISTS runs_case ON runs (case_id);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    latency_s REAL,
+    reused INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE TABLE IF NOT EXISTS qa (
+    run_id TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    severity TEXT,
+    blocking_issues INTEGER,
+    PRIMARY KEY (run_id, check_name)
+);
+CREATE INDEX IF NOT EXISTS qa_check_severity ON qa (check_name, severity);
+CREATE TABLE IF NOT EXISTS shortlist (
+    run_id TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    idea_id TEXT,
+    name TEXT,
+    decision TEXT,
+    score REAL,
+    PRIMARY KEY (run_id, rank)
+);
+CREATE INDEX IF NOT EXISTS shortlist_score ON shortlist (score);
+"""
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _dir_started_at(run_dir: str) -> Optional[float]:
+    # Run directories are named <case_id>_<%Y%m%d_%H%M%S>[-<n>] (UTC; see orchestrator.new_run_dir).
+    name = re.sub(r"-\d+$", "", os.path.basename(os.path.normpath(run_dir)))
+    stamp = "_".join(name.rsplit("_", 2)[-2:])
+    try:
+        return (datetime.strptime(stamp, "%Y%m%d_%H%M%S") - datetime(1970, 1, 1)).total_seconds()
+    except ValueError:
+        return None
+
+
+class RunCatalog:
+    """
+    SQLite index of finished runs:
+    - runs: one row per run (run_dir, case_id, timestamps, models, token counts)
+    - stages: per-stage latency and whether the output was reused from an earlier run
+    - qa: severity and blocking-issue count per QA check
+    - shortlist: ranked supervisor picks with their scores
+    Token counts are provider-reported (run.json "usage", taken from the run's trace).
+    Recording a run replaces any earlier rows for the same run_id, so re-recording (resume,
+    rebuild) is idempotent. Safe to share between threads; processes share it through
+    SQLite's WAL locking. readonly=True opens an existing catalog for queries only.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, readonly: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        if readonly:
+            # Enforced by SQLite, not by inspecting the query: nothing can write through this handle.
+            uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+            self._db = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA query_only=ON")
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def _replace(
+        self,
+        run: Dict[str, Any],
+        stages: Sequence[Dict[str, Any]] = (),
+        qa: Sequence[Dict[str, Any]] = (),
+        shortlist: Sequence[Dict[str, Any]] = (),
+    ) -> None:
+        run_id = run["run_id"]
+        cols = ", ".join(run)
+        marks = ", ".join("?" for _ in run)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("stages", "qa", "shortlist"):
+                    self._db.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+                self._db.execute(f"INSERT OR REPLACE INTO runs ({cols}) VALUES ({marks})", tuple(run.values()))
+                self._db.executemany(
+                    "INSERT INTO stages (run_id, stage, latency_s, reused) VALUES (?, ?, ?, ?)",
+                    [(run_id, s["stage"], _float(s.get("latency_s")), int(bool(s.get("reused")))) for s in stages],
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO qa (run_id, check_name, severity, blocking_issues) VALUES (?, ?, ?, ?)",
+                    [
+                        (run_id, q.get("check"), q.get("severity"), len(q.get("blocking_issues") or []))
+                        for q in qa
+                        if q.get("check")
+                    ],
+                )
+                self._db.executemany(
+                    "INSERT INTO shortlist (run_id, rank, idea_id, name, decision, score) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, rank, s.get("idea_id"), s.get("name"), s.get("decision"), _float(s.get("overall_score")))
+                        for rank, s in enumerate(shortlist, start=1)
+                    ],
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def record_run_dir(self, run_dir: str) -> Optional[str]:
+        """Indexes a consulting run directory from its files; returns the run_id, or None if it isn't one."""
+        from artifacts import ArtifactStore
+
+        if not os.path.exists(os.path.join(run_dir, "case.json")) and not os.path.exists(
+            os.path.join(run_dir, ArtifactStore.BLOBSTORE)
+        ):
+            return None
+        store = ArtifactStore(run_dir, readonly=True)
+        meta = store.read_json("case.json")
+        if meta is None:
+            return None
+        run_meta = store.read_json("run.json") or {}
+        # Provider-reported usage; absent (NULL) for runs written without a trace.
+        usage = run_meta.get("usage") or {}
+        qa = (store.read_json("qa.json") or {}).get("qa", [])
+        checkpoints = store.load_checkpoints()
+
+        started = _float(run_meta.get("started_at")) or _float(meta.get("started_at")) or _dir_started_at(run_dir)
+        finished = _float(run_meta.get("finished_at"))
+        if finished is None:
+            finished = max((os.path.getmtime(os.path.join(run_dir, f)) for f in os.listdir(run_dir)), default=None)
+        run_id = os.path.normpath(run_dir)
+        self._replace(
+            {
+                "run_id": run_id,
+                "kind": "consulting",
+                "run_dir": run_id,
+                "case_id": meta.get("case_id"),
+                "started_at": started,
+                "finished_at": finished,
+                "duration_s": finished - started if started is not None and finished is not None else None,
+                "models": json.dumps(run_meta.get("models") or []),
+                "prompt_tokens": usage.get("prompt_tokens"),
+                "completion_tokens": usage.get("completion_tokens"),
+                "llm_calls": usage.get("calls"),
+            },
+            stages=[{"stage": name, **record} for name, record in checkpoints.items()],
+            qa=qa,
+        )
+        return run_id
+
+    def record_supervisor(
+        self,
+        run_id: str,
+        result: Dict[str, Any],
+        started_at: float,
+        finished_at: float,
+        models: Sequence[str],
+        case_id: str = "",
+    ) -> str:
+        """Indexes a SupervisorAgent.run result (shortlist scores and LLM usage)."""
+        names = {i.get("idea_id"): i.get("name") for i in result.get("ideas", [])}
+        picks = (result.get("shortlist") or {}).get("shortlist") or []
+        usage = result.get("usage") or {}
+        self._replace(
+            {
+                "run_id": run_id,
+                "kind": "supervisor",
+                "run_dir": None,
+                "case_id": case_id or None,
+                "started_at": started_at,
+                "finished_at": finished_at,
+                "duration_s": finished_at - started_at,
+                "models": json.dumps(list(models)),
+                "prompt_tokens": usage.get("prompt_tokens"),
+                "completion_tokens": usage.get("completion_tokens"),
+                "llm_calls": usage.get("calls"),
+            },
+            shortlist=[{**p, "name": names.get(p.get("idea_id"))} for p in picks if isinstance(p, dict)],
+        )
+        return run_id
+
+    def rebuild(self, runs_root: str = "runs") -> int:
+        """Backfills every run directory under runs_root; returns how many were indexed."""
+        n = 0
+        for dirpath, dirnames, filenames in os.walk(runs_root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            if "case.json" in filenames or "blobstore.json" in filenames:
+                dirnames[:] = []
+                if self.record_run_dir(dirpath) is not None:
+                    n += 1
+        return n
+
+    def sql(self, query: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cur = self._db.execute(query, tuple(params))
+            cols = [c[0] for c in cur.description or ()]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        kind: Optional[str] = None,
+        check: Optional[str] = None,
+        severity: Optional[str] = None,
+        min_score: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Runs finished at or after since (epoch seconds), newest first, filtered by QA severity / shortlist score."""
+        where, params = [], []
+        if since is not None:
+            where.append("r.finished_at >= ?")
+            params.append(since)
+        if kind:
+            where.append("r.kind = ?")
+            params.append(kind)
+        if check or severity:
+            clause = "EXISTS (SELECT 1 FROM qa q WHERE q.run_id = r.run_id"
+            if check:
+                clause += " AND q.check_name = ?"
+                params.append(check)
+            if severity:
+                clause += " AND q.severity = ?"
+                params.append(severity)
+            where.append(clause + ")")
+        if min_score is not None:
+            where.append("EXISTS (SELECT 1 FROM shortlist s WHERE s.run_id = r.run_id AND s.score >= ?)")
+            params.append(min_score)
+        sql = "SELECT r.* FROM runs r"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.finished_at DESC LIMIT ?"
+        return self.sql(sql, [*params, int(limit)])
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="SQLite catalog of consulting and supervisor runs")
+    ap.add_argument("--db", type=str, default=DEFAULT_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rb = sub.add_parser("rebuild", help="Backfill the catalog from existing run directories")
+    rb.add_argument("--runs", type=str, default="runs")
+    q = sub.add_parser("query", help="Find runs by age, QA severity or shortlist score")
+    q.add_argument("--since_days", type=float, default=None)
+    q.add_argument("--kind", choices=["consulting", "supervisor"], default=None)
+    q.add_argument("--check", type=str, default=None, help="QA check name, e.g. numbers")
+    q.add_argument("--severity", type=str, default=None, help="e.g. high")
+    q.add_argument("--min_score", type=float, default=None, help="Any shortlist pick scoring at least this")
+    q.add_argument("--limit", type=int, default=100)
+    s = sub.add_parser("sql", help="Run a read-only SQL query")
+    s.add_argument("query")
+    args = ap.parse_args()
+
+    catalog = RunCatalog(args.db, readonly=args.cmd in ("query", "sql"))
+    t0 = time.perf_counter()
+    if args.cmd == "rebuild":
+        n = catalog.rebuild(args.runs)
+        print(f"Indexed {n} run directories in {time.perf_counter() - t0:.1f}s")
+        return
+    if args.cmd == "query":
+        since = time.time() - args.since_days * 86400 if args.since_days is not None else None
+        rows = catalog.query(since, args.kind, args.check, args.severity, args.min_score, args.limit)
+    else:
+        try:
+            rows = catalog.sql(args.query)
+        except sqlite3.OperationalError as e:
+            raise SystemExit(f"Query failed (the catalog is opened read-only): {e}")
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    print(f"{len(rows)} rows in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,226 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
 import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
+from blobstore import BlobStore
 from case import CaseInput
+from catalog import RunCatalog
 from llm import LLMClient
+from llm_cache import ResponseCache
 from orchestrator import ConsultingOrchestrator
+from ratelimit import configure
+
+MODELS = ["gemini/gemini-2.5-flash"]
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "location": "UK",
+    "capital_available_gbp": 15000,
+    "risk_tolerance": "moderate",
+    "time_available_hours_per_week": 20,
+    "preferences": ["boring-but-profitable", "B2B", "fast-to-revenue"],
+}
+
+
+def read_cases(path: str) -> List[Tuple[str, Optional[CaseInput], str]]:
+    """
+    Reads one CaseInput per JSONL line: {"case_id"?, "profile"?, "query", "skills_text", "extra"}.
+    Returns (case_id, input, error) so a bad line is reported instead of aborting the batch.
+    """
+    cases: List[Tuple[str, Optional[CaseInput], str]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+                # Stable default ids, so a re-submitted case can reuse its earlier run (latest_run_dir()).
+                digest = hashlib.sha1(line.encode("utf-8")).hexdigest()[:6]
+                case_id = str(row.get("case_id") or f"case_{n:05d}_{digest}")
+                inp = CaseInput(
+                    profile=row.get("profile") or dict(DEFAULT_PROFILE),
+                    query=row.get("query", ""),
+                    skills_text=row.get("skills_text", ""),
+                    extra=row.get("extra", ""),
+                )
+                cases.append((case_id, inp, ""))
+            except Exception as e:
+                cases.append((f"line_{n:05d}", None, f"{type(e).__name__}: {e}"))
+    return cases
+
+
+def latest_run_dir(out_root: str, case_id: str) -> Optional[str]:
+    """Most recent run directory of case_id under out_root that has stage checkpoints, if any."""
+    # <case_id>_<%Y%m%d_%H%M%S>, with -<n> for later runs started in the same second (new_run_dir).
+    pattern = re.compile(re.escape(case_id) + r"_(\d{8}_\d{6})(?:-(\d+))?")
+    try:
+        names = os.listdir(out_root)
+    except FileNotFoundError:
+        return None
+    runs: List[Tuple[Tuple[str, int], str]] = []
+    for name in names:
+        m = pattern.fullmatch(name)
+        if m:
+            runs.append(((m.group(1), int(m.group(2) or 1)), name))
+    for _, name in sorted(runs, reverse=True):
+        stages_dir = os.path.join(out_root, name, "stages")
+        if os.path.isdir(stages_dir) and any(fn.endswith(".json") for fn in os.listdir(stages_dir)):
+            return os.path.join(out_root, name)
+    return None
+
+
+async def run_batch(
+    orch: ConsultingOrchestrator,
+    cases: List[Tuple[str, Optional[CaseInput], str]],
+    out_path: str,
+    case_concurrency: int,
+    reuse: bool = True,
+) -> Tuple[int, int]:
+    """
+    Runs cases concurrently on one loop; each result line is appended to out_path as it finishes.
+    With reuse, a case that already has a run under orch.out_root reuses that run's unchanged stages.
+    """
+    sem = asyncio.Semaphore(max(1, case_concurrency))
+    ok = failed = 0
+
+    with open(out_path, "a", encoding="utf-8") as out:
+
+        async def one(case_id: str, inp: Optional[CaseInput], error: str) -> None:
+            nonlocal ok, failed
+            t0 = time.time()
+            row: Dict[str, Any] = {"case_id": case_id}
+            if inp is None:
+                row.update(ok=False, error=error)
+            else:
+                async with sem:
+                    try:
+                        reuse_from = latest_run_dir(orch.out_root, case_id) if reuse else None
+                        res = await orch.arun(case_id=case_id, inp=inp, reuse_from=reuse_from)
+                        row.update(
+                            ok=True,
+                            run_dir=res["run_dir"],
+                            reused_stages=res.get("reused_stages", []),
+                            executive_summary=res["synthesis"].get("executive_summary", ""),
+                            qa_severity={q.get("check"): q.get("severity") for q in res["qa"]},
+                        )
+                    except Exception as e:
+                        row.update(ok=False, error=f"{type(e).__name__}: {e}")
+            row["elapsed_s"] = round(time.time() - t0, 2)
+            if row["ok"]:
+                ok += 1
+            else:
+                failed += 1
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+
+        await asyncio.gather(*(one(*c) for c in cases))
+    return ok, failed
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--query", type=str, default="Generate 3 boring but profitable B2B business ideas I can build in 90 days.")
     ap.add_argument("--skills_file", type=str, default="")
+    ap.add_argument("--profile_file", type=str, default="", help="JSON file with the user profile (default: built-in UK profile)")
     ap.add_argument("--extra", type=str, default="")
     ap.add_argument("--case_id", type=str, default="")
+    ap.add_argument("--max_concurrency", type=int, default=4, help="Max LLM stages in flight at once per case (1 = sequential)")
+    ap.add_argument("--cache_path", type=str, default=".cache/llm_cache.sqlite", help="On-disk LLM response cache")
+    ap.add_argument("--no_cache", action="store_true", help="Always call the provider")
+    ap.add_argument("--resume", type=str, default="", help="Run directory of an interrupted run to finish")
+    ap.add_argument("--reuse", type=str, default="", help="Earlier run directory whose unchanged stages are reused")
+    ap.add_argument("--qa_mode", choices=["separate", "combined"], default="separate", help="One LLM call per QA check, or one for all")
+    ap.add_argument("--no_fsync", action="store_true", help="Don't fsync run artifacts as they are written")
+    ap.add_argument("--blob_store", type=str, default="", help="Shared compressed artifact store, e.g. runs/.blobs (see blobstore.py)")
+    ap.add_argument("--catalog", type=str, default="runs/catalog.sqlite", help="Run catalog to update (\"\" to skip; see catalog.py)")
+    ap.add_argument("--no_trace", action="store_true", help="Don't write trace.json (Chrome trace format) per run")
+    ap.add_argument("--batch", type=str, default="", help="JSONL file with one CaseInput per line")
+    ap.add_argument("--batch_out", type=str, default="", help="Results JSONL (default: runs/batch_<ts>.jsonl)")
+    ap.add_argument("--case_concurrency", type=int, default=16, help="Cases in flight at once in --batch mode")
+    ap.add_argument("--llm_concurrency", type=int, default=32, help="LLM requests in flight across the whole batch")
+    ap.add_argument("--batch_fresh", action="store_true", help="In --batch mode, don't reuse stages from a case's earlier run")
     args = ap.parse_args()
 
+    cache = None if args.no_cache else ResponseCache(args.cache_path)
+    llm = LLMClient(models=MODELS, cache=cache)
+    blob_store = BlobStore(args.blob_store, fsync=not args.no_fsync) if args.blob_store else None
+    catalog = RunCatalog(args.catalog) if args.catalog else None
+
+    if args.batch:
+        for model in MODELS:
+            configure(model, max_concurrency=args.llm_concurrency)
+        orch = ConsultingOrchestrator(
+            llm=llm,
+            max_concurrency=args.max_concurrency,
+            qa_mode=args.qa_mode,
+            fsync=not args.no_fsync,
+            blob_store=blob_store,
+            catalog=catalog,
+            trace=not args.no_trace,
+        )
+        out_path = args.batch_out or os.path.join("runs", f"batch_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        cases = read_cases(args.batch)
+        ok, failed = asyncio.run(run_batch(orch, cases, out_path, args.case_concurrency, reuse=not args.batch_fresh))
+        print(f"Batch done: {ok} ok, {failed} failed. Results: {out_path}")
+        if cache is not None:
+            print("LLM cache:", cache.stats())
+        return
+
     skills_text = ""
     if args.skills_file:
         with open(args.skills_file, "r", encoding="utf-8") as f:
             skills_text = f.read()
 
-    profile = {
-        "location": "UK",
-        "capital_available_gbp": 15000,
-        "risk_tolerance": "moderate",
-        "time_available_hours_per_week": 20,
-        "preferences": ["boring-but-profitable", "B2B", "fast-to-revenue"],
-    }
+    profile = dict(DEFAULT_PROFILE)
+    if args.profile_file:
+        with open(args.profile_file, "r", encoding="utf-8") as f:
+            profile = json.load(f)
 
     inp = CaseInput(profile=profile, query=args.query, skills_text=skills_text, extra=args.extra)
     case_id = args.case_id.strip() or f"case_{uuid.uuid4().hex[:8]}"
 
-    llm = LLMClient(models=["gemini/gemini-2.5-flash"])
-    orch = ConsultingOrchestrator(llm=llm)
+    streamed = []
+
+    def on_field(stage: str, key: str, value: object) -> None:
+        if stage == "synthesis" and key == "executive_summary":
+            streamed.append(key)
+            print("Executive summary:\n", value, flush=True)
+
+    orch = ConsultingOrchestrator(
+        llm=llm,
+        max_concurrency=args.max_concurrency,
+        on_field=on_field,
+        qa_mode=args.qa_mode,
+        fsync=not args.no_fsync,
+        blob_store=blob_store,
+        catalog=catalog,
+        trace=not args.no_trace,
+    )
 
-    out = orch.run(case_id=case_id, inp=inp)
+    if args.resume:
+        out = orch.resume(args.resume)
+    else:
+        out = orch.run(case_id=case_id, inp=inp, reuse_from=args.reuse or None)
     print("Wrote run artifacts to:", out["run_dir"])
-    print("Executive summary:\n", out["synthesis"].get("executive_summary", ""))
+    print("Prompt tokens saved vs. repr payloads:", out.get("prompt_tokens_saved", 0))
+    if out.get("reused_stages"):
+        print("Reused stages:", ", ".join(out["reused_stages"]))
+    if not streamed:
+        print("Executive summary:\n", out["synthesis"].get("executive_summary", ""))
+    print("LLM usage:", llm.usage_stats())
+    if cache is not None:
+        print("LLM cache:", cache.stats())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
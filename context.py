@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (max chars per string, max items per list) applied to a section, loosest first.
+_SHRINK_LEVELS: List[Tuple[Optional[int], Optional[int]]] = [
+    (None, None),
+    (1200, 12),
+    (600, 8),
+    (300, 5),
+    (150, 3),
+    (80, 2),
+]
+
+_token_counter: Any = None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Model-specific token count via litellm when available, else ~4 chars per token."""
+    global _token_counter
+    if model:
+        if _token_counter is None:
+            try:
+                from litellm import token_counter
+
+                _token_counter = token_counter
+            except Exception:
+                _token_counter = False
+        if _token_counter:
+            try:
+                return int(_token_counter(model=model, text=text))
+            except Exception:
+                pass
+    return max(1, len(text) // 4) if text else 0
+
+
+def compact(value: Any) -> str:
+    """Compact JSON for dicts/lists; strings are passed through unchanged."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def pick(d: Optional[Dict[str, Any]], keys: Sequence[str]) -> Dict[str, Any]:
+    """The subset of d a stage actually reads, in the order given."""
+    d = d or {}
+    return {k: d[k] for k in keys if k in d}
+
+
+def _shrink(value: Any, max_str: Optional[int], max_items: Optional[int]) -> Any:
+    if isinstance(value, str):
+        return value if max_str is None or len(value) <= max_str else value[:max_str].rstrip() + "…"
+    if isinstance(value, list):
+        items = value if max_items is None else value[:max_items]
+        out = [_shrink(v, max_str, max_items) for v in items]
+        if len(items) < len(value):
+            out.append(f"…(+{len(value) - len(items)} more)")
+        return out
+    if isinstance(value, dict):
+        return {k: _shrink(v, max_str, max_items) for k, v in value.items()}
+    return value
+
+
+def _render(sections: Sequence[Tuple[str, str]], tail: str) -> str:
+    body = "\n\n".join(f"{label}:\n{text}" for label, text in sections)
+    return f"{body}\n\n{tail}" if tail else body
+
+
+class ContextBuilder:
+    """
+    Builds the user message of an LLM stage from labelled sections:
+    - dicts and lists are sent as compact JSON instead of Python reprs
+    - token counts are per model (litellm.token_counter, falling back to len/4)
+    - over budget, the largest structured section is shrunk a level at a time (shorter
+      strings, fewer list items); plain text such as the brief is only cut, from the end,
+      once that is not enough
+    - per-stage token usage and savings against the old repr prompt are recorded in stats
+    """
+
+    def __init__(self, model: Optional[str] = None, stats: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.model = model
+        self.stats = stats if stats is not None else {}
+
+    def build(self, stage: str, sections: Sequence[Tuple[str, Any]], budget: int, tail: str = "") -> str:
+        baseline = count_tokens(_render([(label, str(value)) for label, value in sections], tail), self.model)
+
+        levels = [0] * len(sections)
+        texts = [compact(value) for _, value in sections]
+        sizes = [count_tokens(t, self.model) for t in texts]
+        overhead = count_tokens(_render([(label, "") for label, _ in sections], tail), self.model)
+
+        while overhead + sum(sizes) > budget:
+            # Plain-text sections (the brief) are never level-shrunk, only cut to fit below.
+            shrinkable = [
+                i
+                for i, (_, value) in enumerate(sections)
+                if not isinstance(value, str) and levels[i] < len(_SHRINK_LEVELS) - 1
+            ]
+            if not shrinkable:
+                break
+            i = max(shrinkable, key=lambda j: sizes[j])
+            levels[i] += 1
+            texts[i] = compact(_shrink(sections[i][1], *_SHRINK_LEVELS[levels[i]]))
+            sizes[i] = count_tokens(texts[i], self.model)
+
+        truncated = any(levels)
+        excess = overhead + sum(sizes) - budget
+        if excess > 0:
+            i = max(range(len(texts)), key=lambda j: sizes[j])
+            keep = max(0, len(texts[i]) - excess * 4 - 16)
+            texts[i] = texts[i][:keep] + "…[truncated]"
+            truncated = True
+
+        user = _render([(label, text) for (label, _), text in zip(sections, texts)], tail)
+        sent = count_tokens(user, self.model)
+        self.stats[stage] = {
+            "tokens": sent,
+            "repr_tokens": baseline,
+            "saved": max(0, baseline - sent),
+            "budget": budget,
+            "truncated": truncated,
+        }
+        return user
+
+
+def builder_for(case: Any, llm: Any) -> ContextBuilder:
+    """A builder counting with the client's primary model and recording into the case's stats."""
+    models = getattr(llm, "models", None) or [None]
+    return ContextBuilder(model=models[0], stats=case.state.context_stats)
+
+
+# Budget for the brief + framing prefix every stage shares.
+SHARED_PREFIX_BUDGET = 6000
+
+# Framing fields any stage after framing reads. The prefix must be the same for every stage,
+# so it carries their union; data_needed, which only the workplan and synthesis use, stays
+# in those stages' own sections.
+SHARED_FRAMING_FIELDS = ("key_question", "success_metrics", "constraints", "issue_tree", "top_hypotheses")
+
+
+def shared_prefix(case: Any, llm: Any, stage: str) -> str:
+    """
+    Brief (plus framing, once it exists) rendered identically for every stage, so the
+    requests of all downstream stages start with the same bytes and provider prefix
+    caching can hit. The text depends only on case state, never on the stage asking;
+    stage only keys the stats, as "<stage>.prefix", since every call sends the prefix again.
+    """
+    sections: List[Tuple[str, Any]] = [("BRIEF", case.state.brief)]
+    if case.state.framing:
+        sections.append(("FRAMING", pick(case.state.framing, SHARED_FRAMING_FIELDS)))
+    return builder_for(case, llm).build(f"{stage}.prefix", sections, SHARED_PREFIX_BUDGET)
+
+
+def tokens_saved(stats: Dict[str, Dict[str, Any]]) -> int:
+    return sum(int(s.get("saved", 0)) for s in stats.values())
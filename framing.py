@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
+from context import builder_for, shared_prefix
 from llm import LLMClient
 from prompts import framing_system
 from schema import extract_json
@@ -13,11 +14,28 @@ class Framer:
     Produces: key question, success metrics, constraints, issue tree, hypotheses, data needed.
     """
 
+    temperature = 0.4
+    context_budget = 6000
+
     def __init__(self, llm: LLMClient):
         self.llm = llm
 
-    def run(self, case: Case) -> None:
+    def prefix(self, case: Case) -> str:
+        return shared_prefix(case, self.llm, "framing")
+
+    def prompt(self, case: Case) -> Tuple[str, str]:
         system = framing_system()
-        user = f"BRIEF:\n{case.state.brief}\n\nFrame the case."
-        raw = self.llm.chat(system=system, user=user, temperature=0.4)
-        case.state.framing = extract_json(raw)
\ No newline at end of file
+        user = builder_for(case, self.llm).build("framing", [], self.context_budget, tail="Frame the case.")
+        return system, user
+
+    def run(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        raw = self.llm.chat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+        case.state.framing = extract_json(raw, keys=("key_question",))
+        return case.state.framing
+
+    async def arun(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        raw = await self.llm.achat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+        case.state.framing = extract_json(raw, keys=("key_question",))
+        return case.state.framing
\ No newline at end of file
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from minhash import NearDupIndex, tokens
+
+
+class IdeaIndex:
+    """
+    Persistent store of generated ideas and their critiques (SQLite), shared across runs:
+    - ideas are keyed by a content fingerprint (order-insensitive word set of their text)
+    - critiques are keyed by (idea fingerprint, critic key); the critic key should hash
+      everything the critique depends on besides the idea (model, prompts, brief)
+    - match(text) finds the stored idea a new one duplicates: same fingerprint, or a
+      near-duplicate at >= threshold via an in-memory MinHash index loaded at open
+    Safe to share between threads; several processes can point at the same file, though
+    each only sees the others' ideas after reopening.
+    """
+
+    def __init__(self, path: str = ".cache/idea_index.sqlite", threshold: float = 0.85):
+        self.path = path
+        self.threshold = float(threshold)
+        self._lock = threading.Lock()
+        self._near = NearDupIndex(threshold=self.threshold)
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ideas ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS critiques ("
+            " fingerprint TEXT NOT NULL,"
+            " critic_key TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (fingerprint, critic_key))"
+        )
+        for fp, text in self._db.execute("SELECT fingerprint, text FROM ideas"):
+            self._near.add(fp, text)
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        blob = " ".join(sorted(tokens(text)))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def critic_key(**parts: Any) -> str:
+        blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def match(self, text: str) -> Optional[str]:
+        """Fingerprint of the stored idea text duplicates, if any."""
+        fp = self.fingerprint(text)
+        with self._lock:
+            if fp in self._near:
+                return fp
+            hits = self._near.query(text)
+        return hits[0][0] if hits else None
+
+    def add_idea(self, text: str, data: Dict[str, Any]) -> str:
+        """Stores an idea (no-op if its fingerprint exists) and returns the fingerprint."""
+        fp = self.fingerprint(text)
+        with self._lock:
+            if fp not in self._near:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO ideas (fingerprint, text, data, created_at) VALUES (?, ?, ?, ?)",
+                    (fp, text, json.dumps(data, ensure_ascii=False), time.time()),
+                )
+                self._near.add(fp, text)
+        return fp
+
+    def get_critique(self, fingerprint: str, critic_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM critiques WHERE fingerprint = ? AND critic_key = ?", (fingerprint, critic_key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_critique(self, fingerprint: str, critic_key: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO critiques (fingerprint, critic_key, data, created_at) VALUES (?, ?, ?, ?)",
+                (fingerprint, critic_key, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            ideas = self._db.execute("SELECT COUNT(*) FROM ideas").fetchone()[0]
+            critiques = self._db.execute("SELECT COUNT(*) FROM critiques").fetchone()[0]
+        return {"ideas": ideas, "critiques": critiques}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
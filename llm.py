@@ -1,23 +1,78 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import random
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
 
-from litellm import completion
+from llm_cache import ResponseCache
+from ratelimit import estimate_tokens, is_rate_limit_error, limiter_for, retry_after_s, usage_tokens
+from tracing import span
 
-try:
-    from dotenv import load_dotenv  # type: ignore
-except Exception:
-    load_dotenv = None  # type: ignore
+
+def _litellm() -> Any:
+    # litellm takes over a second to import; only pay for it once a request is actually made.
+    import litellm
+
+    return litellm
+
+
+def _load_dotenv() -> None:
+    try:
+        from dotenv import load_dotenv  # type: ignore
+    except Exception:
+        return
+    load_dotenv()
+
+
+def _error_text(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}"[:300]
+
+
+def _usage_args(resp: Any) -> Dict[str, int]:
+    """Provider-reported token counts, for trace spans."""
+    usage = getattr(resp, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+        "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+        "cached_tokens": int(getattr(details, "cached_tokens", 0) or 0),
+    }
+
+
+_USAGE_KEYS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+def usage_from_spans(spans: Iterable[Any]) -> Dict[str, int]:
+    """Provider calls and billed tokens over one trace's spans (those carrying provider-reported usage)."""
+    out = {"calls": 0, **{k: 0 for k in _USAGE_KEYS}}
+    for sp in spans:
+        if sp.name in ("llm.attempt", "llm.stream") and "prompt_tokens" in sp.args:
+            out["calls"] += 1
+            for k in _USAGE_KEYS:
+                out[k] += int(sp.args.get(k, 0) or 0)
+    return out
+
+
+# Providers where litellm turns a cache_control marker into provider-side context caching.
+# For Gemini it looks up a cachedContent by content hash and only creates one on a miss.
+_PREFIX_CACHE_PROVIDERS = ("gemini/", "vertex_ai/", "anthropic/")
 
 
 class LLMClient:
     """
     Minimal LLM wrapper for LiteLLM + Gemini API key.
     - Reads GOOGLE_API_KEY / GEMINI_API_KEY from env (.env supported)
-    - Retries with backoff
+    - Retries with backoff; rate limits go through the shared per-model limiter (ratelimit.py)
+    - chat() blocks; achat() is the asyncio equivalent for many in-flight calls on one loop
+    - Optional on-disk response cache; pass use_cache=False for sampling-style calls
+    - Emits tracing spans per call, rate-limit wait, attempt and backoff when a tracer is active
+    - stream_chat() / astream_chat() yield text deltas as they arrive
+    - usage_stats() totals calls and provider-reported prompt / completion tokens
+    - prefix= is sent ahead of the stage's own instructions, so stages sharing it share a
+      byte-identical request prefix; long prefixes are marked for provider context caching
     """
 
     def __init__(
@@ -26,14 +81,20 @@ class LLMClient:
         max_retries: int = 3,
         backoff_base_s: float = 1.4,
         seed: int = 7,
+        cache: Optional[ResponseCache] = None,
+        prefix_cache_min_tokens: int = 1024,
     ):
-        if load_dotenv is not None:
-            load_dotenv()
+        _load_dotenv()
 
         self.models = models or ["gemini/gemini-2.5-flash"]
         self.max_retries = int(max_retries)
         self.backoff_base_s = float(backoff_base_s)
         self.rng = random.Random(seed)
+        self.cache = cache
+        # Providers reject (or don't bother) caching anything shorter than ~1k tokens.
+        self.prefix_cache_min_tokens = int(prefix_cache_min_tokens)
+        self.usage: Dict[str, int] = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        self._usage_lock = threading.Lock()
 
         # Hard fail early with a helpful message.
         if not (os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")):
@@ -41,8 +102,121 @@ class LLMClient:
                 "Missing Gemini API key. Set GOOGLE_API_KEY (recommended) in your environment or .env."
             )
 
+    def _backoff_s(self, attempt: int) -> float:
+        return (self.backoff_base_s**attempt) + self.rng.random() * 0.25
+
     def _sleep(self, attempt: int) -> None:
-        time.sleep((self.backoff_base_s**attempt) + self.rng.random() * 0.25)
+        time.sleep(self._backoff_s(attempt))
+
+    def _messages(self, system: str, user: str, prefix: str = "", model: str = "") -> List[Dict[str, Any]]:
+        if not prefix:
+            return [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ]
+        if model.startswith(_PREFIX_CACHE_PROVIDERS) and len(prefix) // 4 >= self.prefix_cache_min_tokens:
+            # Gemini refuses a system_instruction alongside cached content, so the stage's
+            # instructions travel in the user turn after the cached prefix.
+            return [
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}],
+                },
+                {"role": "user", "content": f"{system}\n\n{user}"},
+            ]
+        return [
+            {"role": "system", "content": prefix},
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+    def _record_usage(self, resp: Any = None) -> None:
+        usage = getattr(resp, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += int(getattr(usage, "prompt_tokens", 0) or 0)
+            self.usage["completion_tokens"] += int(getattr(usage, "completion_tokens", 0) or 0)
+            self.usage["cached_tokens"] += int(getattr(details, "cached_tokens", 0) or 0)
+
+    def usage_stats(self) -> Dict[str, int]:
+        """Provider calls made by this client (cache hits excluded) and the tokens they billed."""
+        with self._usage_lock:
+            return dict(self.usage)
+
+    def _call(
+        self, system: str, user: str, temperature: float, model: Optional[str], use_cache: bool, prefix: str
+    ) -> _Call:
+        chosen = model or self.rng.choice(self.models)
+        messages = self._messages(system, user, prefix, chosen)
+        cache = self.cache if use_cache else None
+        return _Call(self, chosen, messages, temperature, cache)
+
+    def _attempts(self, call: _Call, stream: bool) -> Iterator[str]:
+        """
+        The retry loop behind chat() and stream_chat(): yields the text of one successful
+        attempt. Retries only happen before the first delta; a failure mid-stream is raised.
+        """
+        # current=False when streaming: a generator's body runs in its consumer's context between yields.
+        name, current = ("llm.stream", False) if stream else ("llm.attempt", True)
+        for attempt in range(1, self.max_retries + 1):
+            with span("llm.ratelimit_wait", cat="llm", current=current, model=call.model):
+                call.limiter.acquire(call.est)
+            call.begin()
+            try:
+                with span(name, cat="llm", current=current, model=call.model, attempt=attempt, **call.span_args(stream)) as sp:
+                    try:
+                        resp = _litellm().completion(**call.request(stream))
+                        for chunk in resp if stream else (resp,):
+                            delta = call.take(chunk)
+                            if delta:
+                                yield delta
+                    except Exception as e:
+                        if call.failed(e, sp):
+                            raise
+                    else:
+                        call.succeeded(sp)
+                        return
+            finally:
+                call.abort()
+            if not call.limited:
+                # Rate limits are waited out inside the limiter; other errors back off here.
+                with span("llm.backoff", cat="llm", current=current, attempt=attempt):
+                    self._sleep(attempt)
+        raise call.exhausted() from call.last_err
+
+    async def _aattempts(self, call: _Call, stream: bool) -> AsyncIterator[str]:
+        """asyncio counterpart of _attempts(), behind achat() and astream_chat()."""
+        name, current = ("llm.stream", False) if stream else ("llm.attempt", True)
+        for attempt in range(1, self.max_retries + 1):
+            with span("llm.ratelimit_wait", cat="llm", current=current, model=call.model):
+                await call.limiter.aacquire(call.est)
+            call.begin()
+            try:
+                with span(name, cat="llm", current=current, model=call.model, attempt=attempt, **call.span_args(stream)) as sp:
+                    try:
+                        resp = await _litellm().acompletion(**call.request(stream))
+                        if stream:
+                            async for chunk in resp:
+                                delta = call.take(chunk)
+                                if delta:
+                                    yield delta
+                        else:
+                            delta = call.take(resp)
+                            if delta:
+                                yield delta
+                    except Exception as e:
+                        if call.failed(e, sp):
+                            raise
+                    else:
+                        call.succeeded(sp)
+                        return
+            finally:
+                call.abort()
+            if not call.limited:
+                with span("llm.backoff", cat="llm", current=current, attempt=attempt):
+                    await asyncio.sleep(self._backoff_s(attempt))
+        raise call.exhausted() from call.last_err
 
     def chat(
         self,
@@ -50,23 +224,171 @@ class LLMClient:
         user: str,
         temperature: float = 0.6,
         model: Optional[str] = None,
+        use_cache: bool = True,
+        prefix: str = "",
     ) -> str:
-        last_err: Optional[Exception] = None
-        chosen = model or self.rng.choice(self.models)
+        call = self._call(system, user, temperature, model, use_cache, prefix)
+        with span("llm.chat", cat="llm", model=call.model, cache_hit=False) as sp:
+            hit = call.cached()
+            if hit is not None:
+                sp.set(cache_hit=True)
+                return hit
+            sp.set(est_prompt_tokens=call.est)
+            return "".join(self._attempts(call, stream=False))
 
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                resp = completion(
-                    model=chosen,
-                    messages=[
-                        {"role": "system", "content": system},
-                        {"role": "user", "content": user},
-                    ],
-                    temperature=temperature,
-                )
-                return resp.choices[0].message.content
-            except Exception as e:
-                last_err = e
-                self._sleep(attempt)
-
-        raise RuntimeError(f"LLM call failed after {self.max_retries} retries: {last_err}") from last_err
\ No newline at end of file
+    async def achat(
+        self,
+        system: str,
+        user: str,
+        temperature: float = 0.6,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        prefix: str = "",
+    ) -> str:
+        call = self._call(system, user, temperature, model, use_cache, prefix)
+        with span("llm.chat", cat="llm", model=call.model, cache_hit=False) as sp:
+            hit = call.cached()
+            if hit is not None:
+                sp.set(cache_hit=True)
+                return hit
+            sp.set(est_prompt_tokens=call.est)
+            return "".join([delta async for delta in self._aattempts(call, stream=False)])
+
+    def stream_chat(
+        self,
+        system: str,
+        user: str,
+        temperature: float = 0.6,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        prefix: str = "",
+    ) -> Iterator[str]:
+        """
+        Yields completion text as it streams. Retries only happen before the first
+        delta; a failure mid-stream is raised to the caller.
+        """
+        call = self._call(system, user, temperature, model, use_cache, prefix)
+        hit = call.cached()
+        if hit is not None:
+            with span("llm.stream", cat="llm", current=False, model=call.model, cache_hit=True):
+                pass
+            yield hit
+            return
+        yield from self._attempts(call, stream=True)
+
+    async def astream_chat(
+        self,
+        system: str,
+        user: str,
+        temperature: float = 0.6,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        prefix: str = "",
+    ) -> AsyncIterator[str]:
+        call = self._call(system, user, temperature, model, use_cache, prefix)
+        hit = call.cached()
+        if hit is not None:
+            with span("llm.stream", cat="llm", current=False, model=call.model, cache_hit=True):
+                pass
+            yield hit
+            return
+        attempts = self._aattempts(call, stream=True)
+        try:
+            async for delta in attempts:
+                yield delta
+        finally:
+            # Closing this generator early must reach the attempt, which returns its limiter slot.
+            await attempts.aclose()
+
+
+class _Call:
+    """
+    One chat request across its attempts; the bookkeeping chat(), achat(), stream_chat()
+    and astream_chat() share:
+    - cached() looks the request up in the response cache
+    - per attempt: begin() after the limiter admits it, take(chunk) for each response
+      (or streamed chunk), then failed(e, sp) or succeeded(sp); abort() in a finally
+      returns the limiter slot if neither ran (cancellation, a consumer closing the stream)
+    - succeeded() releases the limiter with the provider's usage, counts it in the client's
+      usage_stats() and the attempt's span, and caches non-empty text
+    """
+
+    # Asks for a final chunk carrying the call's usage; without it streamed calls bill nothing.
+    STREAM_OPTIONS = {"include_usage": True}
+
+    def __init__(
+        self, client: LLMClient, model: str, messages: List[Dict[str, Any]], temperature: float, cache: Optional[ResponseCache]
+    ):
+        self.client = client
+        self.model = model
+        self.messages = messages
+        self.temperature = temperature
+        self.cache = cache
+        self.key = ResponseCache.key(model=model, messages=messages, temperature=temperature) if cache else None
+        self.limiter = limiter_for(model)
+        self.est = estimate_tokens(messages)
+        self.last_err: Optional[Exception] = None
+        self.limited = False
+        self._held = False
+        self._parts: List[str] = []
+        self._final: Any = None
+
+    def cached(self) -> Optional[str]:
+        return self.cache.get(self.key) if self.key is not None else None
+
+    def request(self, stream: bool) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"model": self.model, "messages": self.messages, "temperature": self.temperature}
+        if stream:
+            kwargs.update(stream=True, stream_options=self.STREAM_OPTIONS)
+        return kwargs
+
+    @staticmethod
+    def span_args(stream: bool) -> Dict[str, Any]:
+        return {"cache_hit": False} if stream else {}
+
+    def begin(self) -> None:
+        self._held = True
+        self._parts = []
+        self._final = None
+
+    def take(self, chunk: Any) -> str:
+        """Text of a streamed chunk or a whole response; remembers the one carrying usage."""
+        if getattr(chunk, "usage", None) is not None:
+            self._final = chunk
+        try:
+            choice = chunk.choices[0]
+        except (AttributeError, IndexError, TypeError):
+            return ""
+        msg = getattr(choice, "delta", None) or getattr(choice, "message", None)
+        text = getattr(msg, "content", None) or ""
+        if text:
+            self._parts.append(text)
+        return text
+
+    def failed(self, e: Exception, sp: Any) -> bool:
+        """Records a failed attempt; True when text was already handed out, so it must not be retried."""
+        self.last_err = e
+        self.limited = is_rate_limit_error(e)
+        self._held = False
+        self.limiter.release(self.est, rate_limited=self.limited, retry_after=retry_after_s(e) if self.limited else None)
+        sp.set(error=_error_text(e), rate_limited=self.limited)
+        return bool(self._parts)
+
+    def succeeded(self, sp: Any) -> None:
+        self._held = False
+        self.limiter.release(self.est, used_tokens=usage_tokens(self._final))
+        self.client._record_usage(self._final)
+        content = "".join(self._parts)
+        # Zeros when the provider sent no usage; the call still counts, as in usage_stats().
+        sp.set(completion_chars=len(content), **_usage_args(self._final))
+        if self.key is not None and content:
+            self.cache.put(self.key, content)
+
+    def abort(self) -> None:
+        if self._held:
+            # Cancelled (CancelledError, KeyboardInterrupt, GeneratorExit): free the slot or it is lost for good.
+            self._held = False
+            self.limiter.release(self.est, aborted=True)
+
+    def exhausted(self) -> RuntimeError:
+        return RuntimeError(f"LLM call failed after {self.client.max_retries} retries: {self.last_err}")
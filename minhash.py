@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import struct
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+_MASK64 = (1 << 64) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokens(text: str) -> FrozenSet[str]:
+    """Lower-cased alphanumeric word set, the unit of similarity."""
+    return frozenset(_TOKEN_RE.findall((text or "").lower()))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _base_hash(token: str) -> int:
+    # Stable across processes (unlike hash()), so signatures can be persisted.
+    return struct.unpack("<Q", hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest())[0]
+
+
+def _integrate(f, lo: float, hi: float, steps: int = 64) -> float:
+    if hi <= lo:
+        return 0.0
+    h = (hi - lo) / steps
+    return sum(f(lo + (i + 0.5) * h) for i in range(steps)) * h
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) minimising equal-weighted false-positive + false-negative area at threshold."""
+    best: Tuple[float, int, int] = (float("inf"), 1, num_perm)
+    for b in range(1, num_perm + 1):
+        r = num_perm // b
+        fp = _integrate(lambda s: 1 - (1 - s**r) ** b, 0.0, threshold)
+        fn = _integrate(lambda s: (1 - s**r) ** b, threshold, 1.0)
+        if fp + fn < best[0]:
+            best = (fp + fn, b, r)
+    return best[1], best[2]
+
+
+class NearDupIndex:
+    """
+    Incremental near-duplicate index over short texts (MinHash signatures + LSH banding):
+    - add(key, text) indexes one item; query(text) returns indexed keys whose word-set
+      Jaccard similarity is >= threshold, best first
+    - LSH bands only produce candidates; every candidate is checked with exact Jaccard,
+      so there are no false positives, and misses are rare near and above the threshold
+    - per-token hash rows are memoised, so a signature is an element-wise min over rows
+    Not thread-safe; guard with a lock if shared.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, seed: int = 1, max_token_cache: int = 200_000):
+        self.threshold = float(threshold)
+        self.num_perm = int(num_perm)
+        self.bands, self.rows = optimal_bands(self.threshold, self.num_perm)
+        rng = random.Random(seed)
+        # Multiply-shift hashing: odd multipliers give a family of 64-bit permutations.
+        self._perms = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(self.num_perm)]
+        self._token_rows: Dict[str, Tuple[int, ...]] = {}
+        self.max_token_cache = int(max_token_cache)
+        self._buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._sets: Dict[Hashable, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._sets
+
+    def _row(self, token: str) -> Tuple[int, ...]:
+        row = self._token_rows.get(token)
+        if row is None:
+            if len(self._token_rows) >= self.max_token_cache:
+                self._token_rows.clear()
+            h = _base_hash(token)
+            row = tuple(((a * h + b) & _MASK64) >> 32 for a, b in self._perms)
+            self._token_rows[token] = row
+        return row
+
+    def signature(self, toks: Iterable[str]) -> Tuple[int, ...]:
+        rows = [self._row(t) for t in toks]
+        if not rows:
+            return ()
+        return tuple(map(min, zip(*rows)))
+
+    def _band_keys(self, sig: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        r = self.rows
+        return [sig[i * r : (i + 1) * r] for i in range(self.bands)]
+
+    def _add(self, key: Hashable, toks: FrozenSet[str], sig: Tuple[int, ...]) -> None:
+        if key in self._sets:
+            raise KeyError(f"Key already indexed: {key!r}")
+        self._sets[key] = toks
+        if sig:
+            for band, bk in zip(self._buckets, self._band_keys(sig)):
+                band.setdefault(bk, []).append(key)
+
+    def _query(self, toks: FrozenSet[str], sig: Tuple[int, ...], cut: float) -> List[Tuple[Hashable, float]]:
+        if not sig:
+            return []
+        candidates = set()
+        for band, bk in zip(self._buckets, self._band_keys(sig)):
+            candidates.update(band.get(bk, ()))
+        hits = [(k, jaccard(toks, self._sets[k])) for k in candidates]
+        return sorted((h for h in hits if h[1] >= cut), key=lambda h: -h[1])
+
+    def add(self, key: Hashable, text: str) -> None:
+        toks = tokens(text)
+        self._add(key, toks, self.signature(toks))
+
+    def query(self, text: str, threshold: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        toks = tokens(text)
+        return self._query(toks, self.signature(toks), self.threshold if threshold is None else float(threshold))
+
+    def add_if_new(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Indexes text unless it near-duplicates something already indexed; returns that key if so."""
+        toks = tokens(text)
+        sig = self.signature(toks)
+        hits = self._query(toks, sig, self.threshold)
+        if hits:
+            return hits[0][0]
+        self._add(key, toks, sig)
+        return None
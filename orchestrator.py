@@ -1,25 +1,86 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
 from datetime import datetime
-from typing import Any, Dict, List, Type
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type
 
 from artifacts import ArtifactStore
+from blobstore import BlobStore
+from catalog import RunCatalog
 from case import Case, CaseInput
+from context import tokens_saved
 from intake import Intake
 from framing import Framer
 from workplan import Workplanner
 from synthesis import Synthesizer
 from deliverables import DeliverableBuilder
-from llm import LLMClient
+from llm import LLMClient, usage_from_spans
 from pods import DEFAULT_PODS
 from qa import DEFAULT_QA
+from qa.combined import CombinedQACheck
+from scheduler import Stage, StageScheduler
+from tracing import Sink, Tracer, activate, current_tracer, span
+
+
+def stage_fingerprint(
+    name: str, prefix: str, system: str, user: str, models: List[str], temperature: float
+) -> str:
+    """Hash of everything an LLM stage's output depends on; prefix and user embed the brief and upstream outputs."""
+    blob = json.dumps([name, prefix, system, user, sorted(models), temperature], ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def new_run_dir(out_root: str, case_id: str) -> str:
+    """
+    Creates a fresh run directory <case_id>_<%Y%m%d_%H%M%S> (UTC) under out_root and returns
+    it. A run started in the same second as another gets -2, -3, ... appended; the mkdir is
+    the reservation, so concurrent runs (threads or processes) never share a directory.
+    """
+    os.makedirs(out_root, exist_ok=True)
+    base = os.path.join(out_root, f"{case_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}")
+    n = 1
+    while True:
+        run_dir = base if n == 1 else f"{base}-{n}"
+        try:
+            os.mkdir(run_dir)
+            return run_dir
+        except FileExistsError:
+            n += 1
+
+
+def _noop() -> None:
+    return None
+
+
+async def _anoop() -> None:
+    return None
 
 
 class ConsultingOrchestrator:
     """
     Full consulting-style lifecycle:
     Intake -> Framing -> Workplan -> Pods -> Synthesis -> QA -> Deliverables
+
+    Stages run as a dependency graph: pods and QA checks that don't depend on
+    each other run concurrently, up to max_concurrency LLM stages at a time.
+    Every stage is checkpointed to <run_dir>/stages/ when it finishes, so a failed
+    run can be picked up again with resume(run_dir).
+    qa_mode="combined" runs all QA checks as one LLM call (qa/combined.py), falling
+    back to individual calls only for checks whose section comes back unusable.
+    fsync=False lets the artifact store skip fsync on every write (faster, less crash-safe).
+    blob_store (blobstore.BlobStore) keeps artifact payloads compressed in one store shared
+    by every run instead of in each run directory.
+    catalog (catalog.RunCatalog) indexes each run as it finishes: timings, QA severities, tokens.
+    Each run writes trace.json (Chrome trace-event format: stages, LLM attempts, backoff, JSON
+    parsing); trace_sinks also receive every span as it finishes. trace=False turns this off.
     """
 
     def __init__(
@@ -28,48 +89,242 @@ class ConsultingOrchestrator:
         pods: List[Type] = None,
         qa_checks: List[Type] = None,
         out_root: str = "runs",
+        max_concurrency: int = 4,
+        on_field: Optional[Callable[[str, str, Any], None]] = None,
+        qa_mode: str = "separate",
+        fsync: bool = True,
+        blob_store: Optional[BlobStore] = None,
+        catalog: Optional[RunCatalog] = None,
+        trace: bool = True,
+        trace_sinks: Sequence[Sink] = (),
     ):
+        if qa_mode not in ("separate", "combined"):
+            raise ValueError(f"qa_mode must be 'separate' or 'combined', got {qa_mode!r}")
         self.llm = llm
         self.pod_types = pods or DEFAULT_PODS
         self.qa_types = qa_checks or DEFAULT_QA
         self.out_root = out_root
+        self.max_concurrency = max_concurrency
+        # on_field(stage, key, value) streams top-level output fields as they arrive.
+        self.on_field = on_field
+        self.qa_mode = qa_mode
+        self.fsync = fsync
+        self.blob_store = blob_store
+        self.catalog = catalog
+        self.trace = trace
+        self.trace_sinks = list(trace_sinks)
+
+    def _stages(
+        self,
+        case: Case,
+        store: ArtifactStore,
+        completed: Optional[Dict[str, Dict[str, Any]]] = None,
+        previous: Optional[Dict[str, Dict[str, Any]]] = None,
+        reused: Optional[List[str]] = None,
+    ) -> List[Stage]:
+        """
+        Builds the stage graph. Each stage's output is applied to case.state, added to
+        the artifact index and checkpointed as soon as it finishes.
+        - completed: checkpoints from an earlier attempt of this run; restored, not re-run
+        - previous: checkpoints of another run; an LLM stage whose input fingerprint
+          matches reuses that output (names are appended to reused)
+        """
+        completed = completed or {}
+        previous = previous or {}
+        reused = reused if reused is not None else []
+        pods = [PodType(self.llm) for PodType in self.pod_types]
+        qcs = [QType(self.llm) for QType in self.qa_types]
+        pod_results: Dict[str, Any] = {}
+        qa_results: Dict[str, Dict[str, Any]] = {}
+        lock = threading.Lock()
+
+        def stage(
+            name: str,
+            compute: Callable[[], Any],
+            apply: Callable[[Any], None],
+            requires: Tuple[str, ...] = (),
+            acompute: Optional[Callable[[], Awaitable[Any]]] = None,
+            fingerprint: Optional[Callable[[], str]] = None,
+        ) -> Stage:
+            if name in completed:
+                apply(completed[name]["output"])
+                store.add(name, completed[name]["output"])
+                return Stage(name, _noop, requires, _anoop)
+
+            # Trace category: "pod" / "qa" for those stages, "stage" for the rest.
+            category = name.split(".", 1)[0] if "." in name else "stage"
+
+            def cached(fp: str) -> Optional[Dict[str, Any]]:
+                prev = previous.get(name)
+                if fp and prev and prev.get("fingerprint") == fp:
+                    with lock:
+                        reused.append(name)
+                    return prev
+                return None
 
-    def run(self, case_id: str, inp: CaseInput) -> Dict[str, Any]:
-        ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        run_dir = os.path.join(self.out_root, f"{case_id}_{ts}")
-        store = ArtifactStore(run_dir=run_dir)
+            def finish(out: Any, fp: str, t0: float, was_reused: bool) -> None:
+                apply(out)
+                store.add(name, out)
+                latency = round(time.perf_counter() - t0, 3)
+                store.checkpoint(name, out, fingerprint=fp, latency_s=latency, reused=was_reused)
 
-        case = Case(case_id=case_id, inp=inp)
+            def fn() -> None:
+                t0 = time.perf_counter()
+                with span(name, cat=category) as sp:
+                    fp = fingerprint() if fingerprint is not None else ""
+                    prev = cached(fp)
+                    sp.set(reused=prev is not None)
+                    finish(prev["output"] if prev is not None else compute(), fp, t0, prev is not None)
 
-        Intake().run(case)
-        store.add("brief", {"brief": case.state.brief})
+            async def afn() -> None:
+                t0 = time.perf_counter()
+                with span(name, cat=category) as sp:
+                    fp = fingerprint() if fingerprint is not None else ""
+                    prev = cached(fp)
+                    sp.set(reused=prev is not None)
+                    out = prev["output"] if prev is not None else await acompute()
+                    # Checkpoints are fsync'd; keep that off the event loop.
+                    await asyncio.to_thread(finish, out, fp, t0, prev is not None)
 
-        Framer(self.llm).run(case)
-        store.add("framing", case.state.framing)
+            return Stage(name, fn, requires, afn if acompute is not None else None)
 
-        Workplanner(self.llm).run(case)
-        store.add("workplan", case.state.workplan)
+        def llm_stage(name: str, runner: Any, apply: Callable[[Any], None], requires: Tuple[str, ...]) -> Stage:
+            def fingerprint() -> str:
+                system, user = runner.prompt(case)
+                return stage_fingerprint(name, runner.prefix(case), system, user, self.llm.models, runner.temperature)
 
-        for PodType in self.pod_types:
-            pod = PodType(self.llm)
-            out = pod.run(case)
-            case.state.pod_outputs[pod.name] = out
-            store.add(f"pod.{pod.name}", out)
+            return stage(name, partial(runner.run, case), apply, requires, partial(runner.arun, case), fingerprint)
 
-        Synthesizer(self.llm).run(case)
-        store.add("synthesis", case.state.synthesis)
+        def set_state(attr: str, out: Any) -> None:
+            setattr(case.state, attr, out)
 
-        case.state.qa_reports = []
-        for QType in self.qa_types:
-            qc = QType(self.llm)
-            rep = qc.run(case)
-            case.state.qa_reports.append(rep)
-            store.add(f"qa.{qc.name}", rep)
+        def apply_pod(pod, out: Dict[str, Any]) -> None:
+            with lock:
+                pod_results[pod.name] = out
+                # Keep pod order stable so downstream prompts match a sequential run.
+                case.state.pod_outputs = {p.name: pod_results[p.name] for p in pods if p.name in pod_results}
 
-        DeliverableBuilder().run(case)
-        store.add("deliverables", case.state.deliverables)
+        def apply_qa(qc, rep: Dict[str, Any]) -> None:
+            with lock:
+                qa_results[qc.name] = rep
+                case.state.qa_reports = [qa_results[q.name] for q in qcs if q.name in qa_results]
 
-        # Write key artifacts as first-class files
+        def deliverables() -> Dict[str, Any]:
+            DeliverableBuilder().run(case)
+            return case.state.deliverables
+
+        def apply_combined_qa(out: Dict[str, Any]) -> None:
+            case.state.qa_reports = list(out["reports"])
+
+        pod_stages = [f"pod.{p.name}" for p in pods]
+        combined = CombinedQACheck(self.llm, qcs, self.max_concurrency) if self.qa_mode == "combined" else None
+        qa_stages = ["qa.combined"] if combined is not None else [f"qa.{qc.name}" for qc in qcs]
+
+        def pod_requires(pod) -> Tuple[str, ...]:
+            reqs: List[str] = []
+            for r in pod.requires:
+                if r == "pods":
+                    reqs.extend(s for s in pod_stages if s != f"pod.{pod.name}")
+                else:
+                    reqs.append(r)
+            return tuple(reqs)
+
+        synthesizer = Synthesizer(self.llm, on_field=partial(self.on_field, "synthesis") if self.on_field else None)
+
+        stages = [
+            stage("brief", lambda: {"brief": Intake().build_brief(case)}, lambda out: set_state("brief", out["brief"])),
+            llm_stage("framing", Framer(self.llm), partial(set_state, "framing"), ("brief",)),
+            llm_stage("workplan", Workplanner(self.llm), partial(set_state, "workplan"), ("framing",)),
+        ]
+        stages += [llm_stage(f"pod.{p.name}", p, partial(apply_pod, p), pod_requires(p)) for p in pods]
+        stages.append(llm_stage("synthesis", synthesizer, partial(set_state, "synthesis"), ("framing", *pod_stages)))
+        if combined is not None:
+            stages.append(llm_stage("qa.combined", combined, apply_combined_qa, combined.requires))
+        else:
+            stages += [llm_stage(f"qa.{qc.name}", qc, partial(apply_qa, qc), tuple(qc.requires)) for qc in qcs]
+        stages.append(stage("deliverables", deliverables, partial(set_state, "deliverables"), ("synthesis", *qa_stages)))
+        return stages
+
+    def _start(self, case_id: str, inp: CaseInput) -> Tuple[Case, ArtifactStore]:
+        run_dir = new_run_dir(self.out_root, case_id)
+        store = ArtifactStore(run_dir=run_dir, fsync=self.fsync, blobs=self.blob_store)
+        store.write_json("case.json", {"case_id": case_id, "inp": asdict(inp), "started_at": time.time()})
+        return Case(case_id=case_id, inp=inp), store
+
+    def _reopen(self, run_dir: str) -> Tuple[Case, ArtifactStore, Dict[str, Dict[str, Any]]]:
+        store = ArtifactStore(run_dir=run_dir, fsync=self.fsync)
+        meta = store.read_json("case.json")
+        if meta is None:
+            raise FileNotFoundError(f"No case.json in {run_dir}; not a resumable run directory.")
+        case = Case(case_id=meta["case_id"], inp=CaseInput(**meta["inp"]))
+        return case, store, store.load_checkpoints()
+
+    @staticmethod
+    def _previous(reuse_from: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """Checkpoints of the run to reuse; a directory without any is an error, not an empty reuse."""
+        if not reuse_from:
+            return {}
+        if not os.path.isdir(reuse_from):
+            raise FileNotFoundError(f"reuse_from={reuse_from!r} does not exist.")
+        previous = ArtifactStore(run_dir=reuse_from, readonly=True).load_checkpoints()
+        if not previous:
+            raise ValueError(f"reuse_from={reuse_from!r} has no stage checkpoints; is it a run directory?")
+        return previous
+
+    def run(self, case_id: str, inp: CaseInput, reuse_from: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Runs the full lifecycle in a new run directory. With reuse_from (an earlier
+        run directory), LLM stages whose inputs are unchanged reuse that run's outputs
+        and only the invalidated downstream stages are recomputed.
+        """
+        # Checked before the new run directory is created.
+        previous = self._previous(reuse_from)
+        case, store = self._start(case_id, inp)
+        reused: List[str] = []
+        with store, self._traced(case, store):
+            stages = self._stages(case, store, previous=previous, reused=reused)
+            StageScheduler(stages, max_concurrency=self.max_concurrency).run()
+            return self._finish(case, store, reused)
+
+    async def arun(self, case_id: str, inp: CaseInput, reuse_from: Optional[str] = None) -> Dict[str, Any]:
+        """Same lifecycle as run(), with every LLM stage awaited on the current event loop."""
+        # Run directory setup and the final artifacts are fsync'd file writes: done in a thread.
+        previous = await asyncio.to_thread(self._previous, reuse_from)
+        case, store = await asyncio.to_thread(self._start, case_id, inp)
+        reused: List[str] = []
+        with store, self._traced(case, store):
+            stages = self._stages(case, store, previous=previous, reused=reused)
+            await StageScheduler(stages, max_concurrency=self.max_concurrency).arun()
+            return await asyncio.to_thread(self._finish, case, store, reused)
+
+    def resume(self, run_dir: str) -> Dict[str, Any]:
+        """Reloads a run directory and executes only the stages without a checkpoint."""
+        case, store, completed = self._reopen(run_dir)
+        with store, self._traced(case, store):
+            StageScheduler(self._stages(case, store, completed), max_concurrency=self.max_concurrency).run()
+            return self._finish(case, store)
+
+    async def aresume(self, run_dir: str) -> Dict[str, Any]:
+        case, store, completed = await asyncio.to_thread(self._reopen, run_dir)
+        with store, self._traced(case, store):
+            await StageScheduler(self._stages(case, store, completed), max_concurrency=self.max_concurrency).arun()
+            return await asyncio.to_thread(self._finish, case, store)
+
+    @contextmanager
+    def _traced(self, case: Case, store: ArtifactStore) -> Iterator[None]:
+        """Traces the enclosed run and writes <run_dir>/trace.json, also when a stage fails."""
+        if not self.trace:
+            yield
+            return
+        tracer = Tracer(self.trace_sinks)
+        try:
+            with activate(tracer), span("run", cat="run", case_id=case.case_id, qa_mode=self.qa_mode):
+                yield
+        finally:
+            tracer.write_chrome(os.path.join(store.run_dir, "trace.json"))
+
+    def _finish(self, case: Case, store: ArtifactStore, reused: Optional[List[str]] = None) -> Dict[str, Any]:
+        # Write key artifacts as first-class files (links to blobs the stages already stored)
         store.write_json("brief.json", {"brief": case.state.brief})
         store.write_json("framing.json", case.state.framing)
         store.write_json("workplan.json", case.state.workplan)
@@ -78,11 +333,33 @@ class ConsultingOrchestrator:
         store.write_json("qa.json", {"qa": case.state.qa_reports})
         store.write_json("deck_outline.json", case.state.deliverables.get("deck_outline", {}))
         store.write_text("run_flow.mmd", case.state.deliverables.get("mermaid_run_flow", ""))
+        store.write_json(
+            "context.json",
+            {"stages": case.state.context_stats, "tokens_saved": tokens_saved(case.state.context_stats)},
+        )
+
+        meta = store.read_json("case.json") or {}
+        # Per-run usage comes from this run's trace: the client's own totals are shared by
+        # every case it serves. A resumed run counts only the calls of the resuming attempt.
+        tracer = current_tracer()
+        store.write_json(
+            "run.json",
+            {
+                "case_id": case.case_id,
+                "started_at": meta.get("started_at"),
+                "finished_at": time.time(),
+                "models": list(self.llm.models),
+                "qa_mode": self.qa_mode,
+                "usage": usage_from_spans(tracer.spans()) if tracer is not None else None,
+            },
+        )
 
         store.flush()
+        if self.catalog is not None:
+            self.catalog.record_run_dir(store.run_dir)
 
         return {
-            "run_dir": run_dir,
+            "run_dir": store.run_dir,
             "brief": case.state.brief,
             "framing": case.state.framing,
             "workplan": case.state.workplan,
@@ -90,4 +367,6 @@ class ConsultingOrchestrator:
             "synthesis": case.state.synthesis,
             "qa": case.state.qa_reports,
             "deliverables": case.state.deliverables,
+            "reused_stages": sorted(reused or []),
+            "prompt_tokens_saved": tokens_saved(case.state.context_stats),
         }
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Offline persona snapshot: a one-time export of a Hugging Face persona dataset to local files,
+read back through mmap with O(1) random access.
+
+    python persona_snapshot.py export [--out .cache/personas.jsonl] [--limit 200000]
+    python persona_snapshot.py info [--path .cache/personas.jsonl]
+
+Layout: <out> holds one JSON object per line; <out>.idx holds n+1 little-endian uint64
+byte offsets, so row i is data[off[i]:off[i+1]], and the last offset is the data file's size.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import time
+from typing import Any, Dict, Iterator, Optional, Set
+
+DEFAULT_DATASET = "nvidia/Nemotron-Personas-USA"
+DEFAULT_PATH = os.path.join(".cache", "personas.jsonl")
+_OFFSET = struct.Struct("<Q")
+
+
+def default_path() -> str:
+    """PERSONA_SNAPSHOT, else DEFAULT_PATH; read per call so a .env loaded after import applies."""
+    return os.getenv("PERSONA_SNAPSHOT", DEFAULT_PATH)
+
+
+def _index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def snapshot_exists(path: Optional[str] = None) -> bool:
+    path = path or default_path()
+    return os.path.exists(path) and os.path.exists(_index_path(path))
+
+
+def export_snapshot(
+    path: Optional[str] = None,
+    dataset: str = DEFAULT_DATASET,
+    split: str = "train",
+    limit: Optional[int] = None,
+) -> int:
+    """Streams the dataset once into <path> + <path>.idx (written atomically); returns the row count."""
+    from datasets import load_dataset  # heavy, and only needed for the export
+
+    path = path or default_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_data, tmp_idx = f"{path}.tmp", f"{_index_path(path)}.tmp"
+    n = 0
+    with open(tmp_data, "wb") as data, open(tmp_idx, "wb") as idx:
+        idx.write(_OFFSET.pack(0))
+        for row in load_dataset(dataset, split=split, streaming=True):
+            data.write(json.dumps(dict(row), ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+            idx.write(_OFFSET.pack(data.tell()))
+            n += 1
+            if limit is not None and n >= limit:
+                break
+        for f in (data, idx):
+            f.flush()
+            os.fsync(f.fileno())
+    # The two renames aren't atomic together: in between, a reader pairs new data with the
+    # old index. PersonaSnapshot checks the index's last offset against the data size on open.
+    os.replace(tmp_data, path)
+    os.replace(tmp_idx, _index_path(path))
+    return n
+
+
+class PersonaSnapshot:
+    """
+    Read-only view of an exported snapshot:
+    - len(), snapshot[i] decode one row without touching the others
+    - sample(seed) yields rows in a seeded random order without replacement; once every
+      row has been drawn it starts a fresh pass
+    Opening checks that the index matches the data file, retrying briefly while an export
+    is swapping the two in; a snapshot that still doesn't match raises RuntimeError.
+    """
+
+    def __init__(self, path: Optional[str] = None, retries: int = 5):
+        path = path or default_path()
+        self.path = path
+        for attempt in range(retries + 1):
+            self._data_file = open(path, "rb")
+            self._idx_file = open(_index_path(path), "rb")
+            size = os.fstat(self._data_file.fileno()).st_size
+            idx_size = os.fstat(self._idx_file.fileno()).st_size
+            if idx_size >= _OFFSET.size and idx_size % _OFFSET.size == 0:
+                self._idx_file.seek(idx_size - _OFFSET.size)
+                if _OFFSET.unpack(self._idx_file.read(_OFFSET.size))[0] == size:
+                    break
+            self._data_file.close()
+            self._idx_file.close()
+            if attempt == retries:
+                raise RuntimeError(f"{path} and its index don't match; re-run `persona_snapshot.py export`.")
+            time.sleep(0.05 * (attempt + 1))
+        self._idx = mmap.mmap(self._idx_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._n = len(self._idx) // _OFFSET.size - 1
+        # mmap refuses empty files; an empty export has nothing to read anyway.
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ) if self._n else b""
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        start, end = struct.unpack_from("<QQ", self._idx, i * _OFFSET.size)
+        return json.loads(self._data[start:end])
+
+    def sample(self, seed: int = 7) -> Iterator[Dict[str, Any]]:
+        rng = random.Random(seed)
+        while self._n:
+            # Rejection draws are O(1) while most rows are unused; the tail is shuffled instead.
+            used: Set[int] = set()
+            while len(used) < self._n // 2:
+                i = rng.randrange(self._n)
+                if i not in used:
+                    used.add(i)
+                    yield self[i]
+            rest = [i for i in range(self._n) if i not in used]
+            rng.shuffle(rest)
+            for i in rest:
+                yield self[i]
+
+    def close(self) -> None:
+        if self._n:
+            self._data.close()
+        self._idx.close()
+        self._data_file.close()
+        self._idx_file.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="Download the dataset once into a local snapshot")
+    ex.add_argument("--out", type=str, default=None, help="Default: $PERSONA_SNAPSHOT or " + DEFAULT_PATH)
+    ex.add_argument("--dataset", type=str, default=DEFAULT_DATASET)
+    ex.add_argument("--limit", type=int, default=None, help="Keep only the first N rows")
+    info = sub.add_parser("info", help="Row count and a timed random read")
+    info.add_argument("--path", type=str, default=None, help="Default: $PERSONA_SNAPSHOT or " + DEFAULT_PATH)
+    args = ap.parse_args()
+
+    if args.cmd == "export":
+        t0 = time.perf_counter()
+        out = args.out or default_path()
+        n = export_snapshot(out, dataset=args.dataset, limit=args.limit)
+        print(f"Exported {n} rows to {out} in {time.perf_counter() - t0:.1f}s")
+    else:
+        t0 = time.perf_counter()
+        snap = PersonaSnapshot(args.path or default_path())
+        row = next(snap.sample())
+        print(f"{len(snap)} rows; open + first sample in {(time.perf_counter() - t0) * 1000:.2f} ms")
+        print(json.dumps(row, ensure_ascii=False)[:300])
+
+
+if __name__ == "__main__":
+    main()
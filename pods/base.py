@@ -1,16 +1,41 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 from case import Case
+from context import shared_prefix
 from llm import LLMClient
+from schema import extract_json
 
 
 class Pod:
     name = "base"
+    # Stage names this pod reads from; "pods" means every other pod in the run.
+    requires = ("workplan",)
+    # Token budget for the user message built by context.ContextBuilder.
+    context_budget = 6000
+    temperature = 0.5
 
     def __init__(self, llm: LLMClient):
         self.llm = llm
 
+    def prefix(self, case: Case) -> str:
+        """Shared brief + framing sent ahead of the pod's own prompt."""
+        return shared_prefix(case, self.llm, f"pod.{self.name}")
+
+    def prompt(self, case: Case) -> Tuple[str, str]:
+        """Returns (system, user) for this pod's LLM call; user excludes the shared prefix."""
+        raise NotImplementedError
+
+    def parse(self, raw: str) -> Dict[str, Any]:
+        return extract_json(raw)
+
     def run(self, case: Case) -> Dict[str, Any]:
-        raise NotImplementedError
\ No newline at end of file
+        system, user = self.prompt(case)
+        raw = self.llm.chat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+        return self.parse(raw)
+
+    async def arun(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        raw = await self.llm.achat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+        return self.parse(raw)
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Tuple
 
+from context import builder_for
 from pods.base import Pod
-from schema import extract_json
 
 
 class EconomicsPod(Pod):
     name = "economics"
+    requires = ("workplan",)
+    temperature = 0.4
 
-    def run(self, case) -> Dict[str, Any]:
+    def prompt(self, case) -> Tuple[str, str]:
         system = """
 You are a unit economics operator. Propose a realistic pricing + cost stack.
 Output JSON ONLY:
@@ -24,6 +26,9 @@ Output JSON ONLY:
 }
 """.strip()
 
-        user = f"BRIEF:\n{case.state.brief}\n\nWORKPLAN:\n{case.state.workplan}"
-        raw = self.llm.chat(system=system, user=user, temperature=0.4)
-        return extract_json(raw)
\ No newline at end of file
+        user = builder_for(case, self.llm).build(
+            "pod.economics",
+            [("WORKPLAN", case.state.workplan)],
+            self.context_budget,
+        )
+        return system, user
\ No newline at end of file
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Tuple
 
+from context import builder_for
 from pods.base import Pod
-from schema import extract_json
 
 
 class ImplementationPod(Pod):
     name = "implementation"
+    requires = ("pods",)
+    temperature = 0.4
 
-    def run(self, case) -> Dict[str, Any]:
+    def prompt(self, case) -> Tuple[str, str]:
         system = """
 You are an implementation lead. Produce a 30/60/90 day plan.
 Output JSON ONLY:
@@ -24,6 +26,10 @@ Output JSON ONLY:
 }
 """.strip()
 
-        user = f"BRIEF:\n{case.state.brief}\n\nPODS:\n{case.state.pod_outputs}"
-        raw = self.llm.chat(system=system, user=user, temperature=0.4)
-        return extract_json(raw)
\ No newline at end of file
+        pods = {name: out for name, out in case.state.pod_outputs.items() if name != self.name}
+        user = builder_for(case, self.llm).build(
+            "pod.implementation",
+            [("PODS", pods)],
+            self.context_budget,
+        )
+        return system, user
\ No newline at end of file
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Tuple
 
+from context import builder_for
 from pods.base import Pod
-from schema import extract_json
 
 
 class MarketPod(Pod):
     name = "market"
+    requires = ("framing",)
+    temperature = 0.5
 
-    def run(self, case) -> Dict[str, Any]:
+    def prompt(self, case) -> Tuple[str, str]:
         system = """
 You are a market analyst. Produce a crisp market view.
 Output JSON ONLY:
@@ -23,6 +25,5 @@ Output JSON ONLY:
 }
 """.strip()
 
-        user = f"BRIEF:\n{case.state.brief}\n\nFRAMING:\n{case.state.framing}"
-        raw = self.llm.chat(system=system, user=user, temperature=0.5)
-        return extract_json(raw)
\ No newline at end of file
+        user = builder_for(case, self.llm).build("pod.market", [], self.context_budget, tail="Produce the market view.")
+        return system, user
\ No newline at end of file
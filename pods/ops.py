@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Tuple
 
+from context import builder_for
 from pods.base import Pod
-from schema import extract_json
 
 
 class OpsPod(Pod):
     name = "ops"
+    requires = ("workplan",)
+    temperature = 0.5
 
-    def run(self, case) -> Dict[str, Any]:
+    def prompt(self, case) -> Tuple[str, str]:
         system = """
 You are an ops lead. Define an MVP operating model.
 Output JSON ONLY:
@@ -22,6 +24,9 @@ Output JSON ONLY:
 }
 """.strip()
 
-        user = f"BRIEF:\n{case.state.brief}\n\nWORKPLAN:\n{case.state.workplan}"
-        raw = self.llm.chat(system=system, user=user, temperature=0.5)
-        return extract_json(raw)
\ No newline at end of file
+        user = builder_for(case, self.llm).build(
+            "pod.ops",
+            [("WORKPLAN", case.state.workplan)],
+            self.context_budget,
+        )
+        return system, user
\ No newline at end of file
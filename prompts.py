@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import List
+
 WORKER_IDEA_JSON = r"""
 Return STRICT JSON ONLY (no markdown, no extra keys):
 
@@ -130,34 +132,48 @@ Must be grounded, risk-aware, and tie claims to evidence/assumptions.
 """.strip()
 
 
+QA_REPORT_JSON = '{"blocking_issues":["..."],"fixes":["..."],"severity":"low|med|high"}'
+
+# Auditor briefs, shared by the individual QA prompts and the combined one.
+QA_AUDITORS = {
+    "logic": (
+        "You are a logic auditor. Find contradictions, non-MECE structure, missing steps, and unclear causal links.\n"
+        "Return a short list of blocking issues and fixes."
+    ),
+    "numbers": "You are a numbers auditor. Check units, sanity, order-of-magnitude, missing cost drivers.",
+    "evidence": "You are an evidence auditor. Flag uncited claims and assumptions presented as facts.",
+    "risk": "You are a risk auditor. Identify legal/compliance, operational, reputational and delivery risks.",
+}
+
+
+def _qa_system(check: str) -> str:
+    return f"{QA_AUDITORS[check]}\nOutput JSON ONLY:\n{QA_REPORT_JSON}"
+
+
 def qa_logic_system() -> str:
-    return """
-You are a logic auditor. Find contradictions, non-MECE structure, missing steps, and unclear causal links.
-Return a short list of blocking issues and fixes.
-Output JSON ONLY:
-{"blocking_issues":["..."],"fixes":["..."],"severity":"low|med|high"}
-""".strip()
+    return _qa_system("logic")
 
 
 def qa_numbers_system() -> str:
-    return """
-You are a numbers auditor. Check units, sanity, order-of-magnitude, missing cost drivers.
-Output JSON ONLY:
-{"blocking_issues":["..."],"fixes":["..."],"severity":"low|med|high"}
-""".strip()
+    return _qa_system("numbers")
 
 
 def qa_evidence_system() -> str:
-    return """
-You are an evidence auditor. Flag uncited claims and assumptions presented as facts.
-Output JSON ONLY:
-{"blocking_issues":["..."],"fixes":["..."],"severity":"low|med|high"}
-""".strip()
+    return _qa_system("evidence")
 
 
 def qa_risk_system() -> str:
-    return """
-You are a risk auditor. Identify legal/compliance, operational, reputational and delivery risks.
-Output JSON ONLY:
-{"blocking_issues":["..."],"fixes":["..."],"severity":"low|med|high"}
-""".strip()
\ No newline at end of file
+    return _qa_system("risk")
+
+
+def qa_combined_system(checks: List[str]) -> str:
+    audits = "\n\n".join(f"{c.upper()} AUDIT:\n{QA_AUDITORS[c]}" for c in checks)
+    shape = ",".join(f'"{c}":{QA_REPORT_JSON}' for c in checks)
+    return f"""
+You are a QA panel. Run each audit below independently over the same material; do not merge their findings.
+
+{audits}
+
+Output JSON ONLY, with exactly one report per audit:
+{{{shape}}}
+""".strip()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import Any, Dict, List, Sequence, Tuple
+
+from case import Case
+from context import builder_for, pick, shared_prefix
+from llm import LLMClient
+from prompts import QA_AUDITORS, qa_combined_system
+from qa.base import QACheck
+from qa.risk import RISK_FIELDS
+from scheduler import Stage, StageScheduler
+from schema import extract_json
+
+
+class CombinedQACheck:
+    """
+    Runs several QA checks as one LLM call over the union of their context.
+    - returns one {"blocking_issues","fixes","severity","check"} report per check, in check order
+    - a section that is missing or malformed falls back to that check's own call; the others are kept
+    - if the combined call fails outright, every check falls back
+    - checks without an entry in prompts.QA_AUDITORS always run on their own
+    - fallback checks run concurrently: gathered in arun(), at most max_concurrency at a
+      time on a StageScheduler thread pool in run()
+    """
+
+    name = "combined"
+    temperature = 0.2
+    context_budget = 8000
+
+    def __init__(self, llm: LLMClient, checks: Sequence[QACheck], max_concurrency: int = 4):
+        self.llm = llm
+        self.checks = list(checks)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.combinable = [c for c in self.checks if c.name in QA_AUDITORS]
+        self.requires = tuple(dict.fromkeys(r for c in self.checks for r in c.requires))
+
+    def prefix(self, case: Case) -> str:
+        return shared_prefix(case, self.llm, "qa.combined")
+
+    def prompt(self, case: Case) -> Tuple[str, str]:
+        system = qa_combined_system([c.name for c in self.combinable])
+        risks = {name: pick(out, RISK_FIELDS) for name, out in case.state.pod_outputs.items()}
+        user = builder_for(case, self.llm).build(
+            "qa.combined",
+            [
+                ("ECONOMICS", case.state.pod_outputs.get("economics")),
+                ("POD_RISKS", risks),
+                ("SYNTHESIS", case.state.synthesis),
+            ],
+            self.context_budget,
+        )
+        return system, user
+
+    def parse(self, raw: str) -> Dict[str, Dict[str, Any]]:
+        """Valid sections by check name; anything unusable is simply absent."""
+        out = extract_json(raw)
+        sections: Dict[str, Dict[str, Any]] = {}
+        for c in self.combinable:
+            sec = out.get(c.name)
+            if isinstance(sec, dict) and isinstance(sec.get("blocking_issues"), list):
+                sections[c.name] = {**sec, "check": c.name}
+        return sections
+
+    def _assemble(self, sections: Dict[str, Dict[str, Any]], fallback: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "reports": [sections.get(c.name) or fallback[c.name] for c in self.checks],
+            "fallbacks": [c.name for c in self.checks if c.name not in sections],
+        }
+
+    def run(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        try:
+            raw = self.llm.chat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+            sections = self.parse(raw)
+        except Exception:
+            sections = {}
+        missing = [Stage(c.name, partial(c.run, case)) for c in self.checks if c.name not in sections]
+        fallback = StageScheduler(missing, max_concurrency=self.max_concurrency).run()
+        return self._assemble(sections, fallback)
+
+    async def arun(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        try:
+            raw = await self.llm.achat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+            sections = self.parse(raw)
+        except Exception:
+            sections = {}
+        missing: List[QACheck] = [c for c in self.checks if c.name not in sections]
+        reports = await asyncio.gather(*(c.arun(case) for c in missing))
+        return self._assemble(sections, {c.name: r for c, r in zip(missing, reports)})
@@ -1,17 +1,18 @@
 from __future__ import annotations
 
+from context import builder_for
 from qa.base import QACheck
 from prompts import qa_evidence_system
-from schema import extract_json
 
 
 class EvidenceQACheck(QACheck):
     name = "evidence"
 
-    def run(self, case):
+    def prompt(self, case):
         system = qa_evidence_system()
-        user = f"CLAIMS:\n{case.state.synthesis.get('claims')}\n\nASSUMPTIONS:\n{case.state.synthesis.get('assumptions')}"
-        raw = self.llm.chat(system=system, user=user, temperature=0.2)
-        out = extract_json(raw)
-        out["check"] = self.name
-        return out
\ No newline at end of file
+        user = builder_for(case, self.llm).build(
+            "qa.evidence",
+            [("CLAIMS", case.state.synthesis.get("claims")), ("ASSUMPTIONS", case.state.synthesis.get("assumptions"))],
+            self.context_budget,
+        )
+        return system, user
\ No newline at end of file
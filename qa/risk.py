@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+from context import builder_for, pick
 from qa.base import QACheck
 from prompts import qa_risk_system
-from schema import extract_json
+
+RISK_FIELDS = ("risks", "cashflow_risks", "failure_modes", "margin_notes")
 
 
 class RiskQACheck(QACheck):
     name = "risk"
 
-    def run(self, case):
+    def prompt(self, case):
         system = qa_risk_system()
-        user = f"BRIEF:\n{case.state.brief}\n\nPODS:\n{case.state.pod_outputs}\n\nSYNTHESIS:\n{case.state.synthesis}"
-        raw = self.llm.chat(system=system, user=user, temperature=0.2)
-        out = extract_json(raw)
-        out["check"] = self.name
-        return out
\ No newline at end of file
+        # Only the risk-bearing fields of each pod; the rest is already reflected in the synthesis.
+        risks = {name: pick(out, RISK_FIELDS) for name, out in case.state.pod_outputs.items()}
+        user = builder_for(case, self.llm).build(
+            "qa.risk",
+            [("POD_RISKS", risks), ("SYNTHESIS", case.state.synthesis)],
+            self.context_budget,
+        )
+        return system, user
\ No newline at end of file
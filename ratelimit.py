@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+_RETRY_DELAY_RE = re.compile(r"retry[_ ]?delay\W+(\d+(?:\.\d+)?)s", re.IGNORECASE)
+_HTTP_429_RE = re.compile(r"\b429\b")
+
+
+def is_rate_limit_error(err: BaseException) -> bool:
+    if getattr(err, "status_code", None) == 429 or getattr(getattr(err, "response", None), "status_code", None) == 429:
+        return True
+    if "RateLimit" in type(err).__name__:
+        return True
+    msg = str(err)
+    return bool(_HTTP_429_RE.search(msg)) or "RESOURCE_EXHAUSTED" in msg or "rate limit" in msg.lower()
+
+
+def retry_after_s(err: BaseException) -> Optional[float]:
+    """Best-effort Retry-After from a provider error: attribute, HTTP headers, or Gemini's retryDelay."""
+    direct = getattr(err, "retry_after", None)
+    if isinstance(direct, (int, float)):
+        return float(direct)
+
+    headers = getattr(err, "headers", None) or getattr(getattr(err, "response", None), "headers", None)
+    if headers:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            try:
+                return float(ms) / 1000.0
+            except ValueError:
+                pass
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except Exception:
+                    pass
+
+    m = _RETRY_DELAY_RE.search(str(err))
+    return float(m.group(1)) if m else None
+
+
+def _content_chars(content: Any) -> int:
+    if isinstance(content, list):
+        return sum(len(str(part.get("text", ""))) if isinstance(part, dict) else len(str(part)) for part in content)
+    return len(str(content or ""))
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], completion_allowance: int = 1024) -> int:
+    chars = sum(_content_chars(m.get("content", "")) for m in messages)
+    return chars // 4 + completion_allowance
+
+
+def usage_tokens(resp: Any) -> Optional[int]:
+    usage = getattr(resp, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return int(total) if total is not None else None
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class ModelLimiter:
+    """
+    Admission control for one model:
+    - token buckets for requests/min and tokens/min, refilled continuously
+    - AIMD concurrency window: grows by ~1 per window of successes, halves on a rate-limit error
+    - a rate-limit error (and its Retry-After, if any) pauses every caller of the model
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concurrency: int = 32,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+    ):
+        self.requests = _Bucket(rpm) if rpm else None
+        self.tokens = _Bucket(tpm) if tpm else None
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.limit = float(initial_concurrency or self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.rate_limited = 0
+        self.admitted = 0
+        self._strikes = 0
+        self._cond = threading.Condition()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Admits the call and returns 0, or returns how long to wait before trying again."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= int(self.limit):
+            return 0.05
+
+        waits = [0.0]
+        for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                waits.append(bucket.wait_for(amount))
+        if max(waits) > 0:
+            return max(waits)
+
+        if self.requests is not None:
+            self.requests.level -= 1
+        if self.tokens is not None:
+            self.tokens.level -= min(tokens, self.tokens.capacity)
+        self.in_flight += 1
+        self.admitted += 1
+        return 0.0
+
+    def acquire(self, tokens: int) -> None:
+        with self._cond:
+            while True:
+                wait = self._try_acquire(tokens)
+                if wait <= 0:
+                    return
+                self._cond.wait(timeout=min(wait, 1.0))
+
+    async def aacquire(self, tokens: int) -> None:
+        while True:
+            with self._cond:
+                wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    def release(
+        self,
+        tokens: int,
+        used_tokens: Optional[int] = None,
+        rate_limited: bool = False,
+        retry_after: Optional[float] = None,
+        aborted: bool = False,
+    ) -> None:
+        """aborted=True frees the slot of a call that was cancelled before it finished, without adapting the limit."""
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if aborted:
+                self._cond.notify_all()
+                return
+            if self.tokens is not None and used_tokens is not None:
+                # Settle the estimate against what the provider actually billed.
+                self.tokens.level -= used_tokens - min(tokens, self.tokens.capacity)
+
+            if rate_limited:
+                self.rate_limited += 1
+                self._strikes += 1
+                self.limit = max(float(self.min_concurrency), self.limit / 2.0)
+                pause = retry_after if retry_after is not None else min(60.0, 2.0**self._strikes)
+                self.paused_until = max(self.paused_until, time.monotonic() + pause + random.random() * 0.25)
+            else:
+                self._strikes = 0
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(1.0, self.limit))
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "rate_limited": self.rate_limited,
+                "paused_for_s": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            }
+
+
+def _env_float(name: str) -> Optional[float]:
+    v = os.getenv(name, "").strip()
+    return float(v) if v else None
+
+
+def _default_limits() -> Dict[str, Any]:
+    """
+    Process-wide defaults from LLM_RPM / LLM_TPM / LLM_MAX_CONCURRENCY; override per model
+    with configure(). Read as each limiter is created, not at import, so values from a .env
+    loaded by the client (after this module was imported) apply.
+    """
+    return {
+        "rpm": _env_float("LLM_RPM"),
+        "tpm": _env_float("LLM_TPM"),
+        "max_concurrency": int(_env_float("LLM_MAX_CONCURRENCY") or 32),
+    }
+
+
+_LIMITERS: Dict[str, ModelLimiter] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def configure(model: str, **limits: Any) -> ModelLimiter:
+    """Sets rpm / tpm / max_concurrency / min_concurrency for one model (replaces its limiter)."""
+    with _REGISTRY_LOCK:
+        _LIMITERS[model] = ModelLimiter(**{**_default_limits(), **limits})
+        return _LIMITERS[model]
+
+
+def limiter_for(model: str) -> ModelLimiter:
+    with _REGISTRY_LOCK:
+        lim = _LIMITERS.get(model)
+        if lim is None:
+            lim = _LIMITERS[model] = ModelLimiter(**_default_limits())
+        return lim
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _REGISTRY_LOCK:
+        items = list(_LIMITERS.items())
+    return {model: lim.stats() for model, lim in items}
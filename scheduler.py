@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[], Any]
+    requires: Tuple[str, ...] = ()
+    # Coroutine counterpart of fn, used by arun(); stages without one run fn in a thread.
+    afn: Optional[Callable[[], Awaitable[Any]]] = None
+
+
+class StageScheduler:
+    """
+    Runs a DAG of stages:
+    - a stage starts as soon as every stage it requires has finished
+    - independent stages run concurrently, at most max_concurrency at a time
+    - ready stages start in declaration order, so max_concurrency=1 is a plain sequential run
+    - the first failure stops new stages from starting and is re-raised
+    - run() uses a thread pool; arun() runs the same graph as tasks on the current event loop
+    - each stage runs in a copy of the caller's contextvars (e.g. the active tracer), in
+      threads as well as tasks
+    """
+
+    def __init__(self, stages: Sequence[Stage], max_concurrency: int = 4):
+        self.stages = list(stages)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._validate()
+
+    def _validate(self) -> None:
+        names = [s.name for s in self.stages]
+        dupes = sorted({n for n in names if names.count(n) > 1})
+        if dupes:
+            raise ValueError(f"Duplicate stage names: {dupes}")
+
+        known = set(names)
+        for s in self.stages:
+            missing = [r for r in s.requires if r not in known]
+            if missing:
+                raise ValueError(f"Stage '{s.name}' requires unknown stages: {missing}")
+
+        # Kahn's algorithm: anything left over sits on a cycle.
+        remaining = {s.name: set(s.requires) for s in self.stages}
+        while remaining:
+            ready = [n for n, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Stage dependency cycle among: {sorted(remaining)}")
+            for n in ready:
+                del remaining[n]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def _take_ready(self, pending: List[Stage], results: Dict[str, Any], n_running: int) -> List[Stage]:
+        ready: List[Stage] = []
+        for stage in list(pending):
+            if n_running + len(ready) >= self.max_concurrency:
+                break
+            if all(r in results for r in stage.requires):
+                pending.remove(stage)
+                ready.append(stage)
+        return ready
+
+    def run(self) -> Dict[str, Any]:
+        pending: List[Stage] = list(self.stages)
+        running: Dict[Future, Stage] = {}
+        results: Dict[str, Any] = {}
+        error: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as ex:
+            while running or (pending and error is None):
+                if error is None:
+                    for stage in self._take_ready(pending, results, len(running)):
+                        running[ex.submit(contextvars.copy_context().run, stage.fn)] = stage
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    stage = running.pop(fut)
+                    try:
+                        results[stage.name] = fut.result()
+                    except BaseException as e:
+                        if error is None:
+                            error = e
+
+        if error is not None:
+            raise error
+        return results
+
+    async def arun(self) -> Dict[str, Any]:
+        pending: List[Stage] = list(self.stages)
+        running: Dict[asyncio.Task, Stage] = {}
+        results: Dict[str, Any] = {}
+        error: Optional[BaseException] = None
+
+        try:
+            while running or (pending and error is None):
+                if error is None:
+                    for stage in self._take_ready(pending, results, len(running)):
+                        coro = stage.afn() if stage.afn is not None else asyncio.to_thread(stage.fn)
+                        running[asyncio.ensure_future(coro)] = stage
+
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    try:
+                        results[stage.name] = task.result()
+                    except BaseException as e:
+                        if error is None:
+                            error = e
+        finally:
+            for task in running:
+                task.cancel()
+
+        if error is not None:
+            raise error
+        return results
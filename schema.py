@@ -2,17 +2,323 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
+from tracing import span
 
+# Outside strings only braces and quotes matter; a string body is skipped in one regex match.
+_STRUCTURAL_RE = re.compile(r'[{}"]')
+_STRING_TAIL_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
 
-def extract_json(text: str) -> Dict[str, Any]:
-    m = _JSON_RE.search((text or "").strip())
-    if not m:
-        raise ValueError("No JSON found in model output.")
-    return json.loads(m.group(0))
+
+def iter_json_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yields (start, end) of candidate JSON objects in one left-to-right pass:
+    - braces are matched with a stack, ignoring braces inside JSON strings
+    - only outermost balanced objects are yielded, so the spans are disjoint and O(n) in total
+    - when a stray "{" never closes (prose, truncated output), the balanced objects
+      nested directly under it are yielded at the end instead
+    """
+    stack: List[Tuple[int, Optional[int]]] = []  # (open index, parent open index)
+    nested: List[Tuple[int, int, int]] = []  # (parent, start, end) for spans under a still-open brace
+    pos = 0
+
+    while True:
+        if not stack:
+            i = text.find("{", pos)
+            if i < 0:
+                break
+            stack.append((i, None))
+            pos = i + 1
+            continue
+
+        m = _STRUCTURAL_RE.search(text, pos)
+        if m is None:
+            break
+        i = m.start()
+        c = text[i]
+        pos = i + 1
+        if c == '"':
+            tail = _STRING_TAIL_RE.match(text, pos)
+            if tail is None:
+                break  # unterminated string: nothing after it can close a brace
+            pos = tail.end()
+        elif c == "{":
+            stack.append((i, stack[-1][0]))
+        else:
+            start, parent = stack.pop()
+            if parent is None:
+                nested.clear()
+                yield start, i + 1
+            else:
+                nested.append((parent, start, i + 1))
+
+    if stack:
+        unclosed = {start for start, _ in stack}
+        for _, start, end in sorted((s for s in nested if s[0] in unclosed), key=lambda s: s[1]):
+            yield start, end
+
+
+def extract_json(text: str, keys: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Returns the first JSON object in model output (prose, markdown fences and
+    several objects are fine). With keys, the first object carrying all of them
+    wins, falling back to the first object found.
+    """
+    text = text or ""
+    with span("json.extract", cat="json", chars=len(text)):
+        return _extract_json(text, keys)
+
+
+def _extract_json(text: str, keys: Sequence[str]) -> Dict[str, Any]:
+    first: Optional[Dict[str, Any]] = None
+    for start, end in iter_json_spans(text):
+        try:
+            obj = json.loads(text[start:end])
+        except ValueError:
+            continue
+        if not isinstance(obj, dict):
+            continue
+        if not keys or all(k in obj for k in keys):
+            return obj
+        if first is None:
+            first = obj
+    if first is not None:
+        return first
+    raise ValueError("No JSON found in model output.")
+
+
+_LITERALS = {"True": "true", "False": "false", "None": "null", "true": "true", "false": "false", "null": "null"}
+_BAREWORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]*")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _closes_string(text: str, j: int) -> bool:
+    """A quote only ends a string if what follows could follow a JSON value or key."""
+    while j < len(text) and text[j] in " \t\r\n":
+        j += 1
+    return j >= len(text) or text[j] in ",:}]"
+
+
+def _close(out: List[str], stack: List[str]) -> str:
+    text = "".join(out).rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join(_CLOSERS[c] for c in reversed(stack))
+
+
+def repair_json(text: str) -> Dict[str, Any]:
+    """
+    Deterministic repair of near-miss model JSON, tried before asking the model to fix it:
+    trailing commas, single-quoted strings, unescaped quotes and raw newlines/tabs inside strings,
+    Python literals (True/False/None), bare keys, and output truncated mid-object.
+    Raises ValueError when the result still isn't a JSON object.
+    """
+    text = text or ""
+    with span("json.repair", cat="json", chars=len(text)):
+        return _repair_json(text)
+
+
+def _repair_json(text: str) -> Dict[str, Any]:
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object to repair.")
+
+    out: List[str] = []
+    stack: List[str] = []
+    # (len(out), stack) at each top-level-of-container comma, for backing out of a truncated tail
+    commas: List[Tuple[int, List[str]]] = []
+    quote = ""
+    i, n = start, len(text)
+
+    while i < n:
+        c = text[i]
+        if quote:
+            if c == "\\" and i + 1 < n:
+                nxt = text[i + 1]
+                out.append("'" if nxt == "'" else c + nxt)
+                i += 2
+                continue
+            if c == quote and _closes_string(text, i + 1):
+                out.append('"')
+                quote = ""
+            elif c == '"':
+                out.append('\\"')
+            elif c == "\n":
+                out.append("\\n")
+            elif c == "\t":
+                out.append("\\t")
+            elif c == "\r":
+                out.append("\\r")
+            elif ord(c) >= 0x20:
+                out.append(c)
+            i += 1
+            continue
+
+        if c in "\"'":
+            quote = c
+            out.append('"')
+        elif c in "{[":
+            stack.append(c)
+            out.append(c)
+        elif c in "}]":
+            if not stack:
+                break
+            # Close anything left open inside (e.g. a missing "]"), dropping trailing commas.
+            while stack and _CLOSERS[stack[-1]] != c:
+                out = [_close(out, stack[-1:])]
+                stack.pop()
+            if stack:
+                out = [_close(out, [])]
+                out.append(c)
+                stack.pop()
+            if not stack:
+                break
+        elif c == ",":
+            commas.append((len(out), list(stack)))
+            out.append(c)
+        elif c.isalpha() or c == "_":
+            m = _BAREWORD_RE.match(text, i)
+            word = m.group(0)
+            j = m.end()
+            while j < n and text[j].isspace():
+                j += 1
+            if word in _LITERALS and not (j < n and text[j] == ":"):
+                out.append(_LITERALS[word])
+            else:
+                out.append(json.dumps(word))
+            i = m.end()
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    if quote:
+        out.append('"')
+
+    attempts = [_close(out, stack)] if stack else ["".join(out)]
+    # Truncated output: also try cutting back to the last few commas.
+    for pos, st in reversed(commas[-3:]):
+        if stack:
+            attempts.append(_close(out[:pos], st))
+
+    for candidate in attempts:
+        try:
+            obj = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(obj, dict):
+            return obj
+    raise ValueError("Could not repair JSON locally.")
 
 
 def safe_str(x: Any) -> str:
-    return "" if x is None else str(x).strip()
\ No newline at end of file
+    return "" if x is None else str(x).strip()
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a streamed JSON object.
+    feed() model output chunk by chunk; it returns (key, value) for every top-level
+    field of the first object as soon as that field's value has closed.
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._text = ""
+        self._i = 0
+        self._state = "seek"  # seek -> key_wait -> key -> colon -> value_wait -> value -> after_value
+        self._key = ""
+        self._start = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._scalar = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._text += chunk or ""
+        out: List[Tuple[str, Any]] = []
+        text = self._text
+        while self._i < len(text) and not self.done:
+            c = text[self._i]
+            st = self._state
+            if st == "seek":
+                if c == "{":
+                    self._state = "key_wait"
+            elif st == "key_wait":
+                if c == '"':
+                    self._state, self._start, self._esc = "key", self._i + 1, False
+                elif c == "}":
+                    self.done = True
+            elif st == "key":
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._key = json.loads(text[self._start - 1 : self._i + 1])
+                    self._state = "colon"
+            elif st == "colon":
+                if c == ":":
+                    self._state = "value_wait"
+            elif st == "value_wait":
+                if not c.isspace():
+                    self._state, self._start = "value", self._i
+                    self._depth, self._esc = 0, False
+                    self._in_str = c == '"'
+                    self._scalar = c not in '{["'
+                    if c in "{[":
+                        self._depth = 1
+            elif st == "value":
+                end = self._scan_value(c)
+                if end is not None:
+                    self._emit(text[self._start : end], out)
+                    if not self._scalar:
+                        self._state = "after_value"
+                    elif c == ",":
+                        self._state = "key_wait"
+                    else:
+                        self.done = True
+            elif st == "after_value":
+                if c == ",":
+                    self._state = "key_wait"
+                elif c == "}":
+                    self.done = True
+            self._i += 1
+        return out
+
+    def _scan_value(self, c: str) -> Optional[int]:
+        """Advances the value scanner by one char; returns the value's end index once it closes."""
+        i = self._i
+        if self._scalar:
+            return i if c in ",}" else None
+        if self._in_str:
+            if self._esc:
+                self._esc = False
+            elif c == "\\":
+                self._esc = True
+            elif c == '"':
+                self._in_str = False
+                if self._depth == 0:
+                    return i + 1
+            return None
+        if c == '"':
+            self._in_str = True
+        elif c in "{[":
+            self._depth += 1
+        elif c in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                return i + 1
+        return None
+
+    def _emit(self, raw: str, out: List[Tuple[str, Any]]) -> None:
+        try:
+            value = json.loads(raw.strip())
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        out.append((self._key, value))
@@ -1,30 +1,72 @@
 from __future__ import annotations
 
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from context import builder_for, pick, shared_prefix
 from llm import LLMClient
 from prompts import synthesis_system
-from schema import extract_json
+from schema import IncrementalJSONParser, extract_json
 from case import Case
 
 
 class Synthesizer:
     """
-    Partner-style synthesis using brief + framing + pods.
+    Partner-style synthesis using brief + framing (the shared prefix) + pods.
     Produces: executive summary, recommendations, assumptions, claims.
+    With on_field set, the completion is streamed and on_field(key, value) fires
+    for each top-level field as soon as it closes.
     """
 
-    def __init__(self, llm: LLMClient):
+    temperature = 0.35
+    context_budget = 12000
+
+    def __init__(self, llm: LLMClient, on_field: Optional[Callable[[str, Any], None]] = None):
         self.llm = llm
+        self.on_field = on_field
+
+    def prefix(self, case: Case) -> str:
+        return shared_prefix(case, self.llm, "synthesis")
 
-    def run(self, case: Case) -> None:
+    def prompt(self, case: Case) -> Tuple[str, str]:
         system = synthesis_system()
-        user = (
-            "BRIEF:\n"
-            f"{case.state.brief}\n\n"
-            "FRAMING:\n"
-            f"{case.state.framing}\n\n"
-            "POD_OUTPUTS:\n"
-            f"{case.state.pod_outputs}\n\n"
-            "Produce synthesis."
+        user = builder_for(case, self.llm).build(
+            "synthesis",
+            [("FRAMING_DATA_NEEDED", pick(case.state.framing, ("data_needed",))), ("POD_OUTPUTS", case.state.pod_outputs)],
+            self.context_budget,
+            tail="Produce synthesis.",
         )
-        raw = self.llm.chat(system=system, user=user, temperature=0.35)
-        case.state.synthesis = extract_json(raw)
\ No newline at end of file
+        return system, user
+
+    def run(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        prefix = self.prefix(case)
+        if self.on_field is None:
+            raw = self.llm.chat(system=system, user=user, temperature=self.temperature, prefix=prefix)
+        else:
+            parser = IncrementalJSONParser()
+            parts = []
+            stream = self.llm.stream_chat(system=system, user=user, temperature=self.temperature, prefix=prefix)
+            for delta in stream:
+                parts.append(delta)
+                for key, value in parser.feed(delta):
+                    self.on_field(key, value)
+            raw = "".join(parts)
+        case.state.synthesis = extract_json(raw, keys=("executive_summary",))
+        return case.state.synthesis
+
+    async def arun(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        prefix = self.prefix(case)
+        if self.on_field is None:
+            raw = await self.llm.achat(system=system, user=user, temperature=self.temperature, prefix=prefix)
+        else:
+            parser = IncrementalJSONParser()
+            parts = []
+            stream = self.llm.astream_chat(system=system, user=user, temperature=self.temperature, prefix=prefix)
+            async for delta in stream:
+                parts.append(delta)
+                for key, value in parser.feed(delta):
+                    self.on_field(key, value)
+            raw = "".join(parts)
+        case.state.synthesis = extract_json(raw, keys=("executive_summary",))
+        return case.state.synthesis
\ No newline at end of file
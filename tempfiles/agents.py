@@ -1,11 +1,39 @@
 import random
 import os
-from litellm import completion
-from datasets import load_dataset
+import sys
 import json
 
-ds = load_dataset("nvidia/Nemotron-Personas-USA", split="train", streaming=True)
-ds_iter = iter(ds.shuffle(buffer_size=10000))
+# persona_snapshot lives at the repo root.
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from persona_snapshot import PersonaSnapshot, default_path, snapshot_exists  # noqa: E402
+
+# Personas are opened on first use, not at import: the local snapshot (persona_snapshot.py
+# export) when there is one, otherwise the Hub stream, which is a network round-trip.
+ds_iter = None
+
+
+def next_persona():
+    global ds_iter
+    if ds_iter is None:
+        path = default_path()
+        if snapshot_exists(path):
+            ds_iter = PersonaSnapshot(path).sample(seed=random.randint(1, 10_000))
+        else:
+            from datasets import load_dataset
+
+            ds = load_dataset("nvidia/Nemotron-Personas-USA", split="train", streaming=True)
+            ds_iter = iter(ds.shuffle(buffer_size=10000))
+    return dict(next(ds_iter))
+
+
+def completion(**kwargs):
+    # litellm is slow to import; defer it until a request is made.
+    import litellm
+
+    return litellm.completion(**kwargs)
 
 MODELS = [
     #  "openai/gpt-4o",
@@ -15,7 +43,7 @@ MODELS = [
 
 class GeneratorAgent:
     def __init__(self):
-        self.persona = next(ds_iter)
+        self.persona = next_persona()
         self.model = random.sample(MODELS, 1)[0]
         self.system_prompt = f"""
 You are a pragmatic, highly analytical entrepreneur with the following persona:
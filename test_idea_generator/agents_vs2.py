@@ -1,33 +1,52 @@
 from __future__ import annotations
 
+import contextvars
 import json
+import logging
+import math
 import os
 import random
 import re
+import sys
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
-from litellm import completion
+# Shared infrastructure (response cache, rate limits, JSON parsing) lives at the repo root.
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
 
-# Load .env automatically if python-dotenv is installed (recommended)
-try:
-    from dotenv import load_dotenv  # type: ignore
-except Exception:
-    load_dotenv = None  # type: ignore
-
-try:
-    from datasets import load_dataset  # type: ignore
-except Exception:
-    load_dataset = None  # type: ignore
+from catalog import RunCatalog  # noqa: E402
+from idea_index import IdeaIndex  # noqa: E402
+from llm_cache import ResponseCache  # noqa: E402
+from minhash import NearDupIndex  # noqa: E402
+from persona_snapshot import PersonaSnapshot, default_path as persona_snapshot_path, snapshot_exists  # noqa: E402
+from schema import extract_json, repair_json  # noqa: E402
+from ratelimit import estimate_tokens, is_rate_limit_error, limiter_for, retry_after_s, usage_tokens  # noqa: E402
 
 
 # ============================
 # Config (Gemini API key mode)
 # ============================
 
-if load_dotenv is not None:
+_ENV_LOADED = False
+
+
+def _load_env() -> None:
+    """Loads .env (if python-dotenv is installed) once, on first use rather than at import."""
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    _ENV_LOADED = True
+    try:
+        from dotenv import load_dotenv  # type: ignore
+    except Exception:
+        return
     load_dotenv()
 
 # Put your key in .env:
@@ -44,20 +63,55 @@ DEFAULT_MODEL = MODELS[0] if MODELS else "gemini/gemini-1.5-flash"
 MAX_RETRIES = 3
 BACKOFF_BASE_S = 1.4
 
+_log = logging.getLogger(__name__)
+
+# On-disk response cache shared by every _call_llm; set LLM_CACHE_PATH="" to disable.
+# None means read it from the environment (.env included) on first use.
+LLM_CACHE_PATH: Optional[str] = None
+_RESPONSE_CACHE: Optional[ResponseCache] = None
+
+# Cross-run store of ideas and critiques (idea_index.py); set IDEA_INDEX_PATH="" to disable.
+IDEA_INDEX_PATH: Optional[str] = None
+_IDEA_INDEX: Optional[IdeaIndex] = None
+
+# Run catalog (catalog.py) every SupervisorAgent.run is recorded in; set RUN_CATALOG_PATH="" to disable.
+RUN_CATALOG_PATH: Optional[str] = None
+_RUN_CATALOG: Optional[RunCatalog] = None
+
 
 # ============================
 # PersonaSource
 # ============================
 
 class PersonaSource:
-    def __init__(self, seed: int = 7, buffer_size: int = 10_000):
+    """
+    Seeded stream of personas. Reads the local snapshot (persona_snapshot.py export) when
+    one exists: no network, seeded sampling without replacement, milliseconds to start.
+    Otherwise streams the dataset from the Hub through a shuffle buffer.
+    snapshot_path defaults to $PERSONA_SNAPSHOT (.env included) at first use. The snapshot is
+    opened once and reused when sampling restarts; close() releases it.
+    """
+
+    def __init__(self, seed: int = 7, buffer_size: int = 10_000, snapshot_path: Optional[str] = None):
         self.seed = seed
         self.buffer_size = buffer_size
+        self.snapshot_path = snapshot_path
         self._rng = random.Random(seed)
         self._iter = None
+        self._snapshot: Optional[PersonaSnapshot] = None
 
     def _init_iter(self) -> None:
-        if load_dataset is None:
+        if self._snapshot is None:
+            _load_env()
+            path = self.snapshot_path or persona_snapshot_path()
+            if snapshot_exists(path):
+                self._snapshot = PersonaSnapshot(path)
+        if self._snapshot is not None:
+            self._iter = self._snapshot.sample(seed=self._rng.randint(1, 10_000))
+            return
+        try:
+            from datasets import load_dataset  # type: ignore
+        except Exception:
             self._iter = None
             return
         ds = load_dataset("nvidia/Nemotron-Personas-USA", split="train", streaming=True)
@@ -86,11 +140,98 @@ class PersonaSource:
             except Exception:
                 return None
 
+    def close(self) -> None:
+        self._iter = None
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
 
 # ============================
 # LLM call wrapper
 # ============================
 
+def response_cache() -> Optional[ResponseCache]:
+    global _RESPONSE_CACHE, LLM_CACHE_PATH
+    if LLM_CACHE_PATH is None:
+        _load_env()
+        LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+    if _RESPONSE_CACHE is None and LLM_CACHE_PATH:
+        _RESPONSE_CACHE = ResponseCache(LLM_CACHE_PATH)
+    return _RESPONSE_CACHE
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    global _RESPONSE_CACHE, LLM_CACHE_PATH
+    _RESPONSE_CACHE = cache
+    if cache is None:
+        LLM_CACHE_PATH = ""
+
+
+def idea_index() -> Optional[IdeaIndex]:
+    global _IDEA_INDEX, IDEA_INDEX_PATH
+    if IDEA_INDEX_PATH is None:
+        _load_env()
+        IDEA_INDEX_PATH = os.getenv("IDEA_INDEX_PATH", ".cache/idea_index.sqlite")
+    if _IDEA_INDEX is None and IDEA_INDEX_PATH:
+        _IDEA_INDEX = IdeaIndex(IDEA_INDEX_PATH)
+    return _IDEA_INDEX
+
+
+def set_idea_index(index: Optional[IdeaIndex]) -> None:
+    global _IDEA_INDEX, IDEA_INDEX_PATH
+    _IDEA_INDEX = index
+    if index is None:
+        IDEA_INDEX_PATH = ""
+
+
+def run_catalog() -> Optional[RunCatalog]:
+    global _RUN_CATALOG, RUN_CATALOG_PATH
+    if RUN_CATALOG_PATH is None:
+        _load_env()
+        RUN_CATALOG_PATH = os.getenv("RUN_CATALOG_PATH", os.path.join("runs", "catalog.sqlite"))
+    if _RUN_CATALOG is None and RUN_CATALOG_PATH:
+        _RUN_CATALOG = RunCatalog(RUN_CATALOG_PATH)
+    return _RUN_CATALOG
+
+
+def set_run_catalog(catalog: Optional[RunCatalog]) -> None:
+    global _RUN_CATALOG, RUN_CATALOG_PATH
+    _RUN_CATALOG = catalog
+    if catalog is None:
+        RUN_CATALOG_PATH = ""
+
+
+# Provider-reported usage across every uncached _call_llm in this process.
+_LLM_USAGE = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+_LLM_USAGE_LOCK = threading.Lock()
+
+
+def _record_usage(resp: Any) -> None:
+    usage = getattr(resp, "usage", None)
+    with _LLM_USAGE_LOCK:
+        _LLM_USAGE["calls"] += 1
+        _LLM_USAGE["prompt_tokens"] += int(getattr(usage, "prompt_tokens", 0) or 0)
+        _LLM_USAGE["completion_tokens"] += int(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def llm_usage() -> Dict[str, int]:
+    with _LLM_USAGE_LOCK:
+        return dict(_LLM_USAGE)
+
+
+def _is_transport_error(err: BaseException) -> bool:
+    """Rate limits and connection failures anywhere in err's cause chain (_call_llm wraps them)."""
+    seen: Optional[BaseException] = err
+    while seen is not None:
+        if is_rate_limit_error(seen) or isinstance(seen, (ConnectionError, TimeoutError)):
+            return True
+        if type(seen).__name__ in ("APIConnectionError", "Timeout", "ServiceUnavailableError"):
+            return True
+        seen = seen.__cause__
+    return False
+
+
 def _sleep_backoff(attempt: int) -> None:
     time.sleep((BACKOFF_BASE_S**attempt) + random.random() * 0.25)
 
@@ -101,22 +242,52 @@ def _call_llm(
     user: str,
     temperature: float = 0.7,
     max_retries: int = MAX_RETRIES,
+    use_cache: bool = True,
 ) -> str:
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+    _load_env()
+    import litellm  # deferred: importing it costs over a second
+
+    cache = response_cache() if use_cache else None
+    key = ResponseCache.key(model=model, messages=messages, temperature=temperature) if cache else None
+    if key is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    limiter = limiter_for(model)
+    est = estimate_tokens(messages)
     last_err: Optional[Exception] = None
     for attempt in range(1, max_retries + 1):
+        limiter.acquire(est)
+        released = False
         try:
-            resp = completion(
+            resp = litellm.completion(
                 model=model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
+                messages=messages,
                 temperature=temperature,
             )
-            return resp.choices[0].message.content
+            content = resp.choices[0].message.content
         except Exception as e:
             last_err = e
-            _sleep_backoff(attempt)
+            limited = is_rate_limit_error(e)
+            released = True
+            limiter.release(est, rate_limited=limited, retry_after=retry_after_s(e) if limited else None)
+            if not limited:
+                _sleep_backoff(attempt)
+        else:
+            released = True
+            limiter.release(est, used_tokens=usage_tokens(resp))
+            _record_usage(resp)
+            if key is not None and content:
+                cache.put(key, content)
+            return content
+        finally:
+            if not released:
+                limiter.release(est, aborted=True)
 
     raise RuntimeError(f"LLM call failed after {max_retries} retries: {last_err}") from last_err
 
@@ -125,28 +296,56 @@ def _call_llm(
 # JSON extraction + repair
 # ============================
 
-_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
-
+def _extract_json(text: str, keys: Sequence[str] = ()) -> Dict[str, Any]:
+    return extract_json(text, keys=keys)
 
-def _extract_json(text: str) -> Dict[str, Any]:
-    m = _JSON_RE.search((text or "").strip())
-    if not m:
-        raise ValueError("No JSON object found in output.")
-    return json.loads(m.group(0))
 
-
-def _repair_json(model: str, broken: str) -> Dict[str, Any]:
+def _repair_json(model: str, broken: str, keys: Sequence[str] = ()) -> Dict[str, Any]:
     system = "You fix JSON. Return valid JSON ONLY. No markdown. No commentary."
     user = "Fix the following so it is valid JSON and matches the requested schema:\n\n" + broken
     fixed = _call_llm(model=model, system=system, user=user, temperature=0.0, max_retries=2)
-    return _extract_json(fixed)
+    return _extract_json(fixed, keys=keys)
+
+
+_JSON_STATS = {"parsed": 0, "local_repair": 0, "llm_repair": 0, "failed": 0}
+_JSON_STATS_LOCK = threading.Lock()
+
 
+def _count(outcome: str) -> None:
+    with _JSON_STATS_LOCK:
+        _JSON_STATS[outcome] += 1
 
-def _json_or_repair(model: str, text: str) -> Dict[str, Any]:
+
+def json_repair_stats() -> Dict[str, Any]:
+    with _JSON_STATS_LOCK:
+        stats: Dict[str, Any] = dict(_JSON_STATS)
+    total = sum(stats.values())
+    stats["local_repair_rate"] = round(stats["local_repair"] / total, 4) if total else 0.0
+    stats["llm_repair_rate"] = round(stats["llm_repair"] / total, 4) if total else 0.0
+    return stats
+
+
+def _json_or_repair(model: str, text: str, keys: Sequence[str] = ()) -> Dict[str, Any]:
+    """Strict parse, then deterministic local repair, and only then an LLM repair round trip."""
+    try:
+        data = _extract_json(text, keys=keys)
+        _count("parsed")
+        return data
+    except Exception:
+        pass
     try:
-        return _extract_json(text)
+        data = repair_json(text)
+        _count("local_repair")
+        return data
+    except ValueError:
+        pass
+    try:
+        data = _repair_json(model, text, keys=keys)
     except Exception:
-        return _repair_json(model, text)
+        _count("failed")
+        raise
+    _count("llm_repair")
+    return data
 
 
 def _safe_list(x: Any) -> List[str]:
@@ -296,6 +495,30 @@ Rules:
 """.strip()
 
 
+CRITIC_BATCH_JSON_SCHEMA = """
+Critique EACH idea above independently, as if it were the only one.
+Return STRICT JSON ONLY (no markdown, no extra keys), one entry per idea, using its idea_id:
+
+{
+  "critiques": [
+    {
+      "idea_id": "string",
+      "score": 0-10,
+      "verdict": "advance" | "revise" | "archive",
+      "summary": "string",
+      "fatal_flags": ["string"],
+      "improvements": ["string", "string", "string"],
+      "assumptions_to_validate": ["string", "string", "string"]
+    }
+  ]
+}
+
+Rules:
+- fatal_flags are issues that must be fixed, otherwise archive.
+- Be conservative and grounded.
+""".strip()
+
+
 critic_system_prompts: List[Dict[str, str]] = [
     {"name": "Market Sizing Researcher", "system_prompt": """You are a conservative operator focused on grounded, cash-flow businesses.
 
@@ -385,6 +608,7 @@ For each idea provide:
             system=self.system_prompt,
             user=prompt,
             temperature=1.0,
+            use_cache=False,  # sampling: repeated calls should give fresh ideas, not a replay
         )
         return self.content
 
@@ -401,6 +625,7 @@ class CriticAgent:
             system=self.system_prompt,
             user=f"Business idea to analyse:\n{prompt}",
             temperature=0.7,
+            use_cache=False,  # each critic call is an independent opinion
         )
 
 
@@ -430,8 +655,9 @@ Generate ONE idea. Output STRICT JSON only.
             system=WORKER_SYSTEM_PROMPT,
             user=user,
             temperature=1.0,
+            use_cache=False,  # sampling stage: every worker should get a fresh draw
         )
-        data = _json_or_repair(self.model, raw)
+        data = _json_or_repair(self.model, raw, keys=("name", "what_it_is"))
 
         idea_id = f"idea_{uuid.uuid4().hex[:10]}"
         return Idea(
@@ -455,31 +681,52 @@ Generate ONE idea. Output STRICT JSON only.
         )
 
 
+# Context budget for batched critiques when litellm has no model info.
+_FALLBACK_MAX_INPUT_TOKENS = 32_000
+_FALLBACK_MAX_OUTPUT_TOKENS = 8_192
+# Rough completion size of one critique entry.
+_CRITIQUE_OUTPUT_TOKENS = 400
+_MODEL_LIMITS: Dict[str, Tuple[int, int]] = {}
+
+_CRITIQUE_STATS = {"batch_calls": 0, "batched_ideas": 0, "reasked": 0}
+_CRITIQUE_STATS_LOCK = threading.Lock()
+
+
+def _count_critique(key: str, n: int = 1) -> None:
+    with _CRITIQUE_STATS_LOCK:
+        _CRITIQUE_STATS[key] += n
+
+
+def critique_stats() -> Dict[str, int]:
+    with _CRITIQUE_STATS_LOCK:
+        return dict(_CRITIQUE_STATS)
+
+
+def _model_limits(model: str) -> Tuple[int, int]:
+    """(max input tokens, max output tokens) from litellm's model map, with conservative fallbacks."""
+    if model not in _MODEL_LIMITS:
+        max_in, max_out = _FALLBACK_MAX_INPUT_TOKENS, _FALLBACK_MAX_OUTPUT_TOKENS
+        try:
+            from litellm import get_model_info
+
+            info = get_model_info(model) or {}
+            max_in = int(info.get("max_input_tokens") or max_in)
+            max_out = int(info.get("max_output_tokens") or max_out)
+        except Exception:
+            pass
+        _MODEL_LIMITS[model] = (max_in, max_out)
+    return _MODEL_LIMITS[model]
+
+
 @dataclass
 class PanelCritic:
     critic_name: str
     system_prompt: str
     model: str
+    # Upper bound on ideas per batched call; long batches dilute attention per idea.
+    max_batch: int = 8
 
-    def critique(self, brief: str, idea: Idea) -> Critique:
-        user = f"""
-USER_PROFILE_AND_BRIEF:
-{brief}
-
-IDEA (JSON):
-{json.dumps(idea.to_dict(), ensure_ascii=False)}
-
-{CRITIC_JSON_SCHEMA}
-""".strip()
-
-        raw = _call_llm(
-            model=self.model,
-            system=self.system_prompt,
-            user=user,
-            temperature=0.5,
-        )
-        data = _json_or_repair(self.model, raw)
-
+    def _critique_from(self, idea_id: str, data: Dict[str, Any], raw: str) -> Critique:
         score = data.get("score", 0)
         try:
             score_f = float(score)
@@ -493,7 +740,7 @@ IDEA (JSON):
 
         return Critique(
             critique_id=f"crit_{uuid.uuid4().hex[:10]}",
-            idea_id=idea.idea_id,
+            idea_id=idea_id,
             critic_name=self.critic_name,
             score=score_f,
             verdict=verdict,
@@ -505,6 +752,150 @@ IDEA (JSON):
             raw=raw,
         )
 
+    def critique(self, brief: str, idea: Idea) -> Critique:
+        user = f"""
+USER_PROFILE_AND_BRIEF:
+{brief}
+
+IDEA (JSON):
+{json.dumps(idea.to_dict(), ensure_ascii=False)}
+
+{CRITIC_JSON_SCHEMA}
+""".strip()
+
+        raw = _call_llm(
+            model=self.model,
+            system=self.system_prompt,
+            user=user,
+            temperature=0.5,
+        )
+        data = _json_or_repair(self.model, raw, keys=("score", "verdict"))
+        return self._critique_from(idea.idea_id, data, raw)
+
+    def batch_size(self, brief: str, ideas: Sequence[Idea]) -> int:
+        """
+        How many ideas fit in one call: half the model's input window (after the brief and
+        prompts) and most of its output window, capped at max_batch.
+        """
+        if not ideas:
+            return 1
+        max_in, max_out = _model_limits(self.model)
+        fixed = estimate_tokens(
+            [{"content": self.system_prompt}, {"content": brief}, {"content": CRITIC_BATCH_JSON_SCHEMA}],
+            completion_allowance=0,
+        )
+        per_idea = max(
+            1,
+            max(estimate_tokens([{"content": json.dumps(i.to_dict(), ensure_ascii=False)}], 0) for i in ideas),
+        )
+        by_input = (max_in // 2 - fixed) // per_idea
+        by_output = int(max_out * 0.8) // _CRITIQUE_OUTPUT_TOKENS
+        return max(1, min(self.max_batch, by_input, by_output))
+
+    def batches(self, brief: str, ideas: Sequence[Idea]) -> List[List[Idea]]:
+        k = self.batch_size(brief, ideas)
+        return [list(ideas[i : i + k]) for i in range(0, len(ideas), k)]
+
+    def critique_batch(self, brief: str, ideas: Sequence[Idea]) -> List[Critique]:
+        """
+        Critiques several ideas in one call per batch (see batches()) and returns one Critique
+        per idea, in input order. Ideas the model skipped, or whose entry is unusable, are
+        re-asked individually; an idea that still fails is left out, as in critique().
+        """
+        out: List[Critique] = []
+        for chunk in self.batches(brief, ideas):
+            if len(chunk) == 1:
+                out.extend(self._reask(brief, chunk))
+                continue
+            lines = "\n".join(json.dumps(i.to_dict(), ensure_ascii=False) for i in chunk)
+            user = f"""
+USER_PROFILE_AND_BRIEF:
+{brief}
+
+IDEAS (JSON, one per line):
+{lines}
+
+{CRITIC_BATCH_JSON_SCHEMA}
+""".strip()
+
+            found: Dict[str, Critique] = {}
+            try:
+                raw = _call_llm(model=self.model, system=self.system_prompt, user=user, temperature=0.5)
+                data = _json_or_repair(self.model, raw, keys=("critiques",))
+                wanted = {i.idea_id for i in chunk}
+                for entry in data.get("critiques") or []:
+                    if not isinstance(entry, dict):
+                        continue
+                    idea_id = str(entry.get("idea_id", "")).strip()
+                    if idea_id in wanted and idea_id not in found and "score" in entry:
+                        found[idea_id] = self._critique_from(idea_id, entry, raw)
+            except Exception as e:
+                if _is_transport_error(e):
+                    # Re-asking each idea would send K more calls into the same outage.
+                    _log.warning("Batch critique by %s failed (%s); not re-asking its %d ideas", self.critic_name, e, len(chunk))
+                    raise
+                _log.warning("Batch critique by %s failed (%s); re-asking its %d ideas one by one", self.critic_name, e, len(chunk))
+            _count_critique("batch_calls")
+            _count_critique("batched_ideas", len(found))
+
+            missing = [i for i in chunk if i.idea_id not in found]
+            reasked = {c.idea_id: c for c in self._reask(brief, missing)}
+            _count_critique("reasked", len(missing))
+            for idea in chunk:
+                c = found.get(idea.idea_id) or reasked.get(idea.idea_id)
+                if c is not None:
+                    out.append(c)
+        return out
+
+    def _reask(self, brief: str, ideas: Sequence[Idea]) -> List[Critique]:
+        out: List[Critique] = []
+        for idea in ideas:
+            try:
+                out.append(self.critique(brief, idea))
+            except Exception:
+                continue
+        return out
+
+
+# ============================
+# Bounded fan-out
+# ============================
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _bounded_map(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    max_concurrency: int,
+    model_of: Optional[Callable[[T], str]] = None,
+    per_model_limits: Optional[Dict[str, int]] = None,
+) -> List[Optional[R]]:
+    """
+    Runs fn over items on a thread pool and returns results in input order.
+    Items that raise come back as None. per_model_limits caps in-flight calls per model.
+    """
+    limits = per_model_limits or {}
+    gates = {m: threading.BoundedSemaphore(max(1, int(n))) for m, n in limits.items()}
+
+    def call(item: T) -> Optional[R]:
+        gate = gates.get(model_of(item)) if model_of is not None else None
+        try:
+            if gate is None:
+                return fn(item)
+            with gate:
+                return fn(item)
+        except Exception:
+            return None
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_concurrency), len(items)))) as ex:
+        # Each call gets a copy of the caller's contextvars (e.g. an active tracer).
+        futures = [ex.submit(contextvars.copy_context().run, call, item) for item in items]
+        return [f.result() for f in futures]
+
 
 # ============================
 # Dedupe
@@ -516,28 +907,36 @@ def _normalize(s: str) -> str:
     return re.sub(r"\s+", " ", s).strip()
 
 
-def dedupe_ideas(ideas: List[Idea]) -> List[Idea]:
+def idea_text(idea: Idea) -> str:
+    """The fields cross-run critique reuse compares."""
+    return " ".join((idea.name, idea.what_it_is, idea.target_customer))
+
+
+def dedupe_ideas(
+    ideas: List[Idea],
+    threshold: float = 0.72,
+    index: Optional[NearDupIndex] = None,
+) -> List[Idea]:
+    """
+    Drops exact (name, target_customer) repeats and near-duplicates: the same normalised
+    target_customer and word-set Jaccard over what_it_is >= threshold, found through a
+    MinHash/LSH index instead of comparing every pair. Pass index to keep deduping across
+    calls (ideas already in it count as seen, including a repeated idea_id); it is updated
+    in place and keyed by (target_customer, idea_id).
+    """
+    index = index if index is not None else NearDupIndex(threshold=threshold)
     kept: List[Idea] = []
     seen = set()
 
     for idea in ideas:
-        key = (_normalize(idea.name), _normalize(idea.target_customer))
-        if key in seen:
+        customer = _normalize(idea.target_customer)
+        key = (_normalize(idea.name), customer)
+        if key in seen or (customer, idea.idea_id) in index:
             continue
-
-        too_close = False
-        for k in kept:
-            a = set(_normalize(idea.what_it_is).split())
-            b = set(_normalize(k.what_it_is).split())
-            if a and b:
-                j = len(a & b) / max(1, len(a | b))
-                if j >= 0.72 and _normalize(idea.target_customer) == _normalize(k.target_customer):
-                    too_close = True
-                    break
-
-        if too_close:
+        hits = index.query(idea.what_it_is)
+        if any(c == customer for (c, _), _ in hits):
             continue
-
+        index.add((customer, idea.idea_id), idea.what_it_is)
         seen.add(key)
         kept.append(idea)
 
@@ -556,7 +955,18 @@ class SupervisorAgent:
         seed: int = 7,
         model: Optional[str] = None,
         persona_seed: int = 7,
+        max_concurrency: int = 8,
+        per_model_limits: Optional[Dict[str, int]] = None,
+        batch_critiques: bool = False,
+        evaluation: str = "full",
+        halving_keep: float = 0.5,
+        first_round_critics: int = 1,
+        round_budget: Optional[int] = None,
+        dedupe_threshold: float = 0.72,
+        reuse_critiques: bool = True,
     ):
+        if evaluation not in ("full", "halving"):
+            raise ValueError(f"evaluation must be 'full' or 'halving', got {evaluation!r}")
         self.worker_count = int(worker_count)
         self.critic_count = int(critic_count)
         self.seed = seed
@@ -564,6 +974,21 @@ class SupervisorAgent:
         self.model = model or (self._rng.choice(MODELS) if MODELS else DEFAULT_MODEL)
         self.personas = PersonaSource(seed=persona_seed)
         self.critic_defs = critic_system_prompts[: self.critic_count]
+        self.max_concurrency = int(max_concurrency)
+        self.per_model_limits = dict(per_model_limits or {})
+        # Opt-in: one call per critic per batch of ideas instead of one per (idea, critic) pair.
+        self.batch_critiques = bool(batch_critiques)
+        # "halving": successive-halving tournament (see _evaluate_halving); "full": every idea x every critic.
+        self.evaluation = evaluation
+        self.halving_keep = min(1.0, max(0.05, float(halving_keep)))
+        self.first_round_critics = max(1, int(first_round_critics))
+        # Max (idea, critic) evaluations per round; None means only halving_keep limits it.
+        self.round_budget = int(round_budget) if round_budget else None
+        self.dedupe_threshold = float(dedupe_threshold)
+        # Reuse critiques stored by earlier runs (idea_index()) for ideas that near-duplicate stored ones.
+        self.reuse_critiques = bool(reuse_critiques)
+        self._fingerprints: Dict[str, str] = {}
+        self._reuse = {"matched_ideas": 0, "critiques_reused": 0, "calls_saved": 0}
 
     def build_brief(
         self,
@@ -597,7 +1022,10 @@ class SupervisorAgent:
         top_k: int = 5,
         max_workers: Optional[int] = None,
         max_critics: Optional[int] = None,
+        case_id: str = "",
     ) -> Dict[str, Any]:
+        started_at = time.time()
+        usage_before = llm_usage()
         n_workers = min(self.worker_count, int(max_workers)) if max_workers else self.worker_count
         n_critics = min(self.critic_count, int(max_critics)) if max_critics else self.critic_count
 
@@ -613,14 +1041,17 @@ class SupervisorAgent:
                 )
             )
 
-        ideas: List[Idea] = []
-        for w in workers:
-            try:
-                ideas.append(w.generate_one(brief))
-            except Exception:
-                continue
+        generated = _bounded_map(
+            lambda w: w.generate_one(brief),
+            workers,
+            self.max_concurrency,
+            model_of=lambda w: w.model,
+            per_model_limits=self.per_model_limits,
+        )
+        ideas: List[Idea] = [i for i in generated if i is not None]
 
-        ideas = dedupe_ideas(ideas)
+        ideas = dedupe_ideas(ideas, threshold=self.dedupe_threshold)
+        self._index_ideas(ideas)
 
         critics: List[PanelCritic] = []
         for c in self.critic_defs[:n_critics]:
@@ -632,24 +1063,175 @@ class SupervisorAgent:
                 )
             )
 
-        critiques: List[Critique] = []
-        for idea in ideas:
-            for critic in critics:
-                try:
-                    critiques.append(critic.critique(brief, idea))
-                except Exception:
-                    continue
+        if self.evaluation == "halving":
+            critiques, rounds = self._evaluate_halving(brief, ideas, critics, top_k)
+        else:
+            critiques = self._critique_all(brief, ideas, critics)
+            rounds = [{"ideas": len(ideas), "critics": len(critics), "critiques": len(critiques)}]
 
         aggregate = self._aggregate(ideas, critiques)
+        if self.evaluation == "halving":
+            # Finalists (full panels) first; ideas cut early were judged on fewer critics.
+            aggregate.sort(key=lambda r: -r["critic_count"])
         shortlist = self._final_shortlist(brief, aggregate, top_k=top_k)
+        usage_after = llm_usage()
 
-        return {
+        result = {
+            "run_id": f"supervisor_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
             "brief": brief,
             "ideas": [i.to_dict() for i in ideas],
             "critiques": [c.to_dict() for c in critiques],
             "aggregate": aggregate,
             "shortlist": shortlist,
+            "json_stats": json_repair_stats(),
+            "critique_stats": critique_stats(),
+            "reuse": dict(self._reuse),
+            "evaluation": {
+                "mode": self.evaluation,
+                "rounds": rounds,
+                "critiques": len(critiques),
+                "full_panel_critiques": len(ideas) * len(critics),
+            },
+            # Process-wide counters, so concurrent runs in one process see each other's calls.
+            "usage": {k: usage_after[k] - usage_before[k] for k in usage_after},
         }
+        catalog = run_catalog()
+        if catalog is not None:
+            catalog.record_supervisor(
+                result["run_id"], result, started_at, time.time(), models=[self.model], case_id=case_id
+            )
+        return result
+
+    def _index_ideas(self, ideas: List[Idea]) -> None:
+        """Maps each idea to the stored idea it duplicates (or stores it as new) for critique reuse."""
+        self._fingerprints = {}
+        self._reuse = {"matched_ideas": 0, "critiques_reused": 0, "calls_saved": 0}
+        index = idea_index() if self.reuse_critiques else None
+        if index is None:
+            return
+        for idea in ideas:
+            text = idea_text(idea)
+            fp = index.match(text)
+            if fp is not None:
+                self._reuse["matched_ideas"] += 1
+            else:
+                fp = index.add_idea(text, idea.to_dict())
+            self._fingerprints[idea.idea_id] = fp
+
+    @staticmethod
+    def _critic_key(brief: str, critic: PanelCritic) -> str:
+        return IdeaIndex.critic_key(
+            model=critic.model, system=critic.system_prompt, schema=CRITIC_JSON_SCHEMA, brief=brief
+        )
+
+    def _critique_all(self, brief: str, ideas: List[Idea], critics: List[PanelCritic]) -> List[Critique]:
+        index = idea_index() if self._fingerprints else None
+        found: Dict[Tuple[str, str], Critique] = {}
+        todo: Dict[str, List[Idea]] = {c.critic_name: list(ideas) for c in critics}
+
+        if index is not None:
+            for critic in critics:
+                key = self._critic_key(brief, critic)
+                todo[critic.critic_name] = []
+                for idea in ideas:
+                    data = index.get_critique(self._fingerprints[idea.idea_id], key)
+                    if data is None:
+                        todo[critic.critic_name].append(idea)
+                        continue
+                    found[(idea.idea_id, critic.critic_name)] = Critique(
+                        critique_id=f"crit_{uuid.uuid4().hex[:10]}",
+                        idea_id=idea.idea_id,
+                        critic_name=critic.critic_name,
+                        score=float(data.get("score", 0.0)),
+                        verdict=str(data.get("verdict", "revise")),
+                        summary=str(data.get("summary", "")),
+                        fatal_flags=_safe_list(data.get("fatal_flags")),
+                        improvements=_safe_list(data.get("improvements")),
+                        assumptions_to_validate=_safe_list(data.get("assumptions_to_validate")),
+                        model=data.get("model"),
+                    )
+                reused = len(ideas) - len(todo[critic.critic_name])
+                self._reuse["critiques_reused"] += reused
+                if self.batch_critiques and reused:
+                    k = critic.batch_size(brief, ideas)
+                    self._reuse["calls_saved"] += -(-len(ideas) // k) - (-(-len(todo[critic.critic_name]) // k))
+                else:
+                    self._reuse["calls_saved"] += reused
+
+        if not self.batch_critiques:
+            # Flatten the ideas x critics matrix in the same order the nested loops used.
+            pending = {c.critic_name: {i.idea_id for i in todo[c.critic_name]} for c in critics}
+            pairs = [(idea, critic) for idea in ideas for critic in critics if idea.idea_id in pending[critic.critic_name]]
+            results = _bounded_map(
+                lambda p: p[1].critique(brief, p[0]),
+                pairs,
+                self.max_concurrency,
+                model_of=lambda p: p[1].model,
+                per_model_limits=self.per_model_limits,
+            )
+            fresh = [c for c in results if c is not None]
+        else:
+            jobs = [
+                (critic, chunk)
+                for critic in critics
+                for chunk in critic.batches(brief, todo[critic.critic_name])
+            ]
+            results = _bounded_map(
+                lambda j: j[0].critique_batch(brief, j[1]),
+                jobs,
+                self.max_concurrency,
+                model_of=lambda j: j[0].model,
+                per_model_limits=self.per_model_limits,
+            )
+            fresh = [c for batch in results if batch for c in batch]
+
+        if index is not None:
+            keys = {c.critic_name: self._critic_key(brief, c) for c in critics}
+            for c in fresh:
+                data = {k: v for k, v in c.to_dict().items() if k not in ("critique_id", "idea_id")}
+                index.put_critique(self._fingerprints[c.idea_id], keys[c.critic_name], data)
+
+        found.update({(c.idea_id, c.critic_name): c for c in fresh})
+        # Same idea-major order as the unbatched path.
+        return [found[(i.idea_id, c.critic_name)] for i in ideas for c in critics if (i.idea_id, c.critic_name) in found]
+
+    def _evaluate_halving(
+        self, brief: str, ideas: List[Idea], critics: List[PanelCritic], top_k: int
+    ) -> Tuple[List[Critique], List[Dict[str, Any]]]:
+        """
+        Successive halving: every idea gets the first critic(s); after each round only the
+        best halving_keep fraction (never fewer than top_k) moves on, and the number of new
+        critics doubles, so each round costs about the same. Once the pool is down to top_k,
+        the remaining critics all run, leaving the finalists with full panels.
+        """
+        def critics_for(pool_size: int, used: int, r: int) -> int:
+            if pool_size <= top_k:
+                return len(critics) - used
+            return min(len(critics) - used, self.first_round_critics * 2**r)
+
+        critiques: List[Critique] = []
+        rounds: List[Dict[str, Any]] = []
+        pool = list(ideas)
+        used = 0
+        r = 0
+        while pool and used < len(critics):
+            n_new = critics_for(len(pool), used, r)
+            new = critics[used : used + n_new]
+            got = self._critique_all(brief, pool, new)
+            critiques.extend(got)
+            rounds.append({"ideas": len(pool), "critics": len(new), "critiques": len(got)})
+            used += n_new
+            r += 1
+            if used >= len(critics):
+                break
+
+            keep = max(top_k, math.ceil(len(pool) * self.halving_keep))
+            if self.round_budget:
+                keep = max(top_k, min(keep, self.round_budget // max(1, critics_for(keep, used, r))))
+            ranked = {row["idea"]["idea_id"]: n for n, row in enumerate(self._aggregate(pool, critiques))}
+            pool = sorted(pool, key=lambda i: ranked[i.idea_id])[:keep]
+
+        return critiques, rounds
 
     def _aggregate(self, ideas: List[Idea], critiques: List[Critique]) -> List[Dict[str, Any]]:
         by_idea: Dict[str, List[Critique]] = {}
@@ -696,7 +1278,7 @@ class SupervisorAgent:
             temperature=0.4,
             max_retries=MAX_RETRIES,
         )
-        return _json_or_repair(self.model, raw)
+        return _json_or_repair(self.model, raw, keys=("shortlist",))
 
 
 # ============================
@@ -712,18 +1294,30 @@ def run_supervised_generation(
     critic_count: int = 4,
     top_k: int = 5,
     seed: int = 7,
+    max_concurrency: int = 8,
+    per_model_limits: Optional[Dict[str, int]] = None,
+    batch_critiques: bool = False,
+    evaluation: str = "full",
+    reuse_critiques: bool = True,
+    case_id: str = "",
 ) -> Dict[str, Any]:
     sup = SupervisorAgent(
         worker_count=worker_count,
         critic_count=critic_count,
         seed=seed,
         persona_seed=seed,
+        max_concurrency=max_concurrency,
+        per_model_limits=per_model_limits,
+        batch_critiques=batch_critiques,
+        evaluation=evaluation,
+        reuse_critiques=reuse_critiques,
     )
-    return sup.run(profile=profile, query=query, skills_text=skills_text, extra=extra, top_k=top_k)
+    return sup.run(profile=profile, query=query, skills_text=skills_text, extra=extra, top_k=top_k, case_id=case_id)
 
 
 def _assert_key_present() -> None:
     # Helpful sanity check for Gemini API key setups.
+    _load_env()
     if not (os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")):
         raise RuntimeError(
             "Missing API key. Set GOOGLE_API_KEY (recommended) in your environment or .env file."
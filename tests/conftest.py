@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import types
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _response(content: str, prompt_tokens: int = 100, completion_tokens: int = 50) -> Any:
+    message = types.SimpleNamespace(content=content)
+    usage = types.SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+def _chunk(delta: Optional[str], usage: Any = None) -> Any:
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=delta))], usage=usage)
+
+
+class FakeProvider:
+    """
+    Local stand-in for litellm's completion API:
+    - records every request's kwargs (messages included) in calls
+    - answer(messages) picks the reply; the default returns "{}"
+    - delay_s holds each call open, so tests can cancel or close it mid-flight
+    """
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self.delay_s = 0.0
+        self.answer = lambda messages: "{}"
+        self._lock = threading.Lock()
+
+    def _record(self, kwargs: Dict[str, Any]) -> str:
+        with self._lock:
+            self.calls.append(kwargs)
+        return self.answer(kwargs["messages"])
+
+    def completion(self, **kwargs: Any) -> Any:
+        content = self._record(kwargs)
+        if self.delay_s:
+            threading.Event().wait(self.delay_s)
+        if kwargs.get("stream"):
+            return self._chunks(content, kwargs)
+        return _response(content)
+
+    async def acompletion(self, **kwargs: Any) -> Any:
+        content = self._record(kwargs)
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        if kwargs.get("stream"):
+            return self._achunks(content, kwargs)
+        return _response(content)
+
+    @staticmethod
+    def _pieces(content: str) -> List[str]:
+        return [content[i : i + 4] for i in range(0, len(content), 4)]
+
+    def _final(self, kwargs: Dict[str, Any]) -> List[Any]:
+        if (kwargs.get("stream_options") or {}).get("include_usage"):
+            return [_chunk(None, types.SimpleNamespace(prompt_tokens=100, completion_tokens=50))]
+        return []
+
+    def _chunks(self, content: str, kwargs: Dict[str, Any]) -> Any:
+        for piece in self._pieces(content):
+            yield _chunk(piece)
+        yield from self._final(kwargs)
+
+    async def _achunks(self, content: str, kwargs: Dict[str, Any]) -> Any:
+        for piece in self._pieces(content):
+            yield _chunk(piece)
+        for chunk in self._final(kwargs):
+            yield chunk
+
+
+def stage_answer(messages: List[Dict[str, Any]]) -> str:
+    """Minimal valid reply for whichever consulting stage sent messages."""
+    # The stage's own system + user text picks the reply, never the shared prefix (brief).
+    text = "\n".join(m["content"] for m in messages[-2:] if isinstance(m["content"], str))
+    if "QA panel" in text:
+        obj = {k: {"blocking_issues": [], "fixes": [], "severity": "low"} for k in ("logic", "numbers", "evidence", "risk")}
+    elif "blocking_issues" in text:
+        obj = {"blocking_issues": [], "fixes": [], "severity": "low"}
+    elif "executive_summary" in text:
+        obj = {"executive_summary": "Do X.", "recommendations": [], "assumptions": [], "claims": []}
+    elif "key_question" in text:
+        obj = {"key_question": "q", "issue_tree": {"node": "n", "children": []}}
+    elif "workstreams" in text:
+        obj = {"workstreams": [{"name": "w"}], "critical_path": ["a"]}
+    else:
+        obj = {"ok": True}
+    return json.dumps(obj)
+
+
+@pytest.fixture
+def provider(monkeypatch: pytest.MonkeyPatch) -> FakeProvider:
+    import llm
+
+    fake = FakeProvider()
+    monkeypatch.setattr(llm, "_litellm", lambda: fake)
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    return fake
+
+
+@pytest.fixture
+def consulting(provider: FakeProvider) -> FakeProvider:
+    """provider answering every ConsultingOrchestrator stage with valid JSON."""
+    provider.answer = stage_answer
+    return provider
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import sys
+
+import pytest
+
+from test_idea_generator import agents_vs2 as vs2
+
+
+class _RateLimited(Exception):
+    status_code = 429
+    retry_after = 0.0
+
+
+@pytest.fixture
+def critic(provider, monkeypatch):
+    monkeypatch.setitem(sys.modules, "litellm", provider)
+    monkeypatch.setattr(vs2, "_RESPONSE_CACHE", None)
+    monkeypatch.setattr(vs2, "LLM_CACHE_PATH", "")
+    monkeypatch.setattr(vs2, "_sleep_backoff", lambda attempt: None)
+    return vs2.PanelCritic(critic_name="skeptic", system_prompt="You critique ideas.", model="test/critic")
+
+
+def _ideas(n: int):
+    return [vs2.Idea(idea_id=f"i{k}", name=f"Idea {k}", what_it_is="w", how_it_makes_money="m", operating_steps=["s"]) for k in range(n)]
+
+
+def _single(messages) -> str:
+    return json.dumps({"score": 6, "verdict": "advance", "summary": "s"})
+
+
+def test_unusable_batch_falls_back_to_single_critiques(provider, critic):
+    def answer(messages):
+        return json.dumps({"critiques": "none"}) if "IDEAS (JSON" in messages[-1]["content"] else _single(messages)
+
+    provider.answer = answer
+    out = critic.critique_batch("brief", _ideas(3))
+    assert [c.idea_id for c in out] == ["i0", "i1", "i2"]
+
+
+def test_failed_batch_is_logged_before_falling_back(provider, critic, caplog):
+    def answer(messages):
+        if "IDEAS (JSON" in messages[-1]["content"]:
+            raise ValueError("400 request too large")
+        return _single(messages)
+
+    provider.answer = answer
+    with caplog.at_level("WARNING", logger=vs2.__name__):
+        out = critic.critique_batch("brief", _ideas(3))
+    assert len(out) == 3
+    assert "re-asking its 3 ideas" in caplog.text
+
+
+@pytest.mark.parametrize("error", [_RateLimited("429 Too Many Requests"), ConnectionError("reset by peer")])
+def test_transport_failure_is_raised_not_fanned_out(provider, critic, error):
+    def answer(messages):
+        if "IDEAS (JSON" in messages[-1]["content"]:
+            raise error
+        return _single(messages)
+
+    provider.answer = answer
+    with pytest.raises(RuntimeError):
+        critic.critique_batch("brief", _ideas(3))
+    assert all("IDEAS (JSON" in c["messages"][-1]["content"] for c in provider.calls)
+
+
+def test_supervisor_does_not_batch_by_default():
+    assert vs2.SupervisorAgent().batch_critiques is False
+
+
+def test_legacy_sampling_agents_bypass_the_response_cache(provider, monkeypatch, tmp_path):
+    from llm_cache import ResponseCache
+
+    monkeypatch.setitem(sys.modules, "litellm", provider)
+    monkeypatch.setattr(vs2, "_RESPONSE_CACHE", ResponseCache(str(tmp_path / "cache.sqlite")))
+    gen = vs2.GeneratorAgent()
+    critic = vs2.CriticAgent("You critique ideas.")
+    for _ in range(2):
+        gen.generate("same prompt")
+        critic.generate("same idea")
+    assert len(provider.calls) == 4
+
+    # Deterministic-enough stages still hit the cache.
+    panel = vs2.PanelCritic(critic_name="skeptic", system_prompt="You critique ideas.", model="test/critic")
+    provider.answer = _single
+    for _ in range(2):
+        panel.critique("brief", _ideas(1)[0])
+    assert len(provider.calls) == 5
+
+
+def _idea(idea_id: str, what: str, customer: str = "dentists", name: str = "") -> vs2.Idea:
+    return vs2.Idea(
+        idea_id=idea_id,
+        name=name or f"Name {idea_id}",
+        what_it_is=what,
+        how_it_makes_money="m",
+        operating_steps=["s"],
+        target_customer=customer,
+    )
+
+
+SCHEDULER = "an online booking and reminder service for small clinics that cuts no shows"
+
+
+def test_dedupe_drops_near_duplicates_for_the_same_customer():
+    ideas = [
+        _idea("a", SCHEDULER, name="Clinic Booker"),
+        _idea("b", SCHEDULER + " fast"),  # Jaccard 13/14
+        _idea("c", "a courier service for florists", name="clinic booker"),  # same name and customer
+    ]
+    assert [i.idea_id for i in vs2.dedupe_ideas(ideas)] == ["a"]
+
+
+def test_dedupe_keeps_distinct_ideas_and_other_customers():
+    ideas = [
+        _idea("a", SCHEDULER),
+        _idea("b", SCHEDULER, customer="vets"),
+        _idea("c", "a marketplace that matches freelance bookkeepers with local restaurants"),
+        _idea("d", "an online booking service for dog groomers with payments and reviews"),
+    ]
+    assert [i.idea_id for i in vs2.dedupe_ideas(ideas)] == ["a", "b", "c", "d"]
+
+
+def test_dedupe_across_calls_with_a_shared_index():
+    index = vs2.NearDupIndex(threshold=0.72)
+    first = [_idea("a", SCHEDULER)]
+    assert vs2.dedupe_ideas(first, index=index) == first
+    # The same idea again (repeated idea_id) and a near-duplicate of it are both already seen.
+    again = [_idea("a", SCHEDULER), _idea("b", SCHEDULER + " fast"), _idea("c", "a courier service for florists")]
+    assert [i.idea_id for i in vs2.dedupe_ideas(again, index=index)] == ["c"]
+
+
+@pytest.fixture
+def supervised(provider, monkeypatch):
+    """Provider answering as workers (idea n), critics (score n for idea n) and the shortlister."""
+    monkeypatch.setitem(sys.modules, "litellm", provider)
+    monkeypatch.setattr(vs2, "_RESPONSE_CACHE", None)
+    monkeypatch.setattr(vs2, "LLM_CACHE_PATH", "")
+    monkeypatch.setattr(vs2, "_sleep_backoff", lambda attempt: None)
+    monkeypatch.setattr(vs2, "_RUN_CATALOG", None)
+    monkeypatch.setattr(vs2, "RUN_CATALOG_PATH", "")
+    monkeypatch.setattr(vs2.PersonaSource, "next", lambda self: None)
+    workers = iter(range(1, 1000))
+
+    def answer(messages):
+        user = messages[-1]["content"]
+        if "Generate ONE idea." in user:
+            n = next(workers)
+            return json.dumps({"name": f"Idea {n}", "what_it_is": f"alpha{n} beta{n} gamma{n}", "target_customer": "smb"})
+        if "IDEA (JSON):" in user:
+            idea = json.loads(user.split("IDEA (JSON):\n", 1)[1].split("\n", 1)[0])
+            return json.dumps({"score": int(idea["name"].split()[-1]), "verdict": "advance", "summary": "s"})
+        return json.dumps({"shortlist": []})
+
+    provider.answer = answer
+    return provider
+
+
+def _supervise(evaluation: str):
+    sup = vs2.SupervisorAgent(
+        worker_count=8, critic_count=4, model="test/supervisor", max_concurrency=4, evaluation=evaluation, reuse_critiques=False
+    )
+    return sup.run(profile={}, query="ideas", top_k=2)
+
+
+def test_halving_narrows_the_pool_each_round(supervised):
+    out = _supervise("halving")
+    assert out["evaluation"]["rounds"] == [
+        {"ideas": 8, "critics": 1, "critiques": 8},
+        {"ideas": 4, "critics": 2, "critiques": 8},
+        {"ideas": 2, "critics": 1, "critiques": 2},
+    ]
+    panels = {row["idea"]["name"]: row["critic_count"] for row in out["aggregate"]}
+    # The lowest scorers are cut after one critic, the middle after three; finalists get all four.
+    assert panels == {"Idea 8": 4, "Idea 7": 4, "Idea 6": 3, "Idea 5": 3, "Idea 4": 1, "Idea 3": 1, "Idea 2": 1, "Idea 1": 1}
+    assert [row["idea"]["name"] for row in out["aggregate"][:2]] == ["Idea 8", "Idea 7"]
+    halving_calls = len(supervised.calls)
+
+    supervised.calls.clear()
+    full = _supervise("full")
+    assert full["evaluation"]["critiques"] == full["evaluation"]["full_panel_critiques"] == 32
+    # 8 workers + critiques + 1 shortlist call each.
+    assert halving_calls == 8 + 18 + 1
+    assert len(supervised.calls) == 8 + 32 + 1
+
+
+WORDS = "a booking and reminder service for small dental clinics that cuts no shows with text messages and deposits"
+
+
+def test_critiques_are_reused_for_a_near_identical_idea_in_a_later_run(supervised, monkeypatch, tmp_path):
+    from idea_index import IdeaIndex
+
+    index = IdeaIndex(str(tmp_path / "ideas.sqlite"))
+    monkeypatch.setattr(vs2, "_IDEA_INDEX", index)
+    ideas = iter(
+        [
+            {"name": "Clinic Booker", "what_it_is": WORDS, "target_customer": "dentists"},
+            # Next run: one word changed, then an unrelated idea.
+            {"name": "Clinic Booker", "what_it_is": WORDS.replace("small", "busy"), "target_customer": "dentists"},
+            {"name": "Route Planner", "what_it_is": "delivery route planning for florists", "target_customer": "florists"},
+        ]
+    )
+
+    def answer(messages):
+        user = messages[-1]["content"]
+        if "Generate ONE idea." in user:
+            return json.dumps(next(ideas))
+        if "IDEA (JSON):" in user:
+            return json.dumps({"score": 7, "verdict": "advance", "summary": "s"})
+        return json.dumps({"shortlist": []})
+
+    supervised.answer = answer
+
+    def run(workers: int):
+        supervised.calls.clear()
+        # One worker at a time keeps the generated ideas in the order listed above.
+        sup = vs2.SupervisorAgent(worker_count=workers, critic_count=2, model="test/reuse", max_concurrency=1)
+        out = sup.run(profile={}, query="ideas", top_k=2)
+        critic_calls = [c for c in supervised.calls if "IDEA (JSON):" in c["messages"][-1]["content"]]
+        return out, [json.loads(c["messages"][-1]["content"].split("IDEA (JSON):\n", 1)[1].split("\n", 1)[0])["name"] for c in critic_calls]
+
+    first, asked = run(1)
+    assert asked == ["Clinic Booker", "Clinic Booker"]
+    assert index.stats() == {"ideas": 1, "critiques": 2}
+
+    second, asked = run(2)
+    # Only the unrelated idea goes to the critics; the near-duplicate reuses both stored critiques.
+    assert asked == ["Route Planner", "Route Planner"]
+    assert second["reuse"] == {"matched_ideas": 1, "critiques_reused": 2, "calls_saved": 2}
+    assert len(second["critiques"]) == 4
+    assert index.stats() == {"ideas": 2, "critiques": 4}
+    index.close()
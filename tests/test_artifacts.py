@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import os
+import stat
+
+import pytest
+
+from artifacts import ArtifactStore
+from blobstore import BlobStore
+from case import CaseInput
+from llm import LLMClient
+from orchestrator import ConsultingOrchestrator
+
+
+def _open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_named_files_share_a_read_only_blob(tmp_path):
+    with ArtifactStore(str(tmp_path / "run"), fsync=False) as store:
+        digest = store.write_json("framing.json", {"key_question": "q"})
+        named = os.path.join(store.run_dir, "framing.json")
+        assert not stat.S_IMODE(os.stat(named).st_mode) & 0o222
+        assert os.path.samefile(named, store._blob_path(digest))
+        # Rewriting replaces the link; the old blob is untouched.
+        store.write_json("framing.json", {"key_question": "changed"})
+        assert store.get_blob(digest) == {"key_question": "q"}
+        assert store.read_json("framing.json") == {"key_question": "changed"}
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_context_manager_closes_append_handles(tmp_path, shared):
+    blobs = BlobStore(str(tmp_path / ".blobs"), fsync=False) if shared else None
+    before = _open_fds() if os.path.isdir("/proc/self/fd") else None
+    with ArtifactStore(str(tmp_path / "run"), fsync=False, blobs=blobs) as store:
+        store.add("brief", {"brief": "b"})
+        store.write_json("brief.json", {"brief": "b"})
+        assert store._fds
+    assert store._fds == {}
+    if before is not None:
+        assert _open_fds() == before
+    # Appending again reopens the index.
+    store.add("brief", {"brief": "c"})
+    store.close()
+    assert [e["kind"] for e in store.entries()] == ["brief", "brief"]
+
+
+def test_failed_run_releases_its_file_handles(consulting, tmp_path, monkeypatch):
+    closed = []
+    close = ArtifactStore.close
+
+    def tracking_close(self: ArtifactStore) -> None:
+        closed.append(self.run_dir)
+        close(self)
+
+    monkeypatch.setattr(ArtifactStore, "close", tracking_close)
+
+    def broken(messages):
+        raise ConnectionError("down")
+
+    consulting.answer = broken
+    llm = LLMClient(models=["test/artifacts"], max_retries=1, backoff_base_s=0.0)
+    orch = ConsultingOrchestrator(llm=llm, out_root=str(tmp_path), fsync=False, trace=False)
+    with pytest.raises(RuntimeError):
+        orch.run(case_id="broken", inp=CaseInput(profile={}, query="q", skills_text="", extra=""))
+    assert len(closed) == 1
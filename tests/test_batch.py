@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from datetime import datetime
+
+import orchestrator
+from case import CaseInput
+from catalog import _dir_started_at
+from cli import latest_run_dir, run_batch
+from llm import LLMClient
+from orchestrator import ConsultingOrchestrator
+
+INP = CaseInput(profile={"location": "UK"}, query="B2B ideas", skills_text="", extra="")
+
+
+def test_runs_started_in_the_same_second_get_their_own_directories(tmp_path, monkeypatch):
+    class FrozenClock:
+        @staticmethod
+        def utcnow():
+            return datetime(2026, 1, 2, 3, 4, 5)
+
+    monkeypatch.setattr(orchestrator, "datetime", FrozenClock)
+    dirs = [orchestrator.new_run_dir(str(tmp_path), "same") for _ in range(11)]
+    assert len(set(dirs)) == 11
+    assert os.path.basename(dirs[0]) == "same_20260102_030405"
+    assert os.path.basename(dirs[-1]) == "same_20260102_030405-11"
+    assert {_dir_started_at(d) for d in dirs} == {_dir_started_at(dirs[0])} != {None}
+
+    for d in (dirs[1], dirs[-1]):
+        os.makedirs(os.path.join(d, "stages"))
+        open(os.path.join(d, "stages", "brief.json"), "w").close()
+    assert latest_run_dir(str(tmp_path), "same") == dirs[-1]
+
+
+
+def test_batch_runs_of_one_case_id_do_not_collide(consulting, tmp_path):
+    llm = LLMClient(models=["test/batch"], max_retries=1, backoff_base_s=0.0)
+    orch = ConsultingOrchestrator(llm=llm, out_root=str(tmp_path / "runs"), fsync=False, trace=False)
+    out_path = str(tmp_path / "results.jsonl")
+    ok, failed = asyncio.run(run_batch(orch, [("dup", INP, ""), ("dup", INP, ""), ("dup", INP, "")], out_path, 3, reuse=False))
+    assert (ok, failed) == (3, 0)
+    with open(out_path, encoding="utf-8") as f:
+        run_dirs = [json.loads(line)["run_dir"] for line in f]
+    assert len(set(run_dirs)) == 3
+    for run_dir in run_dirs:
+        with open(os.path.join(run_dir, "case.json"), encoding="utf-8") as f:
+            assert json.load(f)["case_id"] == "dup"
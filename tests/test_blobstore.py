@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+import blobstore
+from artifacts import ArtifactStore
+from blobstore import BlobStore, live_digests
+
+
+def _age(store: BlobStore, digest: str, seconds: float) -> None:
+    path, _ = store._find(digest)
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_put_get_round_trip_stores_each_payload_once(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"), fsync=False)
+    data = b'{"a": 1}' * 100
+    digest = store.put(data)
+    assert store.put(data) == digest
+    assert store.get(digest) == data
+    assert store.stats()["blobs"] == 1
+    assert store.stats()["stored_bytes"] < len(data)
+    with pytest.raises(KeyError):
+        store.get("0" * 64)
+
+
+def test_zlib_is_used_without_zstandard_and_stays_readable(tmp_path, monkeypatch):
+    root = str(tmp_path / "blobs")
+    monkeypatch.setattr(blobstore, "_zstd", lambda: None)
+    store = BlobStore(root, fsync=False)
+    assert store.codec == "zlib"
+    digest = store.put(b"payload")
+    assert os.path.exists(os.path.join(root, digest[:2], digest + ".zz"))
+    with pytest.raises(RuntimeError):
+        BlobStore(root, codec="zstd")
+
+    monkeypatch.undo()
+    # A reader preferring another codec still finds the zlib blob.
+    assert BlobStore(root, fsync=False).get(digest) == b"payload"
+
+
+def test_gc_keeps_live_and_recent_blobs(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"), fsync=False)
+    live, stale, young = store.put(b"live"), store.put(b"stale"), store.put(b"young")
+    for digest in (live, stale):
+        _age(store, digest, 7200)
+
+    assert store.gc({live}, grace_s=3600, dry_run=True)["removed"] == 1
+    assert store.has(stale)
+    out = store.gc({live}, grace_s=3600)
+    assert out["removed"] == 1 and out["kept"] == 2
+    assert store.has(live) and store.has(young) and not store.has(stale)
+
+
+def test_gc_sees_registered_runs_outside_the_scanned_root(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"), fsync=False)
+    with ArtifactStore(str(tmp_path / "runs" / "a"), fsync=False, blobs=store) as a:
+        kept_a = a.write_json("framing.json", {"q": "a"})
+    with ArtifactStore(str(tmp_path / "elsewhere" / "b"), fsync=False, blobs=store) as b:
+        kept_b = b.write_json("framing.json", {"q": "b"})
+    # Reopening (resume) does not register the run again.
+    ArtifactStore(str(tmp_path / "runs" / "a"), fsync=False, blobs=store).close()
+    assert store.run_dirs() == [str(tmp_path / "runs" / "a"), str(tmp_path / "elsewhere" / "b")]
+
+    orphan = store.put(b"orphan")
+    for digest in (kept_a, kept_b, orphan):
+        _age(store, digest, 7200)
+    store.gc(live_digests(store), grace_s=3600)
+    assert store.has(kept_a) and store.has(kept_b) and not store.has(orphan)
+
+
+def test_readonly_store_does_not_create_the_blob_directory(tmp_path):
+    run_dir = tmp_path / "run"
+    root = tmp_path / "blobs"
+    with ArtifactStore(str(run_dir), fsync=False, blobs=BlobStore(str(root), fsync=False)) as store:
+        store.write_json("framing.json", {"q": "x"})
+    shutil.rmtree(root)
+
+    reader = ArtifactStore(str(run_dir), readonly=True)
+    assert reader.blobs is not None and reader.blobs.stats()["blobs"] == 0
+    assert not root.exists()
+
+
+def test_gc_refuses_a_store_without_a_registry_unless_given_the_runs_root(tmp_path, monkeypatch):
+    root = str(tmp_path / "blobs")
+    digest = BlobStore(root, fsync=False).put(b"from an older run")
+    monkeypatch.setattr(sys, "argv", ["blobstore.py", "gc", "--store", root, "--grace_s", "0"])
+    with pytest.raises(SystemExit):
+        blobstore.main()
+    assert BlobStore(root).has(digest)
+
+    monkeypatch.setattr(sys, "argv", ["blobstore.py", "gc", "--store", root, "--grace_s", "0", "--runs", str(tmp_path / "runs")])
+    blobstore.main()
+    assert not BlobStore(root).has(digest)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from case import CaseInput
+from catalog import RunCatalog
+from conftest import ROOT
+from llm import LLMClient
+from orchestrator import ConsultingOrchestrator
+
+
+def test_consulting_run_records_provider_usage(consulting, tmp_path):
+    catalog = RunCatalog(str(tmp_path / "catalog.sqlite"))
+    llm = LLMClient(models=["test/catalog"])
+    orch = ConsultingOrchestrator(llm=llm, out_root=str(tmp_path / "runs"), fsync=False, catalog=catalog)
+    orch.run(case_id="usage", inp=CaseInput(profile={}, query="q", skills_text="", extra=""))
+
+    (row,) = catalog.sql("SELECT prompt_tokens, completion_tokens, llm_calls FROM runs")
+    calls = len(consulting.calls)
+    assert row == {"prompt_tokens": 100 * calls, "completion_tokens": 50 * calls, "llm_calls": calls}
+
+
+def test_readonly_catalog_rejects_writes_hidden_in_a_select(tmp_path):
+    path = str(tmp_path / "catalog.sqlite")
+    RunCatalog(path).record_supervisor("r1", {}, started_at=0.0, finished_at=1.0, models=["m"])
+    ro = RunCatalog(path, readonly=True)
+    assert ro.sql("SELECT run_id FROM runs") == [{"run_id": "r1"}]
+    with pytest.raises(sqlite3.OperationalError):
+        ro.sql("WITH x AS (SELECT 1) DELETE FROM runs")
+    assert RunCatalog(path).sql("SELECT COUNT(*) AS n FROM runs") == [{"n": 1}]
+
+
+def test_sql_subcommand_is_read_only(tmp_path):
+    path = str(tmp_path / "catalog.sqlite")
+    RunCatalog(path).record_supervisor("r1", {}, started_at=0.0, finished_at=1.0, models=["m"])
+    cmd = [sys.executable, "catalog.py", "--db", path, "sql", "WITH x AS (SELECT 1) DELETE FROM runs"]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    assert proc.returncode != 0 and "read-only" in proc.stderr
+    assert RunCatalog(path).sql("SELECT COUNT(*) AS n FROM runs") == [{"n": 1}]
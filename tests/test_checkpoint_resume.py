@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from case import CaseInput
+from conftest import stage_answer
+from llm import LLMClient
+from orchestrator import ConsultingOrchestrator
+
+INP = CaseInput(profile={"location": "UK"}, query="B2B ideas", skills_text="", extra="")
+
+
+def _failing_synthesis(messages):
+    if "Produce synthesis." in messages[-1]["content"]:
+        raise ConnectionError("provider went away")
+    return stage_answer(messages)
+
+
+def _orch(tmp_path) -> ConsultingOrchestrator:
+    llm = LLMClient(models=["test/resume"], max_retries=1, backoff_base_s=0.0)
+    return ConsultingOrchestrator(llm=llm, out_root=str(tmp_path), fsync=False, trace=False)
+
+
+def test_resume_reruns_only_unfinished_stages(consulting, tmp_path):
+    consulting.answer = _failing_synthesis
+    with pytest.raises(RuntimeError):
+        _orch(tmp_path).run(case_id="resume", inp=INP)
+    (run_dir,) = [os.path.join(tmp_path, d) for d in os.listdir(tmp_path)]
+    done = sorted(fn[: -len(".json")] for fn in os.listdir(os.path.join(run_dir, "stages")))
+    assert "framing" in done and "synthesis" not in done
+
+    consulting.answer = stage_answer
+    consulting.calls.clear()
+    orch = _orch(tmp_path)
+    out = orch.resume(run_dir)
+    assert out["run_dir"] == run_dir
+    assert out["synthesis"]["executive_summary"] == "Do X."
+    # Synthesis plus each QA check; nothing that had a checkpoint is asked again.
+    assert len(consulting.calls) == 1 + len(orch.qa_types)
+
+
+
+def test_aresume_completes_a_failed_run(consulting, tmp_path):
+    consulting.answer = _failing_synthesis
+    with pytest.raises(RuntimeError):
+        asyncio.run(_orch(tmp_path).arun(case_id="aresume", inp=INP))
+    (run_dir,) = [os.path.join(tmp_path, d) for d in os.listdir(tmp_path)]
+
+    consulting.answer = stage_answer
+    out = asyncio.run(_orch(tmp_path).aresume(run_dir))
+    assert out["run_dir"] == run_dir
+    assert out["synthesis"]["executive_summary"] == "Do X."
+    with open(os.path.join(run_dir, "run.json"), encoding="utf-8") as f:
+        assert json.load(f)["case_id"] == "aresume"
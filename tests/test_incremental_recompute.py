@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from case import CaseInput
+from llm import LLMClient
+from orchestrator import ConsultingOrchestrator
+
+INP = CaseInput(profile={"location": "UK"}, query="B2B ideas", skills_text="", extra="")
+
+
+def _orch(tmp_path) -> ConsultingOrchestrator:
+    llm = LLMClient(models=["test/reuse"], max_retries=1, backoff_base_s=0.0)
+    return ConsultingOrchestrator(llm=llm, out_root=str(tmp_path), fsync=False, trace=False)
+
+
+def test_reuse_skips_stages_whose_inputs_are_unchanged(consulting, tmp_path):
+    first = _orch(tmp_path).run(case_id="reuse", inp=INP)
+    consulting.calls.clear()
+    second = _orch(tmp_path).run(case_id="reuse2", inp=INP, reuse_from=first["run_dir"])
+    assert consulting.calls == []
+    assert "framing" in second["reused_stages"] and "synthesis" in second["reused_stages"]
+
+
+def test_reuse_from_must_be_a_run_with_checkpoints(consulting, tmp_path):
+    missing = tmp_path / "missing"
+    with pytest.raises(FileNotFoundError):
+        _orch(tmp_path / "runs").run(case_id="x", inp=INP, reuse_from=str(missing))
+    assert not missing.exists()
+
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    with pytest.raises(ValueError):
+        _orch(tmp_path / "runs").run(case_id="x", inp=INP, reuse_from=str(empty))
+    # Nothing was created: neither in the directory named nor a new run directory.
+    assert os.listdir(empty) == []
+    assert not (tmp_path / "runs").exists()
+    assert consulting.calls == []
+
+
+
+def test_reuse_recomputes_stages_whose_inputs_changed(consulting, tmp_path):
+    first = _orch(tmp_path).run(case_id="reuse", inp=INP)
+    consulting.calls.clear()
+    changed = CaseInput(profile={"location": "UK"}, query="B2C ideas", skills_text="", extra="")
+    second = _orch(tmp_path).run(case_id="reuse2", inp=changed, reuse_from=first["run_dir"])
+    # The brief feeds every stage, so nothing matches the earlier run.
+    assert second["reused_stages"] == []
+    assert consulting.calls
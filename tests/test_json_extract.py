@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import pytest
+
+from schema import extract_json
+
+
+def test_extract_json_prefers_the_object_with_the_keys():
+    text = 'First {"note": 1} then ```json\n{"key_question": "q"}\n```'
+    assert extract_json(text, keys=("key_question",)) == {"key_question": "q"}
+    assert extract_json(text) == {"note": 1}
+
+
+def test_extract_json_skips_prose_braces_and_braces_in_strings():
+    text = 'Use {braces} sparingly. {"a": "}{", "b": {"c": 1}} and {"z": 2}'
+    assert extract_json(text) == {"a": "}{", "b": {"c": 1}}
+
+
+def test_extract_json_raises_without_an_object():
+    with pytest.raises(ValueError):
+        extract_json("no json here [1, 2]")
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import json
+import sys
+
+import pytest
+
+from schema import repair_json
+from test_idea_generator import agents_vs2 as vs2
+
+
+def test_repair_json_closes_truncated_output():
+    assert repair_json('{"a": [1, 2], "b": {"c": 3')["a"] == [1, 2]
+
+
+def test_repair_json_fixes_common_model_mistakes():
+    assert repair_json("{'a': 1, 'b': [1, 2,],}") == {"a": 1, "b": [1, 2]}
+    assert repair_json('{"a": "line\nbreak"}') == {"a": "line\nbreak"}
+
+
+def test_local_repair_runs_before_the_llm_round_trip(provider, monkeypatch):
+    monkeypatch.setitem(sys.modules, "litellm", provider)
+    monkeypatch.setattr(vs2, "_RESPONSE_CACHE", None)
+    monkeypatch.setattr(vs2, "LLM_CACHE_PATH", "")
+    provider.answer = lambda messages: json.dumps({"score": 5})
+    before = vs2.json_repair_stats()
+
+    assert vs2._json_or_repair("test/repair", "{'score': 5,}", keys=("score",)) == {"score": 5}
+    assert provider.calls == []
+    with pytest.raises(ValueError):
+        repair_json("not json at all")
+    assert vs2._json_or_repair("test/repair", "not json at all", keys=("score",)) == {"score": 5}
+    assert len(provider.calls) == 1
+
+    after = vs2.json_repair_stats()
+    assert after["local_repair"] - before["local_repair"] == 1
+    assert after["llm_repair"] - before["llm_repair"] == 1
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+
+from schema import IncrementalJSONParser
+
+
+def _feed_all(text: str, size: int):
+    parser = IncrementalJSONParser()
+    seen = []
+    for i in range(0, len(text), size):
+        seen += parser.feed(text[i : i + size])
+    return parser, seen
+
+
+def test_incremental_parser_emits_each_field_once_it_closes():
+    obj = {"a": 1, "b": "x, }\" y", "c": {"d": [1, {"e": "}"}]}, "f": [], "g": None, "h": True}
+    text = "Sure:\n```json\n" + json.dumps(obj) + "\n```"
+    for size in (1, 3, len(text)):
+        parser, seen = _feed_all(text, size)
+        assert seen == list(obj.items())
+        assert parser.fields == obj
+        assert parser.done
+
+
+def test_incremental_parser_holds_back_an_unfinished_value():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": "hel') == []
+    assert parser.feed('lo", "b": [1,') == [("a", "hello")]
+    assert parser.feed(" 2]}") == [("b", [1, 2])]
+    assert parser.done
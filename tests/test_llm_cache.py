@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import sys
+import types
+
+import pytest
+
+import llm_cache
+from llm_cache import ResponseCache
+from test_idea_generator import agents_vs2 as vs2
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_least_recently_used_entries_are_evicted_at_the_entry_cap(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_entries=3, max_age_s=None)
+    for k in "abc":
+        clock[0] += 1
+        cache.put(k, k)
+    clock[0] += 1
+    assert cache.get("a") == "a"  # now the most recently used
+    clock[0] += 1
+    cache.put("d", "d")
+    assert cache.stats()["entries"] == 3
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in "acd"] == ["a", "c", "d"]
+
+
+def test_entries_are_evicted_at_the_byte_cap(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_bytes=250, max_age_s=None)
+    for k in "abc":
+        clock[0] += 1
+        cache.put(k, "x" * 100)
+    stats = cache.stats()
+    assert stats["bytes"] <= 250 and stats["entries"] == 2
+    assert cache.get("a") is None
+
+
+def test_entries_expire_after_max_age(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_age_s=60)
+    cache.put("k", "v")
+    clock[0] += 30
+    assert cache.get("k") == "v"  # reads don't extend an entry's life
+    clock[0] += 31
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 0, "bytes": 0}
+
+
+def test_key_covers_model_temperature_and_messages():
+    messages = [{"role": "user", "content": "hi"}]
+    base = ResponseCache.key(model="m", messages=messages, temperature=0.5)
+    assert base == ResponseCache.key(temperature=0.5, messages=[{"content": "hi", "role": "user"}], model="m")
+    assert base != ResponseCache.key(model="m2", messages=messages, temperature=0.5)
+    assert base != ResponseCache.key(model="m", messages=messages, temperature=0.6)
+    assert base != ResponseCache.key(model="m", messages=[{"role": "user", "content": "hi!"}], temperature=0.5)
+
+
+def test_call_llm_only_reuses_an_identical_request(provider, monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "litellm", provider)
+    monkeypatch.setattr(vs2, "_RESPONSE_CACHE", ResponseCache(str(tmp_path / "c.sqlite")))
+    provider.answer = lambda messages: json.dumps({"n": len(provider.calls)})
+
+    first = vs2._call_llm(model="test/a", system="s", user="u", temperature=0.5)
+    assert vs2._call_llm(model="test/a", system="s", user="u", temperature=0.5) == first
+    assert len(provider.calls) == 1
+    vs2._call_llm(model="test/b", system="s", user="u", temperature=0.5)
+    vs2._call_llm(model="test/a", system="s", user="u", temperature=0.7)
+    vs2._call_llm(model="test/a", system="s", user="other", temperature=0.5)
+    assert len(provider.calls) == 4
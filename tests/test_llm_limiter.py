@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from llm import LLMClient
+from ratelimit import configure, limiter_for
+
+
+async def _collect(agen) -> str:
+    return "".join([d async for d in agen])
+
+
+def _client(model: str) -> LLMClient:
+    return LLMClient(models=[model], max_retries=1, backoff_base_s=0.0)
+
+
+def test_chat_releases_slot(provider):
+    model = "test/chat"
+    limiter = limiter_for(model)
+    assert _client(model).chat("s", "u", use_cache=False) == "{}"
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_achat_releases_slot(provider):
+    model = "test/cancel"
+    provider.delay_s = 5.0
+    limiter = limiter_for(model)
+
+    async def main() -> None:
+        task = asyncio.ensure_future(_client(model).achat("s", "u", use_cache=False))
+        while not provider.calls:
+            await asyncio.sleep(0.01)
+        assert limiter.in_flight == 1
+        limit = limiter.limit
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # A cancelled call says nothing about the provider's capacity.
+        assert limiter.limit == limit
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0
+
+
+def test_stream_closed_early_releases_slot(provider):
+    model = "test/stream"
+    provider.answer = lambda messages: "x" * 40
+    limiter = limiter_for(model)
+    stream = _client(model).stream_chat("s", "u", use_cache=False)
+    assert next(stream)
+    assert limiter.in_flight == 1
+    stream.close()
+    assert limiter.in_flight == 0
+
+
+def test_astream_closed_early_releases_slot(provider):
+    model = "test/astream"
+    provider.answer = lambda messages: "x" * 40
+    limiter = limiter_for(model)
+
+    async def main() -> None:
+        stream = _client(model).astream_chat("s", "u", use_cache=False)
+        assert await stream.__anext__()
+        assert limiter.in_flight == 1
+        await stream.aclose()
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_limits_from_env_set_after_import_apply(monkeypatch):
+    # As when LLMClient loads .env after ratelimit was imported.
+    monkeypatch.setenv("LLM_RPM", "120")
+    monkeypatch.setenv("LLM_TPM", "50000")
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "3")
+    limiter = limiter_for("test/env-limits")
+    assert limiter.max_concurrency == 3 and limiter.limit == 3
+    assert limiter.requests.capacity == 120
+    assert limiter.tokens.capacity == 50000
+    # configure() overrides one limit and keeps the env defaults for the rest.
+    assert configure("test/env-limits", max_concurrency=5).tokens.capacity == 50000
+
+
+_CALLS = {
+    "chat": lambda c: c.chat("s", "u", use_cache=False),
+    "achat": lambda c: asyncio.run(c.achat("s", "u", use_cache=False)),
+    "stream_chat": lambda c: "".join(c.stream_chat("s", "u", use_cache=False)),
+    "astream_chat": lambda c: asyncio.run(_collect(c.astream_chat("s", "u", use_cache=False))),
+}
+
+
+@pytest.mark.parametrize("method", sorted(_CALLS))
+def test_every_entry_point_retries_then_gives_up(provider, method):
+    model = f"test/retry-{method}"
+    failures = [ConnectionError("down")]
+
+    def answer(messages):
+        if failures:
+            raise failures.pop()
+        return '{"ok": true}'
+
+    provider.answer = answer
+    client = LLMClient(models=[model], max_retries=2, backoff_base_s=0.0)
+    assert _CALLS[method](client) == '{"ok": true}'
+    assert len(provider.calls) == 2
+    assert client.usage_stats()["calls"] == 1
+
+    failures.extend([ConnectionError("down")] * 2)
+    with pytest.raises(RuntimeError, match="after 2 retries") as info:
+        _CALLS[method](client)
+    assert isinstance(info.value.__cause__, ConnectionError)
+    assert limiter_for(model).in_flight == 0
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+
+from llm import LLMClient, usage_from_spans
+from tracing import Tracer, activate
+
+
+def test_stream_chat_records_final_chunk_usage(provider):
+    provider.answer = lambda messages: '{"a": 1}'
+    llm = LLMClient(models=["test/stream-usage"])
+    assert "".join(llm.stream_chat("s", "u", use_cache=False)) == '{"a": 1}'
+    assert provider.calls[0]["stream_options"] == {"include_usage": True}
+    assert llm.usage_stats()["prompt_tokens"] == 100
+    assert llm.usage_stats()["completion_tokens"] == 50
+
+
+def test_astream_chat_records_final_chunk_usage(provider):
+    provider.answer = lambda messages: '{"a": 1}'
+    llm = LLMClient(models=["test/astream-usage"])
+
+    async def main() -> str:
+        return "".join([d async for d in llm.astream_chat("s", "u", use_cache=False)])
+
+    assert asyncio.run(main()) == '{"a": 1}'
+    assert llm.usage_stats()["calls"] == 1
+    assert llm.usage_stats()["completion_tokens"] == 50
+
+
+def test_stream_span_carries_token_usage(provider):
+    provider.answer = lambda messages: '{"a": 1}'
+    llm = LLMClient(models=["test/stream-span"])
+    tracer = Tracer()
+    with activate(tracer):
+        "".join(llm.stream_chat("s", "u", use_cache=False))
+    (sp,) = [s for s in tracer.spans() if s.name == "llm.stream"]
+    assert (sp.args["prompt_tokens"], sp.args["completion_tokens"]) == (100, 50)
+    assert usage_from_spans(tracer.spans())["calls"] == 1
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from persona_snapshot import _OFFSET, PersonaSnapshot
+
+
+def _write(path: str, rows, index_rows=None) -> None:
+    offsets = [0]
+    with open(path, "wb") as f:
+        for row in rows:
+            f.write(json.dumps(row).encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+    if index_rows is not None:
+        offsets = [0]
+        for row in index_rows:
+            offsets.append(offsets[-1] + len(json.dumps(row).encode("utf-8")) + 1)
+    with open(path + ".idx", "wb") as f:
+        f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+
+
+def test_snapshot_reads_rows_and_samples_without_replacement(tmp_path):
+    path = str(tmp_path / "personas.jsonl")
+    rows = [{"persona": f"p{i}"} for i in range(10)]
+    _write(path, rows)
+    snap = PersonaSnapshot(path)
+    assert len(snap) == 10 and snap[3] == rows[3]
+    sample = snap.sample(seed=1)
+    assert sorted(next(sample)["persona"] for _ in range(10)) == sorted(r["persona"] for r in rows)
+    snap.close()
+
+
+def test_snapshot_refuses_data_swapped_in_without_its_index(tmp_path):
+    path = str(tmp_path / "personas.jsonl")
+    old = [{"persona": "old"}] * 3
+    # New data file in place, index still the old export's: the state between export's two renames.
+    _write(path, [{"persona": "a much longer new persona"}] * 5, index_rows=old)
+    with pytest.raises(RuntimeError):
+        PersonaSnapshot(path, retries=1)
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "personas.jsonl")
+    _write(path, [])
+    assert os.path.getsize(path) == 0
+    assert len(PersonaSnapshot(path)) == 0
+
+
+def test_snapshot_path_is_read_from_the_environment_when_used(tmp_path, monkeypatch):
+    from persona_snapshot import default_path, snapshot_exists
+
+    path = str(tmp_path / "late.jsonl")
+    _write(path, [{"persona": "late"}])
+    monkeypatch.setenv("PERSONA_SNAPSHOT", path)
+    assert default_path() == path
+    assert snapshot_exists()
+    assert PersonaSnapshot()[0] == {"persona": "late"}
+
+
+def test_persona_source_keeps_one_snapshot_open(tmp_path, monkeypatch):
+    from test_idea_generator import agents_vs2 as vs2
+
+    path = str(tmp_path / "personas.jsonl")
+    _write(path, [{"persona": f"p{i}"} for i in range(4)])
+    monkeypatch.setenv("PERSONA_SNAPSHOT", path)
+    opened = []
+
+    class Counting(PersonaSnapshot):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    monkeypatch.setattr(vs2, "PersonaSnapshot", Counting)
+    source = vs2.PersonaSource(seed=1)
+    assert source.next()["persona"].startswith("p")
+    source._iter = iter(())  # an exhausted or broken iterator makes next() start over
+    assert source.next() is not None
+    assert len(opened) == 1
+    source.close()
+    assert source._snapshot is None
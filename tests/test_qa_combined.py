@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from case import CaseInput
+from conftest import stage_answer
+from llm import LLMClient
+from orchestrator import ConsultingOrchestrator
+
+INP = CaseInput(profile={"location": "UK"}, query="B2B ideas", skills_text="", extra="")
+
+
+def test_sync_fallback_checks_run_concurrently(consulting, tmp_path):
+    lock = threading.Lock()
+    in_flight = [0]
+    peak = [0]
+
+    def answer(messages):
+        text = " ".join(m["content"] for m in messages[-2:] if isinstance(m["content"], str))
+        if "QA panel" in text:
+            raise ConnectionError("combined call failed")
+        if "blocking_issues" not in text:
+            return stage_answer(messages)
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return stage_answer(messages)
+
+    consulting.answer = answer
+    llm = LLMClient(models=["test/qa-combined"], max_retries=1, backoff_base_s=0.0)
+    orch = ConsultingOrchestrator(llm=llm, out_root=str(tmp_path), qa_mode="combined", max_concurrency=4, fsync=False, trace=False)
+    out = orch.run(case_id="qa", inp=INP)
+
+    assert [r["check"] for r in out["qa"]] == [q.name for q in orch.qa_types]
+    assert peak[0] > 1
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from scheduler import Stage, StageScheduler
+
+CURRENT = contextvars.ContextVar("CURRENT", default="unset")
+
+
+def _recorder(order, lock=None):
+    lock = lock or threading.Lock()
+
+    def make(name):
+        def fn():
+            with lock:
+                order.append(name)
+            return name
+
+        return fn
+
+    return make
+
+
+def _diamond(make):
+    return [
+        Stage("a", make("a")),
+        Stage("b", make("b"), requires=("a",)),
+        Stage("c", make("c"), requires=("a",)),
+        Stage("d", make("d"), requires=("b", "c")),
+    ]
+
+
+def _run(scheduler, use_async):
+    return asyncio.run(scheduler.arun()) if use_async else scheduler.run()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_stages_run_after_what_they_require(use_async):
+    order = []
+    results = _run(StageScheduler(_diamond(_recorder(order)), max_concurrency=4), use_async)
+    assert results == {"a": "a", "b": "b", "c": "c", "d": "d"}
+    assert order[0] == "a" and order[-1] == "d"
+    assert sorted(order[1:3]) == ["b", "c"]
+
+
+def test_one_worker_runs_stages_in_declaration_order():
+    order = []
+    stages = [Stage("c", _recorder(order)("c"), requires=("b",)), Stage("a", _recorder(order)("a")), Stage("b", _recorder(order)("b"))]
+    StageScheduler(stages, max_concurrency=1).run()
+    assert order == ["a", "b", "c"]
+
+
+def test_invalid_graphs_are_rejected_up_front():
+    noop = lambda: None  # noqa: E731
+    with pytest.raises(ValueError, match="cycle"):
+        StageScheduler([Stage("a", noop, requires=("c",)), Stage("b", noop, requires=("a",)), Stage("c", noop, requires=("b",))])
+    with pytest.raises(ValueError, match="unknown"):
+        StageScheduler([Stage("a", noop, requires=("missing",))])
+    with pytest.raises(ValueError, match="Duplicate"):
+        StageScheduler([Stage("a", noop), Stage("a", noop)])
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_a_failing_stage_stops_its_dependents(use_async):
+    order = []
+    make = _recorder(order)
+
+    def boom():
+        raise RuntimeError("stage failed")
+
+    stages = [
+        Stage("a", make("a")),
+        Stage("b", boom, requires=("a",)),
+        Stage("c", make("c"), requires=("b",)),
+        Stage("d", make("d"), requires=("c",)),
+    ]
+    with pytest.raises(RuntimeError, match="stage failed"):
+        _run(StageScheduler(stages, max_concurrency=2), use_async)
+    assert order == ["a"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_stages_see_the_callers_contextvars(use_async):
+    seen = {}
+
+    def read(name):
+        def fn():
+            seen[name] = CURRENT.get()
+            CURRENT.set(f"changed by {name}")  # stays inside the stage's own copy
+
+        return fn
+
+    async def aread():
+        seen["async"] = CURRENT.get()
+
+    stages = [Stage("x", read("x")), Stage("y", read("y"), requires=("x",))]
+    if use_async:
+        stages.append(Stage("async", lambda: None, afn=aread))
+
+    token = CURRENT.set("caller")
+    try:
+        _run(StageScheduler(stages, max_concurrency=2), use_async)
+        assert CURRENT.get() == "caller"
+    finally:
+        CURRENT.reset(token)
+    assert set(seen.values()) == {"caller"}
+    assert len(seen) == (3 if use_async else 2)
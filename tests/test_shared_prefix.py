@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from case import CaseInput
+from llm import LLMClient
+from orchestrator import ConsultingOrchestrator
+
+MODEL = "gemini/test-prefix"
+
+
+@pytest.mark.parametrize("qa_mode", ["separate", "combined"])
+def test_every_stage_after_framing_sends_the_same_cached_prefix(consulting, tmp_path, qa_mode):
+    llm = LLMClient(models=[MODEL], prefix_cache_min_tokens=0)
+    orch = ConsultingOrchestrator(llm=llm, out_root=str(tmp_path), qa_mode=qa_mode, fsync=False, trace=False)
+    orch.run(case_id="prefix", inp=CaseInput(profile={"location": "UK"}, query="B2B ideas", skills_text="", extra=""))
+
+    assert consulting.calls
+    firsts = [call["messages"][0] for call in consulting.calls]
+    for first in firsts:
+        assert first["content"][0]["cache_control"] == {"type": "ephemeral"}
+
+    framing = [f for f in firsts if "FRAMING" not in f["content"][0]["text"]]
+    after = [f for f in firsts if "FRAMING" in f["content"][0]["text"]]
+    # Only the framing stage itself runs before the framing exists.
+    assert len(framing) == 1
+    qa_calls = len(after) - 1 - 1 - len(orch.pod_types)  # minus workplan, synthesis and pods
+    assert qa_calls == (1 if qa_mode == "combined" else len(orch.qa_types))
+    assert len({json.dumps(f, sort_keys=True) for f in after}) == 1
+
+
+def test_prefix_is_counted_for_every_stage_that_sends_it(consulting, tmp_path):
+    llm = LLMClient(models=[MODEL], prefix_cache_min_tokens=0)
+    orch = ConsultingOrchestrator(llm=llm, out_root=str(tmp_path), fsync=False, trace=False)
+    out = orch.run(case_id="stats", inp=CaseInput(profile={"location": "UK"}, query="B2B ideas", skills_text="", extra=""))
+
+    with open(f"{out['run_dir']}/context.json", encoding="utf-8") as f:
+        stats = json.load(f)["stages"]
+    prefixed = sorted(k[: -len(".prefix")] for k in stats if k.endswith(".prefix"))
+    expected = ["framing", "synthesis", "workplan"] + [f"pod.{p.name}" for p in orch.pod_types] + [f"qa.{q.name}" for q in orch.qa_types]
+    assert prefixed == sorted(expected)
+    assert len(prefixed) == len(consulting.calls)
+    assert out["prompt_tokens_saved"] == sum(s["saved"] for s in stats.values())
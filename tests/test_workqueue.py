@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from workqueue import WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path) -> WorkQueue:
+    q = WorkQueue(str(tmp_path / "queue.sqlite"), lease_s=0.05)
+    for worker in ("a", "b"):
+        q.register_worker(worker)
+    return q
+
+
+def _job(q: WorkQueue, job_id: int):
+    return q._db.execute("SELECT status, lease_owner, attempts, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def _counts(q: WorkQueue):
+    return {w["worker_id"]: (w["done"], w["failed"]) for w in q.status()["workers"]}
+
+
+def test_reenqueue_is_a_noop(queue):
+    assert queue.enqueue("consulting", {"n": 1}, job_key="k")
+    assert not queue.enqueue("consulting", {"n": 2}, job_key="k")
+
+
+def test_expired_lease_holder_cannot_complete_over_the_new_owner(queue):
+    queue.enqueue("consulting", {}, job_key="k")
+    first = queue.claim("a")
+    time.sleep(0.1)
+    second = queue.claim("b")
+    assert second["id"] == first["id"] and second["attempt"] == 2
+
+    # "a" finishes late: its result must not land while "b" holds the lease.
+    assert not queue.complete(first["id"], "a", {"by": "a"})
+    assert _job(queue, first["id"])[:2] == ("leased", "b")
+    assert queue.complete(second["id"], "b", {"by": "b"})
+    status, owner, _, result, _ = _job(queue, first["id"])
+    assert status == "done" and owner == "b" and '"b"' in result
+    assert _counts(queue) == {"a": (0, 0), "b": (1, 0)}
+
+
+def test_expired_lease_holder_cannot_fail_the_job(queue):
+    queue.enqueue("consulting", {}, job_key="k")
+    first = queue.claim("a")
+    time.sleep(0.1)
+    queue.claim("b")
+
+    assert not queue.fail(first["id"], "a", "late failure")
+    assert _job(queue, first["id"])[:2] == ("leased", "b")
+    # Nor after "b" finished.
+    assert queue.complete(first["id"], "b", {})
+    assert not queue.fail(first["id"], "a", "late failure")
+    assert _job(queue, first["id"])[0] == "done"
+    assert _counts(queue) == {"a": (0, 0), "b": (1, 0)}
+
+
+def test_fail_requeues_with_backoff_then_marks_dead(queue):
+    queue.enqueue("consulting", {}, job_key="k", max_attempts=2)
+    job = queue.claim("a")
+    assert queue.fail(job["id"], "a", "boom", backoff_s=0.0)
+    assert _job(queue, job["id"])[:2] == ("queued", None)
+    job = queue.claim("a")
+    assert job["attempt"] == 2
+    assert queue.fail(job["id"], "a", "boom again")
+    status, _, attempts, _, error = _job(queue, job["id"])
+    assert (status, attempts, error) == ("dead", 2, "boom again")
+    assert queue.claim("a") is None
+    assert _counts(queue)["a"] == (0, 2)
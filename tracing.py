@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+Sink = Callable[["Span"], None]
+
+
+class Span:
+    """One timed operation. args (model, tokens, attempt, cache_hit, ...) end up in the trace."""
+
+    __slots__ = ("name", "cat", "args", "span_id", "parent_id", "lane", "start_ns", "end_ns")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any], span_id: int, parent_id: Optional[int], lane: Tuple[str, int]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.lane = lane
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    def set(self, **args: Any) -> None:
+        self.args.update(args)
+
+    @property
+    def duration_s(self) -> float:
+        return ((self.end_ns or time.perf_counter_ns()) - self.start_ns) / 1e9
+
+
+class _NoSpan:
+    """Stands in for a Span when no tracer is active, so call sites needn't check."""
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+_TRACER: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("tracer", default=None)
+_SPAN: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+def _lane() -> Tuple[str, int]:
+    # Spans on one Chrome "thread" must nest, so concurrent asyncio tasks each get their own lane.
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return ("task", id(task))
+    return ("thread", threading.get_ident())
+
+
+class Tracer:
+    """
+    Collects finished spans for one run:
+    - activate(tracer) makes it current for this context; spans opened with span() inside
+      it (including in threads started via the scheduler and in asyncio tasks) are recorded
+    - every finished span is also passed to each sink, e.g. to forward it to another backend;
+      a failing sink is dropped from the tracer rather than failing the run
+    - chrome_trace() renders complete ("X") events, one lane per thread or asyncio task,
+      loadable in chrome://tracing or Perfetto
+    """
+
+    def __init__(self, sinks: Sequence[Sink] = ()):
+        self.sinks: List[Sink] = list(sinks)
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._origin_ns = time.perf_counter_ns()
+        self._wall_origin = time.time()
+
+    def add_sink(self, sink: Sink) -> None:
+        self.sinks.append(sink)
+
+    def _next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def _finish(self, sp: Span) -> None:
+        with self._lock:
+            self._spans.append(sp)
+            sinks = list(self.sinks)
+        for sink in sinks:
+            try:
+                sink(sp)
+            except Exception:
+                with self._lock:
+                    if sink in self.sinks:
+                        self.sinks.remove(sink)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        spans = self.spans()
+        tids: Dict[Tuple[str, int], int] = {}
+        events: List[Dict[str, Any]] = []
+        pid = os.getpid()
+        for sp in sorted(spans, key=lambda s: s.start_ns):
+            if sp.lane not in tids:
+                tids[sp.lane] = tid = len(tids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": f"{sp.lane[0]} {tid}"}})
+            events.append(
+                {
+                    "name": sp.name,
+                    "cat": sp.cat,
+                    "ph": "X",
+                    "ts": (sp.start_ns - self._origin_ns) / 1000.0,
+                    "dur": ((sp.end_ns or sp.start_ns) - sp.start_ns) / 1000.0,
+                    "pid": pid,
+                    "tid": tids[sp.lane],
+                    "args": {**sp.args, "span_id": sp.span_id, "parent_id": sp.parent_id},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"started_at": self._wall_origin}}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{name: {"count", "total_s"}} over all spans, slowest first."""
+        out: Dict[str, Dict[str, float]] = {}
+        for sp in self.spans():
+            row = out.setdefault(sp.name, {"count": 0, "total_s": 0.0})
+            row["count"] += 1
+            row["total_s"] += sp.duration_s
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]["total_s"]))
+
+    def write_chrome(self, path: str) -> None:
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    token = _TRACER.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _TRACER.reset(token)
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _TRACER.get()
+
+
+@contextmanager
+def span(name: str, cat: str = "", current: bool = True, **args: Any) -> Iterator[Any]:
+    """
+    Times the enclosed block as a child of the current span. A no-op without an active tracer.
+    current=False records the span without making it the parent of spans opened inside the
+    block; use it in generators, whose body runs in the caller's context between yields.
+    """
+    tracer = _TRACER.get()
+    if tracer is None:
+        yield _NO_SPAN
+        return
+    parent = _SPAN.get()
+    sp = Span(name, cat, args, tracer._next_id(), parent.span_id if parent is not None else None, _lane())
+    token = _SPAN.set(sp) if current else None
+    try:
+        yield sp
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        sp.set(error=f"{type(e).__name__}: {e}"[:300])
+        raise
+    finally:
+        sp.end_ns = time.perf_counter_ns()
+        if token is not None:
+            _SPAN.reset(token)
+        tracer._finish(sp)
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from typing import Any, Dict, Tuple
+
+from context import builder_for, pick, shared_prefix
 from llm import LLMClient
 from prompts import workplan_system
 from schema import extract_json
@@ -11,17 +14,34 @@ class Workplanner:
     Turns framing into an execution plan: workstreams, tasks, critical path, risks.
     """
 
+    temperature = 0.4
+    context_budget = 6000
+
     def __init__(self, llm: LLMClient):
         self.llm = llm
 
-    def run(self, case: Case) -> None:
+    def prefix(self, case: Case) -> str:
+        return shared_prefix(case, self.llm, "workplan")
+
+    def prompt(self, case: Case) -> Tuple[str, str]:
         system = workplan_system()
-        user = (
-            "BRIEF:\n"
-            f"{case.state.brief}\n\n"
-            "FRAMING_JSON:\n"
-            f"{case.state.framing}\n\n"
-            "Generate a workplan."
+        # The rest of the framing travels in the shared prefix.
+        user = builder_for(case, self.llm).build(
+            "workplan",
+            [("FRAMING_DATA_NEEDED", pick(case.state.framing, ("data_needed",)))],
+            self.context_budget,
+            tail="Generate a workplan.",
         )
-        raw = self.llm.chat(system=system, user=user, temperature=0.4)
-        case.state.workplan = extract_json(raw)
\ No newline at end of file
+        return system, user
+
+    def run(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        raw = self.llm.chat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+        case.state.workplan = extract_json(raw, keys=("workstreams",))
+        return case.state.workplan
+
+    async def arun(self, case: Case) -> Dict[str, Any]:
+        system, user = self.prompt(case)
+        raw = await self.llm.achat(system=system, user=user, temperature=self.temperature, prefix=self.prefix(case))
+        case.state.workplan = extract_json(raw, keys=("workstreams",))
+        return case.state.workplan
\ No newline at end of file
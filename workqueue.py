@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional
+
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs(status, available_at);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    started_at REAL,
+    last_seen REAL,
+    current_job INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class WorkQueue:
+    """
+    Durable job queue in a local SQLite file:
+    - jobs are claimed under a time-limited lease; a worker that dies loses its lease
+      and the job is handed out again (at-least-once completion)
+    - failed jobs are retried with backoff until max_attempts, then marked dead
+    - any number of worker processes can share the file; across hosts the shared
+      filesystem must honour POSIX locks (local disks do, many NFS setups don't)
+    """
+
+    def __init__(self, path: str = "runs/queue.sqlite", lease_s: float = 900.0):
+        self.path = path
+        self.lease_s = float(lease_s)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], job_key: Optional[str] = None, max_attempts: int = 3) -> bool:
+        """Adds a job; returns False if job_key is already queued (re-enqueueing is a no-op)."""
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO jobs (job_key, kind, payload, max_attempts, available_at, enqueued_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job_key or uuid.uuid4().hex, kind, json.dumps(payload, ensure_ascii=False), int(max_attempts), now, now),
+            )
+            return cur.rowcount == 1
+
+    def claim(self, worker_id: str, kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        kind_sql = ""
+        params: List[Any] = [now, now]
+        if kinds:
+            kind_sql = f" AND kind IN ({','.join('?' for _ in kinds)})"
+            params += list(kinds)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Leases that ran out with no attempts left are dead, not retried.
+                self._db.execute(
+                    "UPDATE jobs SET status = 'dead', error = COALESCE(error, 'lease expired'), finished_at = ?"
+                    " WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = self._db.execute(
+                    "SELECT id, job_key, kind, payload, attempts FROM jobs"
+                    " WHERE ((status = 'queued' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?))"
+                    f"{kind_sql} ORDER BY id LIMIT 1",
+                    params,
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?,"
+                    " attempts = attempts + 1, started_at = ? WHERE id = ?",
+                    (worker_id, now + self.lease_s, now, row[0]),
+                )
+                self._db.execute("UPDATE workers SET current_job = ?, last_seen = ? WHERE worker_id = ?", (row[0], now, worker_id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return {"id": row[0], "job_key": row[1], "kind": row[2], "payload": json.loads(row[3]), "attempt": row[4] + 1}
+
+    def heartbeat(self, worker_id: str, job_id: Optional[int] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE workers SET last_seen = ? WHERE worker_id = ?", (now, worker_id))
+            if job_id is not None:
+                self._db.execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                    (now + self.lease_s, job_id, worker_id),
+                )
+
+    def _release_worker(self, worker_id: str, counter: Optional[str], now: float) -> None:
+        bump = f"{counter} = {counter} + 1, " if counter else ""
+        self._db.execute(f"UPDATE workers SET {bump}current_job = NULL, last_seen = ? WHERE worker_id = ?", (now, worker_id))
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Records the result if worker_id still holds the job's lease. Returns False when the
+        lease expired and another worker reclaimed the job; that worker's outcome stands.
+        """
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ?"
+                " WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(result, ensure_ascii=False), now, job_id, worker_id),
+            )
+            owned = cur.rowcount == 1
+            self._release_worker(worker_id, "done" if owned else None, now)
+            return owned
+
+    def fail(self, job_id: int, worker_id: str, error: str, backoff_s: float = 5.0) -> bool:
+        """Requeues the job with backoff (or marks it dead); like complete(), only while the lease is held."""
+        now = time.time()
+        with self._lock:
+            # One statement, so the attempts it reads are those of the lease it checks.
+            cur = self._db.execute(
+                "UPDATE jobs SET error = ?,"
+                " status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,"
+                " finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE finished_at END,"
+                " available_at = CASE WHEN attempts >= max_attempts THEN available_at"
+                " ELSE ? + ? * (1 << (attempts - 1)) END,"
+                " lease_owner = NULL, lease_expires = NULL"
+                " WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (error, now, now, float(backoff_s), job_id, worker_id),
+            )
+            owned = cur.rowcount == 1
+            self._release_worker(worker_id, "failed" if owned else None, now)
+            return owned
+
+    def register_worker(self, worker_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, host, pid, started_at, last_seen) VALUES (?, ?, ?, ?, ?)",
+                (worker_id, socket.gethostname(), os.getpid(), now, now),
+            )
+
+    def status(self, window_s: float = 3600.0) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            recent = self._db.execute(
+                "SELECT COUNT(*), AVG(finished_at - started_at) FROM jobs WHERE status = 'done' AND finished_at >= ?",
+                (now - window_s,),
+            ).fetchone()
+            workers = self._db.execute(
+                "SELECT worker_id, host, pid, last_seen, current_job, done, failed FROM workers ORDER BY worker_id"
+            ).fetchall()
+        return {
+            "depth": counts.get("queued", 0),
+            "counts": counts,
+            "throughput_per_min": round(recent[0] / (window_s / 60.0), 2),
+            "avg_job_s": round(recent[1] or 0.0, 2),
+            "workers": [
+                {
+                    "worker_id": w[0],
+                    "host": w[1],
+                    "pid": w[2],
+                    "idle_s": round(now - (w[3] or now), 1),
+                    "current_job": w[4],
+                    "done": w[5],
+                    "failed": w[6],
+                }
+                for w in workers
+            ],
+        }
+
+
+def consulting_handler() -> Handler:
+    """Builds the LLM client and orchestrator once per worker, then runs one case per job."""
+    from case import CaseInput
+    from catalog import RunCatalog
+    from llm import LLMClient
+    from llm_cache import ResponseCache
+    from orchestrator import ConsultingOrchestrator
+
+    orch = ConsultingOrchestrator(llm=LLMClient(cache=ResponseCache()), catalog=RunCatalog())
+
+    def handle(payload: Dict[str, Any]) -> Dict[str, Any]:
+        res = orch.run(case_id=payload["case_id"], inp=CaseInput(**payload["inp"]))
+        return {
+            "run_dir": res["run_dir"],
+            "executive_summary": res["synthesis"].get("executive_summary", ""),
+            "qa_severity": {q.get("check"): q.get("severity") for q in res["qa"]},
+        }
+
+    return handle
+
+
+def supervisor_handler() -> Handler:
+    from test_idea_generator.agents_vs2 import run_supervised_generation
+
+    def handle(payload: Dict[str, Any]) -> Dict[str, Any]:
+        res = run_supervised_generation(**payload)
+        return {"shortlist": res["shortlist"], "ideas": len(res["ideas"]), "critiques": len(res["critiques"])}
+
+    return handle
+
+
+HANDLERS: Dict[str, Callable[[], Handler]] = {
+    "consulting": consulting_handler,
+    "supervisor": supervisor_handler,
+}
+
+
+def run_worker(
+    queue: WorkQueue,
+    kinds: Optional[List[str]] = None,
+    worker_id: Optional[str] = None,
+    poll_s: float = 2.0,
+    max_jobs: Optional[int] = None,
+    exit_when_empty: bool = False,
+) -> int:
+    """Pulls jobs until told to stop; returns the number of jobs handled."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:4]}"
+    queue.register_worker(worker_id)
+    handlers: Dict[str, Handler] = {}
+    handled = 0
+
+    while max_jobs is None or handled < max_jobs:
+        job = queue.claim(worker_id, kinds)
+        if job is None:
+            if exit_when_empty:
+                break
+            queue.heartbeat(worker_id)
+            time.sleep(poll_s)
+            continue
+
+        stop = threading.Event()
+
+        def beat(job_id: int = job["id"]) -> None:
+            while not stop.wait(queue.lease_s / 3.0):
+                queue.heartbeat(worker_id, job_id)
+
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+        try:
+            if job["kind"] not in handlers:
+                handlers[job["kind"]] = HANDLERS[job["kind"]]()
+            result = handlers[job["kind"]](job["payload"])
+        except Exception as e:
+            queue.fail(job["id"], worker_id, f"{type(e).__name__}: {e}")
+        else:
+            queue.complete(job["id"], worker_id, result)
+        finally:
+            stop.set()
+            beater.join()
+        handled += 1
+
+    return handled
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Durable multi-process job queue for consulting / supervisor runs")
+    ap.add_argument("--db", type=str, default="runs/queue.sqlite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    enq = sub.add_parser("enqueue", help="Add jobs from a JSONL file")
+    enq.add_argument("jobs_file")
+    enq.add_argument("--kind", choices=sorted(HANDLERS), default="consulting")
+    enq.add_argument("--max_attempts", type=int, default=3)
+
+    wk = sub.add_parser("worker", help="Run a worker process")
+    wk.add_argument("--kind", action="append", choices=sorted(HANDLERS), help="Only take these job kinds")
+    wk.add_argument("--lease_s", type=float, default=900.0)
+    wk.add_argument("--max_jobs", type=int, default=None)
+    wk.add_argument("--exit_when_empty", action="store_true")
+
+    sub.add_parser("status", help="Queue depth, throughput and per-worker progress")
+    args = ap.parse_args()
+
+    if args.cmd == "enqueue":
+        queue = WorkQueue(args.db)
+        added = 0
+        if args.kind == "consulting":
+            from cli import read_cases
+
+            for case_id, inp, error in read_cases(args.jobs_file):
+                if inp is None:
+                    print(f"skipping {case_id}: {error}")
+                    continue
+                payload = {"case_id": case_id, "inp": asdict(inp)}
+                added += queue.enqueue("consulting", payload, job_key=case_id, max_attempts=args.max_attempts)
+        else:
+            with open(args.jobs_file, "r", encoding="utf-8") as f:
+                for n, line in enumerate(f, start=1):
+                    if line.strip():
+                        payload = json.loads(line)
+                        key = str(payload.pop("job_id", "") or f"{os.path.basename(args.jobs_file)}:{n}")
+                        added += queue.enqueue("supervisor", payload, job_key=key, max_attempts=args.max_attempts)
+        print(f"Enqueued {added} jobs into {args.db}")
+    elif args.cmd == "worker":
+        queue = WorkQueue(args.db, lease_s=args.lease_s)
+        n = run_worker(queue, kinds=args.kind, max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty)
+        print(f"Worker handled {n} jobs")
+    else:
+        print(json.dumps(WorkQueue(args.db).status(), indent=2))
+
+
+if __name__ == "__main__":
+    main()